@@ -1,12 +1,31 @@
 """Options prediction package scaffolding."""
 
 __all__ = [
+    "cache",
+    "checkpoint",
     "config",
     "data",
+    "features",
     "llm",
+    "llm_stub",
+    "metrics",
     "notes",
+    "packstore",
     "predictor",
+    "profiling",
+    "price_index",
     "backtest",
+    "results",
     "runner",
+    "runstore",
+    "scheduler",
+    "service",
+    "screening",
+    "sweep",
+    "throttle",
+    "transport",
+    "universe",
+    "walkforward",
+    "bench",
     "cli",
 ]
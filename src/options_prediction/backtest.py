@@ -2,16 +2,37 @@ from __future__ import annotations
 
 import csv
 import datetime as dt
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional
 
 from .config import AppConfig
-from .data import earnings_dates, end_of_day_close, price_on_dates
+from .data import PriceSeries, earnings_dates, load_price_batch, packed_price_index, price_on_dates
+from .features import FeatureStore
 from .predictor import Predictor
+from .price_index import PriceIndex
+from .profiling import span
 
 
-@dataclass
+def price_direction(before: float | None, after: float | None) -> str:
+    if before is None or after is None:
+        return "unknown"
+    if after > before:
+        return "up"
+    if after < before:
+        return "down"
+    return "flat"
+
+
+def prediction_correct(predicted: str, actual: str) -> bool:
+    if actual == "unknown":
+        return False
+    if predicted == "flat":
+        return actual == "flat"
+    return predicted == actual
+
+
+@dataclass(slots=True)
 class BacktestResult:
     ticker: str
     earnings_date: dt.datetime
@@ -21,99 +42,192 @@ class BacktestResult:
     predicted_direction: str
     confidence: float
     rationale: str
+    horizon_returns: Dict[int, float | None] = field(default_factory=dict)
+    eps_surprise: float | None = None
 
     @property
     def actual_direction(self) -> str:
-        if self.pre_close is None or self.post_close is None:
-            return "unknown"
-        if self.post_close > self.pre_close:
-            return "up"
-        if self.post_close < self.pre_close:
-            return "down"
-        return "flat"
+        return price_direction(self.pre_close, self.post_close)
 
     @property
     def correct(self) -> bool:
-        if self.actual_direction == "unknown":
-            return False
-        if self.predicted_direction == "flat":
-            return self.actual_direction == "flat"
-        return self.predicted_direction == self.actual_direction
+        return prediction_correct(self.predicted_direction, self.actual_direction)
+
+    def horizon_direction(self, horizon: int) -> str:
+        value = self.horizon_returns.get(horizon)
+        return "unknown" if value is None else price_direction(0.0, value)
+
+    def horizon_correct(self, horizon: int) -> bool:
+        return prediction_correct(self.predicted_direction, self.horizon_direction(horizon))
+
+
+def result_to_dict(result: BacktestResult) -> dict:
+    """JSON-safe form of ``result``; the inverse of :func:`result_from_dict`."""
+    return {
+        "ticker": result.ticker,
+        "earnings_date": result.earnings_date.isoformat(),
+        "pre_close": result.pre_close,
+        "post_close": result.post_close,
+        "predicted_direction": result.predicted_direction,
+        "confidence": result.confidence,
+        "rationale": result.rationale,
+        "horizon_returns": {str(h): value for h, value in result.horizon_returns.items()},
+        "eps_surprise": result.eps_surprise,
+    }
+
+
+def result_from_dict(record: dict) -> BacktestResult:
+    return BacktestResult(
+        ticker=record["ticker"],
+        earnings_date=dt.datetime.fromisoformat(record["earnings_date"]),
+        pre_close=record["pre_close"],
+        post_close=record["post_close"],
+        direction="unknown",
+        predicted_direction=record["predicted_direction"],
+        confidence=record["confidence"],
+        rationale=record["rationale"],
+        horizon_returns={int(h): value for h, value in record["horizon_returns"].items()},
+        eps_surprise=record.get("eps_surprise"),
+    )
+
+
+@dataclass
+class SymbolData:
+    symbol: str
+    events: List[dict]
+    prices: PriceSeries
+    error: Optional[str] = None
+    index: Optional[PriceIndex] = None
 
 
 class Backtester:
     def __init__(self, config: AppConfig):
         self.config = config
         self.predictor = Predictor(config)
+        self.features = (
+            FeatureStore(
+                config.run.cache_dir if config.data.cache_enabled else None,
+                dt.timedelta(days=config.data.post_event_window_days),
+            )
+            if config.llm.context_features
+            else None
+        )
+
+    def load_symbols(self, symbols: Iterable[str]) -> List[SymbolData]:
+        """Fetch earnings and prices for ``symbols``; safe to call from fetch threads.
+
+        Closes come from one bulk download; if it fails, each symbol falls back
+        to its own download. A symbol whose fetch fails carries the error (and
+        the bulk download's, if any) instead of raising so the rest of the
+        batch is kept.
+        """
+        symbols = list(symbols)
+        prices: Dict[str, PriceSeries] = {}
+        indexes: Dict[str, PriceIndex] = {}
+        bulk_error: Optional[str] = None
+        try:
+            with span("backtest.fetch_prices"):
+                if self.config.data.offline_mode and self.config.data.packed_store is not None:
+                    indexes = {symbol: packed_price_index(symbol, self.config.data) for symbol in symbols}
+                else:
+                    prices = load_price_batch(symbols, self.config.data, self.config.run.cache_dir)
+        except Exception as exc:
+            bulk_error = f"{type(exc).__name__}: {exc}"
+            print(f"[backtest] Bulk price download for {len(symbols)} tickers failed ({bulk_error}); fetching per ticker")
+        loaded: List[SymbolData] = []
+        for symbol in symbols:
+            try:
+                with span("backtest.fetch_earnings", symbol):
+                    events = earnings_dates(symbol, self.config.data, self.config.run.cache_dir)
+                series = prices.get(symbol)
+                index = indexes.get(symbol)
+                if series is None and index is None and events:
+                    earnings_days = [event["earnings_date"] for event in events]
+                    series = price_on_dates(symbol, earnings_days, self.config.data, self.config.run.cache_dir)
+                loaded.append(SymbolData(symbol, events, series or [], index=index))
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                if bulk_error is not None:
+                    error += f" (after bulk download failed: {bulk_error})"
+                loaded.append(SymbolData(symbol, [], [], error=error))
+        return loaded
 
     def backtest_symbol(self, symbol: str) -> List[BacktestResult]:
+        events = earnings_dates(symbol, self.config.data, self.config.run.cache_dir)
+        if not events:
+            return []
+        earnings_days = [event["earnings_date"] for event in events]
+        prices = price_on_dates(symbol, earnings_days, self.config.data, self.config.run.cache_dir)
+        return self.evaluate(SymbolData(symbol, events, prices))
+
+    def evaluate(self, data: SymbolData) -> List[BacktestResult]:
+        """Resolve event windows and run predictions for already-fetched data."""
         results: List[BacktestResult] = []
-        events = earnings_dates(symbol, self.config.data)
+        symbol, events, prices = data.symbol, data.events, data.prices
         if not events:
             return results
-        earnings_days = [event["earnings_date"] for event in events]
-        prices = price_on_dates(symbol, earnings_days, self.config.data)
-        for event in events:
-            date = event["earnings_date"]
-            eps_surprise = float(event.get("surprise", 0.0) or 0.0)
-            closes = end_of_day_close(prices, date)
-            if closes is None:
-                continue
-            pre_close, post_close = closes
-            prediction = self.predictor.predict(symbol, eps_surprise)
+        horizons = self.config.data.horizons
+        with span("backtest.window_lookup", symbol):
+            index = data.index if data.index is not None else PriceIndex.from_series(prices)
+            windows = index.event_windows(
+                [event["earnings_date"] for event in events],
+                horizons,
+                dt.timedelta(days=self.config.data.post_event_window_days),
+            )
+        resolved = [
+            (event, window, float(event.get("surprise", 0.0) or 0.0))
+            for event, window in zip(events, windows)
+            if window is not None
+        ]
+        extras = None
+        if self.features is not None:
+            with span("backtest.features", symbol):
+                extras = self.features.for_events(symbol, index, [event["earnings_date"] for event, _, _ in resolved])
+        predictions = self.predictor.predict_batch([(symbol, eps_surprise) for _, _, eps_surprise in resolved], extras)
+        for (event, window, eps_surprise), prediction in zip(resolved, predictions):
+            pre_close, post_close, horizon_closes = window
             results.append(
                 BacktestResult(
                     ticker=symbol,
-                    earnings_date=date,
+                    earnings_date=event["earnings_date"],
                     pre_close=pre_close,
                     post_close=post_close,
                     direction="unknown",  # derived via property
                     predicted_direction=prediction.direction,
                     confidence=prediction.confidence,
                     rationale=prediction.rationale,
+                    horizon_returns={
+                        h: close / pre_close - 1.0 if close is not None and pre_close else None
+                        for h, close in zip(horizons, horizon_closes)
+                    },
+                    eps_surprise=eps_surprise,
                 )
             )
         return results
 
-    def summarize(self, results: List[BacktestResult]) -> dict:
-        total = len(results)
-        correct = sum(1 for r in results if r.correct)
-        accuracy = correct / total if total else 0.0
-        return {
-            "total_predictions": total,
-            "correct": correct,
-            "accuracy": accuracy,
+    def summarize(self, results: Iterable[BacktestResult]) -> dict:
+        from .metrics import GroupMetrics, compute
+        from .results import ResultBatch
+
+        horizons = self.config.data.horizons
+        run = compute(ResultBatch.from_results(results, horizons)).get("all", GroupMetrics())
+        summary = {
+            "total_predictions": run.events,
+            "correct": run.correct,
+            "accuracy": run.accuracy,
+            "weighted_accuracy": run.weighted_accuracy,
+            "mean_return": run.mean_return,
         }
+        for h in horizons:
+            summary[f"accuracy_{h}d"] = run.horizon_accuracy.get(h, 0.0)
+        return summary
 
-    def export_results(self, results: List[BacktestResult], path: Path) -> None:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            writer.writerow(
-                [
-                    "ticker",
-                    "earnings_date",
-                    "pre_close",
-                    "post_close",
-                    "actual_direction",
-                    "predicted_direction",
-                    "confidence",
-                    "rationale",
-                ]
-            )
-            for r in results:
-                writer.writerow(
-                    [
-                        r.ticker,
-                        r.earnings_date,
-                        r.pre_close,
-                        r.post_close,
-                        r.actual_direction,
-                        r.predicted_direction,
-                        r.confidence,
-                        r.rationale,
-                    ]
-                )
+    def export_results(self, results: Iterable[BacktestResult], path: Path) -> None:
+        """Write ``results`` to CSV, or to Parquet when ``path`` ends in ``.parquet``."""
+        from .results import open_result_writer
+
+        with open_result_writer(path, self.config.data.horizons) as writer:
+            writer.write(results)
 
 
 @dataclass
@@ -0,0 +1,262 @@
+"""Synthetic-universe benchmarks for the backtest hot paths."""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import datetime as dt
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .backtest import Backtester
+from .checks import HEAVY_MODULES
+from .config import AppConfig, DataConfig, LLMConfig, RunConfig
+from .data import _sample_earnings, _sample_prices, end_of_day_close, pack_sample_data
+from .price_index import PriceIndex
+from .runner import run_once
+
+
+def generate_universe(
+    path: Path,
+    tickers: int,
+    years: int,
+    seed: int = 7,
+    end: Optional[dt.date] = None,
+) -> List[str]:
+    """Write an offline-format universe of ``tickers`` symbols with ``years`` of daily bars.
+
+    Prices follow a seeded random walk over weekdays and every symbol reports
+    earnings roughly once a quarter, so the same arguments always produce the
+    same files.
+    """
+    rng = random.Random(seed)
+    end = end or dt.date.today()
+    start = end - dt.timedelta(days=365 * years)
+    days = [start + dt.timedelta(days=i) for i in range((end - start).days + 1)]
+    weekdays = [day for day in days if day.weekday() < 5]
+    symbols = [f"SYN{i:04d}" for i in range(tickers)]
+    path.mkdir(parents=True, exist_ok=True)
+    with (path / "universe.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Symbol", "MarketCap"])
+        for symbol in symbols:
+            writer.writerow([symbol, rng.randint(1, 500) * 1_000_000_000])
+    for symbol in symbols:
+        close = rng.uniform(20.0, 400.0)
+        with (path / f"prices_{symbol}.csv").open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["Date", "Close"])
+            for day in weekdays:
+                close = max(close * (1.0 + rng.gauss(0.0, 0.02)), 1.0)
+                writer.writerow([day.isoformat(), round(close, 2)])
+        first_report = start + dt.timedelta(days=rng.randint(10, 80))
+        with (path / f"earnings_{symbol}.csv").open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["earnings_date", "surprise"])
+            report = first_report
+            while report < end:
+                writer.writerow([report.isoformat(), round(rng.gauss(0.0, 0.05), 4)])
+                report += dt.timedelta(days=91)
+    return symbols
+
+
+# Runs the CLI and reports, on stderr, which heavy modules it ended up importing.
+_STARTUP_PROBE = """
+import atexit, json, sys
+from options_prediction.checks import HEAVY_MODULES, loaded_modules
+atexit.register(lambda: sys.stderr.write("HEAVY_MODULES=" + json.dumps(loaded_modules(HEAVY_MODULES)) + "\\n"))
+from options_prediction.cli import main
+sys.argv = ["options-prediction", *sys.argv[1:]]
+main()
+"""
+
+
+def _probe_cli(args: List[str], cwd: Path) -> Dict[str, object]:
+    env = dict(os.environ)
+    package_root = str(Path(__file__).resolve().parents[1])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _STARTUP_PROBE, *args], cwd=cwd, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"options-prediction {' '.join(args)} failed: {completed.stderr.strip()}")
+    marker = [line for line in completed.stderr.splitlines() if line.startswith("HEAVY_MODULES=")]
+    heavy = json.loads(marker[-1].split("=", 1)[1]) if marker else []
+    return {"seconds": elapsed, "heavy_modules": heavy}
+
+
+def check_startup(work_dir: Path, data_dir: Path, symbol: str, lookback_years: int) -> Dict[str, Dict[str, object]]:
+    """Time ``add-note`` and an offline backtest in fresh interpreters.
+
+    Raises ``AssertionError`` if either imported pandas or yfinance.
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    probes = {
+        "add_note": _probe_cli(["add-note", "startup probe", "--notes-path", str(work_dir / "notes.txt")], work_dir),
+        "offline_backtest": _probe_cli(
+            [
+                "backtest",
+                "--offline",
+                "--iterative",
+                "false",
+                "--sample-data-dir",
+                str(data_dir),
+                "--tickers",
+                symbol,
+                "--lookback-years",
+                str(lookback_years),
+            ],
+            work_dir,
+        ),
+    }
+    offenders = {name: probe["heavy_modules"] for name, probe in probes.items() if probe["heavy_modules"]}
+    if offenders:
+        raise AssertionError(f"Start-up paths imported {', '.join(HEAVY_MODULES)}: {offenders}")
+    return probes
+
+
+def _timed(func: Callable[[], object], repeat: int, ops: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "repeat": len(samples),
+        "ops": ops,
+    }
+
+
+def run_benchmarks(tickers: int = 50, years: int = 5, repeat: int = 3, seed: int = 7, work_dir: Optional[Path] = None) -> dict:
+    """Generate a synthetic universe and time each hot path against it."""
+    with tempfile.TemporaryDirectory() as scratch:
+        root = work_dir or Path(scratch)
+        data_dir = root / "data"
+        symbols = generate_universe(data_dir, tickers, years, seed=seed)
+        config = AppConfig(
+            data=DataConfig(offline_mode=True, sample_data_dir=data_dir, lookback_years=years + 1),
+            # Memoized predictions would make repeats cheaper than the first pass.
+            llm=LLMConfig(cache_size=0, request_budget=2**62),
+            run=RunConfig(
+                iterative=False,
+                notes_path=root / "notes" / "learning_notes.txt",
+                log_path=root / "notes" / "run_log.csv",
+                store_path=root / "notes" / "runs.sqlite",
+                results_path=root / "notes" / "backtest_results.csv",
+                cache_dir=root / "cache",
+            ),
+        )
+        config.ensure_paths()
+        startup = check_startup(root / "startup", data_dir, symbols[0], years + 1)
+
+        prices = {symbol: _sample_prices(symbol, config.data) for symbol in symbols}
+        events = {symbol: _sample_earnings(symbol, config.data) for symbol in symbols}
+        event_count = sum(len(e) for e in events.values())
+        bar_count = sum(len(p) for p in prices.values())
+        backtester = Backtester(config)
+        results = [r for symbol in symbols for r in backtester.backtest_symbol(symbol)]
+
+        def lookup_per_event() -> None:
+            for symbol in symbols:
+                for event in events[symbol]:
+                    end_of_day_close(prices[symbol], event["earnings_date"])
+
+        def lookup_batched() -> None:
+            for symbol in symbols:
+                PriceIndex.from_series(prices[symbol]).event_windows([e["earnings_date"] for e in events[symbol]])
+
+        def backtest_all() -> None:
+            for symbol in symbols:
+                backtester.backtest_symbol(symbol)
+
+        packed_config = AppConfig(
+            data=DataConfig(
+                offline_mode=True, sample_data_dir=data_dir, packed_store=root / "market.pack", lookback_years=years + 1
+            ),
+            llm=config.llm,
+            run=config.run,
+        )
+        packed_backtester = Backtester(packed_config)
+
+        def backtest_packed() -> None:
+            for data in packed_backtester.load_symbols(symbols):
+                packed_backtester.evaluate(data)
+
+        def run_pass() -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_once(config, symbols)
+
+        benchmarks = {
+            "load_sample_prices": _timed(lambda: [_sample_prices(s, config.data) for s in symbols], repeat, bar_count),
+            "load_sample_earnings": _timed(lambda: [_sample_earnings(s, config.data) for s in symbols], repeat, event_count),
+            "pack_sample_data": _timed(lambda: pack_sample_data(data_dir, root / "market.pack"), repeat, len(symbols)),
+            "load_packed_prices": _timed(
+                lambda: [_sample_prices(s, packed_config.data) for s in symbols], repeat, bar_count
+            ),
+            "backtest_packed": _timed(backtest_packed, repeat, len(symbols)),
+            "end_of_day_close": _timed(lookup_per_event, repeat, event_count),
+            "price_index_event_windows": _timed(lookup_batched, repeat, event_count),
+            "backtest_symbol": _timed(backtest_all, repeat, len(symbols)),
+            "run_once": _timed(run_pass, repeat, len(symbols)),
+            "export_results": _timed(
+                lambda: backtester.export_results(results, root / "export.csv"), repeat, len(results)
+            ),
+        }
+    return {
+        "meta": {
+            "timestamp": dt.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tickers": tickers,
+            "years": years,
+            "seed": seed,
+            "bars": bar_count,
+            "events": event_count,
+        },
+        "startup": startup,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(current: dict, baseline: dict) -> Dict[str, float]:
+    """Median-time ratio of ``current`` over ``baseline`` per benchmark (> 1.0 means slower)."""
+    ratios: Dict[str, float] = {}
+    for name, stats in current["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous and previous["median_s"] > 0:
+            ratios[name] = stats["median_s"] / previous["median_s"]
+    return ratios
+
+
+def main(
+    tickers: int,
+    years: int,
+    repeat: int,
+    seed: int,
+    output: Optional[Path] = None,
+    baseline: Optional[Path] = None,
+) -> dict:
+    report = run_benchmarks(tickers=tickers, years=years, repeat=repeat, seed=seed)
+    if baseline is not None:
+        report["comparison"] = compare(report, json.loads(baseline.read_text(encoding="utf-8")))
+    payload = json.dumps(report, indent=2)
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(payload + "\n", encoding="utf-8")
+    print(payload)
+    return report
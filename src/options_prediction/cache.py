@@ -0,0 +1,180 @@
+"""On-disk, per-symbol cache of price history and earnings events."""
+
+from __future__ import annotations
+
+import contextlib
+import datetime as dt
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Sequence, Tuple
+
+from .config import DataConfig
+
+_EPOCH = dt.datetime(1970, 1, 1)
+_MAGIC = b"OPC1"
+# magic, row count, covered range start, covered range end (epoch seconds)
+_HEADER = struct.Struct("<4sQqq")
+
+Columns = Tuple[array, array]
+
+
+def to_epoch(when: dt.datetime) -> int:
+    """Seconds since the epoch for the wall-clock time of ``when`` (timezone is dropped)."""
+    return int((when.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def from_epoch(seconds: int) -> dt.datetime:
+    return _EPOCH + dt.timedelta(seconds=seconds)
+
+
+@contextlib.contextmanager
+def atomic_open(path: Path, mode: str = "wb", **kwargs) -> Iterator[IO]:
+    """Write through a uniquely named temporary file beside ``path``, moved into place on success.
+
+    Concurrent writers (fetch threads, worker processes) each get their own
+    temporary file, so the last complete write wins and none is torn.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(mode, dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False, **kwargs)
+    try:
+        with handle:
+            yield handle
+        os.replace(handle.name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(handle.name)
+        raise
+
+
+def write_columns(path: Path, timestamps: Sequence[int], values: Sequence[float], covered: Tuple[int, int]) -> None:
+    """Atomically write a timestamp column and a value column to ``path``."""
+    ts_col = array("q", timestamps)
+    val_col = array("d", values)
+    if len(ts_col) != len(val_col):
+        raise ValueError("timestamp and value columns must have the same length")
+    if sys.byteorder == "big":  # pragma: no cover - files are always little-endian
+        ts_col.byteswap()
+        val_col.byteswap()
+    with atomic_open(path) as handle:
+        handle.write(_HEADER.pack(_MAGIC, len(ts_col), covered[0], covered[1]))
+        ts_col.tofile(handle)
+        val_col.tofile(handle)
+
+
+def read_columns(path: Path) -> Optional[Tuple[Columns, Tuple[int, int]]]:
+    """Read columns written by :func:`write_columns`; ``None`` if missing or unreadable."""
+    if not path.exists():
+        return None
+    with path.open("rb") as handle:
+        header = handle.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            return None
+        magic, count, covered_start, covered_end = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            return None
+        ts_col = array("q")
+        val_col = array("d")
+        try:
+            ts_col.fromfile(handle, count)
+            val_col.fromfile(handle, count)
+        except (EOFError, ValueError):  # truncated, possibly mid-value
+            return None
+    if sys.byteorder == "big":  # pragma: no cover - files are always little-endian
+        ts_col.byteswap()
+        val_col.byteswap()
+    return (ts_col, val_col), (covered_start, covered_end)
+
+
+class MarketDataCache:
+    """Price bars and earnings events per symbol, stored as packed columns under ``cache_dir``.
+
+    Each file records the date range it covers so callers can download only the
+    part of a request that falls outside it.
+    """
+
+    def __init__(self, cache_dir: Path, config: DataConfig):
+        self.prices_dir = cache_dir / "prices"
+        self.earnings_dir = cache_dir / "earnings"
+        self.config = config
+
+    def _price_path(self, symbol: str) -> Path:
+        return self.prices_dir / f"{symbol.upper()}.bin"
+
+    def _earnings_path(self, symbol: str) -> Path:
+        return self.earnings_dir / f"{symbol.upper()}.bin"
+
+    def load_prices(self, symbol: str) -> Tuple[List[Tuple[dt.datetime, float]], Optional[Tuple[dt.datetime, dt.datetime]]]:
+        """Return all cached bars for ``symbol`` and the date range they cover."""
+        stored = read_columns(self._price_path(symbol))
+        if stored is None:
+            return [], None
+        (ts_col, val_col), (covered_start, covered_end) = stored
+        bars = [(from_epoch(ts), close) for ts, close in zip(ts_col, val_col)]
+        return bars, (from_epoch(covered_start), from_epoch(covered_end))
+
+    def missing_ranges(
+        self,
+        covered: Optional[Tuple[dt.datetime, dt.datetime]],
+        last_bar: Optional[dt.datetime],
+        start: dt.datetime,
+        end: dt.datetime,
+        now: Optional[dt.datetime] = None,
+    ) -> List[Tuple[dt.datetime, dt.datetime]]:
+        """Date ranges that still have to be downloaded to cover ``[start, end]``.
+
+        Gaps are always filled up to the covered range so coverage stays contiguous.
+        """
+        if covered is None:
+            return [(start, end)]
+        now = now or dt.datetime.utcnow()
+        covered_start, covered_end = covered
+        ranges: List[Tuple[dt.datetime, dt.datetime]] = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        horizon = min(end, now)
+        if horizon - covered_end > self.config.price_refresh_interval:
+            resume = last_bar + dt.timedelta(days=1) if last_bar is not None else covered_end
+            ranges.append((resume, end))
+        return ranges
+
+    def store_prices(
+        self,
+        symbol: str,
+        bars: List[Tuple[dt.datetime, float]],
+        covered: Tuple[dt.datetime, dt.datetime],
+    ) -> None:
+        merged = {to_epoch(ts): close for ts, close in bars}
+        ordered = sorted(merged)
+        write_columns(
+            self._price_path(symbol),
+            ordered,
+            [merged[ts] for ts in ordered],
+            (to_epoch(covered[0]), to_epoch(covered[1])),
+        )
+
+    def load_earnings(self, symbol: str, cutoff: dt.datetime, now: Optional[dt.datetime] = None) -> Optional[List[dict]]:
+        """Cached events for ``symbol`` or ``None`` when missing, expired or too short."""
+        stored = read_columns(self._earnings_path(symbol))
+        if stored is None:
+            return None
+        (ts_col, val_col), (covered_start, fetched_at) = stored
+        now = now or dt.datetime.utcnow()
+        if now - from_epoch(fetched_at) > self.config.earnings_ttl:
+            return None
+        if to_epoch(cutoff) < covered_start:
+            return None
+        return [{"earnings_date": from_epoch(ts), "surprise": surprise} for ts, surprise in zip(ts_col, val_col)]
+
+    def store_earnings(self, symbol: str, events: List[dict], cutoff: dt.datetime, now: Optional[dt.datetime] = None) -> None:
+        now = now or dt.datetime.utcnow()
+        ordered = sorted(events, key=lambda e: e["earnings_date"])
+        write_columns(
+            self._earnings_path(symbol),
+            [to_epoch(e["earnings_date"]) for e in ordered],
+            [float(e.get("surprise", 0.0) or 0.0) for e in ordered],
+            (to_epoch(cutoff), to_epoch(now)),
+        )
@@ -0,0 +1,155 @@
+"""Durable progress journal so an interrupted pass resumes where it stopped."""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .backtest import BacktestResult, RunLogEntry, result_from_dict, result_to_dict
+from .cache import atomic_open
+from .config import AppConfig
+
+FORMAT_VERSION = 1
+
+Completed = Tuple[List[BacktestResult], RunLogEntry]
+
+
+def universe_digest(config: AppConfig, universe: List[str]) -> str:
+    """Fingerprint of the inputs that decide a pass's results; a mismatch invalidates the checkpoint."""
+    payload = json.dumps(
+        {
+            "universe": sorted(universe),
+            "lookback_years": config.data.lookback_years,
+            "horizons": list(config.data.horizons),
+            "post_event_window_days": config.data.post_event_window_days,
+            "offline": config.data.offline_mode,
+            "provider": config.llm.provider,
+            "model": config.llm.model,
+            "context_features": config.llm.context_features,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_to_dict(entry: RunLogEntry) -> dict:
+    return {
+        "timestamp": entry.timestamp.isoformat(),
+        "ticker": entry.ticker,
+        "accuracy": entry.accuracy,
+        "notes": entry.notes,
+    }
+
+
+def _entry_from_dict(record: dict) -> RunLogEntry:
+    return RunLogEntry(
+        timestamp=dt.datetime.fromisoformat(record["timestamp"]),
+        ticker=record["ticker"],
+        accuracy=record["accuracy"],
+        notes=record["notes"],
+    )
+
+
+@dataclass
+class CheckpointState:
+    cycle: int
+    digest: str
+    run_id: Optional[int] = None
+    predictor: dict = field(default_factory=dict)
+    completed: Dict[str, Completed] = field(default_factory=dict)
+
+
+class Checkpoint:
+    """Append-only JSON-lines journal of the tickers finished in the current pass.
+
+    The first line describes the pass (cycle, run id and universe digest); each
+    following line records one ticker's results, its run-log entry and the
+    predictor state at that point. Appending keeps the cost per ticker constant
+    regardless of universe size, and a torn final line from a crash is ignored
+    on load.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._handle = None
+
+    def load(self, digest: str) -> Optional[CheckpointState]:
+        """The saved state if it belongs to a pass over the same inputs, else ``None``."""
+        if not self.path.exists():
+            return None
+        state: Optional[CheckpointState] = None
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn write at the tail
+                if state is None:
+                    if record.get("version") != FORMAT_VERSION or record.get("digest") != digest:
+                        return None
+                    state = CheckpointState(
+                        cycle=record["cycle"],
+                        digest=digest,
+                        run_id=record.get("run_id"),
+                        predictor=record.get("predictor", {}),
+                    )
+                    continue
+                results = [result_from_dict(r) for r in record["results"]]
+                state.completed[record["ticker"]] = (results, _entry_from_dict(record["entry"]))
+                state.predictor = record.get("predictor", state.predictor)
+        return state
+
+    def start(self, cycle: int, digest: str, predictor: dict, run_id: Optional[int] = None) -> None:
+        """Begin a fresh journal for ``cycle``, replacing any earlier one atomically."""
+        self.close()
+        header = {"version": FORMAT_VERSION, "cycle": cycle, "digest": digest, "run_id": run_id, "predictor": predictor}
+        with atomic_open(self.path, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(header) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def reopen(self) -> None:
+        """Continue appending to a journal returned by :meth:`load`."""
+        self.close()
+        self._truncate_torn_tail()
+
+    def record(self, symbol: str, results: List[BacktestResult], entry: RunLogEntry, predictor: dict) -> None:
+        if self._handle is None:
+            self._handle = self.path.open("a", encoding="utf-8")
+        line = {
+            "ticker": symbol,
+            "results": [result_to_dict(r) for r in results],
+            "entry": _entry_to_dict(entry),
+            "predictor": predictor,
+        }
+        self._handle.write(json.dumps(line) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def clear(self) -> None:
+        """Drop the journal once its pass has completed."""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+
+    def _truncate_torn_tail(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("rb+") as handle:
+            data = handle.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                handle.truncate(end)
+
+
+def checkpoint_path(config: AppConfig) -> Path:
+    return config.run.cache_dir / "checkpoint.jsonl"
@@ -1,10 +1,14 @@
-from __future__ import annotations
-
 """Utility helpers for validating runtime prerequisites."""
 
+from __future__ import annotations
+
 import importlib.util
+import sys
 from typing import Iterable, List
 
+# Modules that dominate start-up time and must stay off offline and note-taking paths.
+HEAVY_MODULES = ("pandas", "yfinance")
+
 
 class MissingDependencyError(RuntimeError):
     """Raised when an optional dependency is unavailable."""
@@ -20,3 +24,8 @@ def require_packages(packages: Iterable[str]) -> None:
         raise MissingDependencyError(
             "The following packages are required but not installed: " + ", ".join(sorted(missing))
         )
+
+
+def loaded_modules(names: Iterable[str]) -> List[str]:
+    """Which of ``names`` have already been imported into this interpreter."""
+    return [name for name in names if name in sys.modules]
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import datetime as dt
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from .checks import MissingDependencyError, require_packages
 from .config import AppConfig, DataConfig, LLMConfig, RunConfig
-from .runner import backtest_once, iterative_cycle, save_custom_notes
+
+# Subcommand modules are imported inside ``main`` so that cheap commands such as
+# ``add-note`` (often run from cron) skip the backtest, LLM and data stacks.
 
 
 def build_config(
@@ -15,26 +18,85 @@ def build_config(
     iterative: bool = True,
     notes_path: Path = Path("notes/learning_notes.txt"),
     log_path: Path = Path("notes/run_log.csv"),
+    results_path: Path = Path("notes/backtest_results.csv"),
     market_cap: float = 1_000_000_000,
     lookback_years: int = 2,
     max_tickers: Optional[int] = None,
     offline: bool = False,
     sample_data_dir: Path = Path("sample_data"),
+    use_cache: bool = True,
+    download_chunk_size: int = 100,
+    screen_workers: int = 8,
+    screen_requests_per_second: float = 10.0,
+    horizons: Tuple[int, ...] = (),
+    post_event_window_days: int = 2,
+    workers: int = 1,
+    executor: str = "process",
+    fetch_workers: int = 4,
+    pipeline_depth: int = 8,
+    prediction_cache: bool = True,
+    llm_provider: str = "local",
+    llm_endpoint: Optional[str] = None,
+    llm_concurrency: int = 8,
+    timings: bool = False,
+    packed_store: Optional[Path] = None,
+    listing_ttl_hours: float = 24.0,
+    universe_as_of: Optional[dt.datetime] = None,
+    context_features: bool = False,
+    transport_mode: str = "live",
+    fixtures: Optional[str] = None,
 ) -> AppConfig:
-    run_cfg = RunConfig(duration=dt.timedelta(minutes=duration_minutes), iterative=iterative, notes_path=notes_path, log_path=log_path)
+    run_cfg = RunConfig(
+        duration=dt.timedelta(minutes=duration_minutes),
+        iterative=iterative,
+        notes_path=notes_path,
+        log_path=log_path,
+        results_path=results_path,
+        workers=workers,
+        executor=executor,
+        fetch_workers=fetch_workers,
+        pipeline_depth=pipeline_depth,
+        timings=timings,
+    )
     data_cfg = DataConfig(
         market_cap_threshold=market_cap,
         lookback_years=lookback_years,
         max_tickers=max_tickers,
         offline_mode=offline,
         sample_data_dir=sample_data_dir,
+        packed_store=packed_store,
+        use_cache=use_cache,
+        download_chunk_size=download_chunk_size,
+        screen_workers=screen_workers,
+        screen_requests_per_second=screen_requests_per_second,
+        horizons=horizons,
+        post_event_window_days=post_event_window_days,
+        listing_ttl=dt.timedelta(hours=listing_ttl_hours),
+        universe_as_of=universe_as_of,
+        transport_mode=transport_mode,
+        fixtures=fixtures,
     )
-    llm_cfg = LLMConfig()
+    llm_cfg = LLMConfig(
+        provider=llm_provider,
+        cache_size=LLMConfig.cache_size if prediction_cache else 0,
+        max_concurrency=llm_concurrency,
+        context_features=context_features,
+    )
+    if llm_endpoint:
+        llm_cfg.endpoint = llm_endpoint
     config = AppConfig(data=data_cfg, llm=llm_cfg, run=run_cfg)
     config.ensure_paths()
     return config
 
 
+def _as_of(text: str) -> dt.datetime:
+    """An ISO date or timestamp; a bare date means the end of that day."""
+    when = dt.datetime.fromisoformat(text)
+    if len(text) == 10:
+        when += dt.timedelta(days=1, microseconds=-1)
+    return when
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="LLM-driven earnings prediction toolkit.")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -45,14 +107,124 @@ def _parse_args() -> argparse.Namespace:
     backtest.add_argument("--market-cap", type=float, default=1_000_000_000, help="Minimum market cap filter.")
     backtest.add_argument("--lookback-years", type=int, default=2, help="Years of history for earnings events.")
     backtest.add_argument("--max-tickers", type=int, default=None, help="Limit number of tickers for quick runs.")
+    backtest.add_argument("--horizons", type=str, default=None, help="Comma-separated post-earnings horizons in trading days, e.g. 1,3,5,20.")
+    backtest.add_argument("--post-window-days", type=int, default=2, help="Calendar days after earnings to look for the post-event close.")
+    backtest.add_argument("--workers", type=int, default=1, help="Backtest tickers in parallel across this many workers.")
+    backtest.add_argument("--executor", choices=["process", "thread"], default="process", help="Pool type used when --workers > 1.")
+    backtest.add_argument("--fetch-workers", type=int, default=4, help="Threads fetching data ahead of prediction.")
+    backtest.add_argument("--pipeline-depth", type=int, default=8, help="Maximum ticker batches fetched ahead of prediction.")
+    backtest.add_argument("--no-prediction-cache", action="store_true", help="Call the LLM for every event instead of reusing cached predictions.")
+    backtest.add_argument("--llm-provider", choices=["local", "http"], default="local", help="Prediction backend: built-in heuristic or an HTTP endpoint.")
+    backtest.add_argument("--llm-endpoint", type=str, default=None, help="URL of the HTTP prediction endpoint.")
+    backtest.add_argument("--llm-concurrency", type=int, default=8, help="Maximum concurrent LLM requests per batch.")
+    backtest.add_argument("--features", action="store_true", help="Add pre-earnings momentum, volatility and reaction features to the prompt context.")
+    backtest.add_argument("--results-path", type=Path, default=Path("notes/backtest_results.csv"), help="Per-event results file; a .parquet suffix writes Parquet (requires pyarrow).")
+    backtest.add_argument("--resume", action="store_true", help="Continue an interrupted pass from its checkpoint, skipping tickers it already finished.")
+    backtest.add_argument("--timings", action="store_true", help="Record per-stage and per-ticker latencies to timings.csv next to the run log.")
+    backtest.add_argument("--profile", action="store_true", help="Also write a cProfile report (profile.pstats/profile.txt) next to the run log.")
     backtest.add_argument("--tickers", type=str, default=None, help="Comma-separated tickers to override universe selection.")
     backtest.add_argument("--offline", action="store_true", help="Run in offline mode using bundled sample data.")
     backtest.add_argument("--sample-data-dir", type=Path, default=Path("sample_data"), help="Path to offline sample data.")
+    backtest.add_argument("--packed-store", type=Path, default=None, help="Offline data packed by `options-prediction pack` (replaces the CSV files).")
+    backtest.add_argument("--record", type=Path, default=None, help="Save every downloaded payload under this fixtures directory.")
+    backtest.add_argument("--replay", type=str, default=None, help="Take every download from a fixtures directory or `fixture-server` URL instead of the network.")
+    backtest.add_argument("--no-cache", action="store_true", help="Always download prices and earnings instead of using the on-disk cache.")
+    backtest.add_argument("--chunk-size", type=int, default=100, help="Symbols per bulk price download request.")
+    backtest.add_argument("--screen-workers", type=int, default=8, help="Concurrent market cap lookups while building the universe.")
+    backtest.add_argument("--screen-rate", type=float, default=10.0, help="Maximum market cap lookups per second (0 disables the limit).")
+    backtest.add_argument("--listing-ttl-hours", type=float, default=24.0, help="Hours before the cached NASDAQ listing is downloaded again.")
+    backtest.add_argument("--universe-as-of", type=_as_of, default=None, help="Pin the universe to the newest snapshot taken on or before this date (UTC).")
+
+    universe = subparsers.add_parser("universe", help="List universe snapshots or show the members of one.")
+    universe.add_argument("--as-of", type=_as_of, default=None, help="Print the members of the newest snapshot on or before this date.")
+    universe.add_argument("--cache-dir", type=Path, default=Path(".cache"), help="Cache directory holding the snapshots.")
 
     add_note = subparsers.add_parser("add-note", help="Append a learning note for future prompts.")
     add_note.add_argument("note", type=str, help="Note to save.")
     add_note.add_argument("--notes-path", type=Path, default=Path("notes/learning_notes.txt"), help="Path to notes file.")
 
+    pack = subparsers.add_parser("pack", help="Pack offline CSVs or the live cache into one memory-mapped store.")
+    pack.add_argument("--source", type=Path, default=Path("sample_data"), help="Directory of offline CSV files to pack.")
+    pack.add_argument("--from-cache", type=Path, default=None, help="Pack this live cache directory instead of --source.")
+    pack.add_argument("--output", type=Path, default=Path("sample_data/market.pack"), help="Store file to write.")
+
+    llm_stub = subparsers.add_parser("llm-stub", help="Serve a local stand-in for an HTTP LLM provider.")
+    llm_stub.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind.")
+    llm_stub.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    llm_stub.add_argument("--latency-ms", type=float, default=0.0, help="Artificial delay per request.")
+    llm_stub.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+
+    fixtures = subparsers.add_parser("fixture-server", help="Serve recorded download fixtures over HTTP in place of Yahoo and datahub.")
+    fixtures.add_argument("fixtures", type=Path, help="Fixtures directory written by `backtest --record`.")
+    fixtures.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind.")
+    fixtures.add_argument("--port", type=int, default=8767, help="Port to listen on.")
+    fixtures.add_argument("--latency-ms", type=float, default=0.0, help="Artificial delay per request.")
+    fixtures.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+
+    sweep = subparsers.add_parser("sweep", help="Grid-search the heuristic predictor's parameters over one loaded dataset.")
+    sweep.add_argument("--thresholds", type=str, default="0,0.01,0.02,0.05", help="Comma-separated surprise thresholds below which the call is flat.")
+    sweep.add_argument("--bases", type=str, default="0.5", help="Comma-separated base confidences for directional calls.")
+    sweep.add_argument("--slopes", type=str, default="0.5,1,2", help="Comma-separated confidence gains per unit of surprise.")
+    sweep.add_argument("--caps", type=str, default="0.95", help="Comma-separated confidence caps.")
+    sweep.add_argument("--flat-confidences", type=str, default="0.4", help="Comma-separated confidences for flat calls.")
+    sweep.add_argument("--windows", type=str, default="2", help="Comma-separated post-event windows in calendar days.")
+    sweep.add_argument("--horizons", type=str, default="", help="Comma-separated horizons in trading days (the post-event close is always scored).")
+    sweep.add_argument("--output", type=Path, default=Path("notes/sweep.csv"), help="CSV table of every configuration's metrics.")
+    sweep.add_argument("--top", type=int, default=10, help="Best configurations to print.")
+    sweep.add_argument("--lookback-years", type=int, default=2, help="Years of history for earnings events.")
+    sweep.add_argument("--max-tickers", type=int, default=None, help="Limit number of tickers.")
+    sweep.add_argument("--tickers", type=str, default=None, help="Comma-separated tickers to override universe selection.")
+    sweep.add_argument("--offline", action="store_true", help="Use offline sample data.")
+    sweep.add_argument("--sample-data-dir", type=Path, default=Path("sample_data"), help="Path to offline sample data.")
+    sweep.add_argument("--packed-store", type=Path, default=None, help="Offline data packed by `options-prediction pack`.")
+
+    walk = subparsers.add_parser("walk-forward", help="Score predictions on rolling out-of-sample train/test windows.")
+    walk.add_argument("--train-days", type=int, default=365, help="Calendar days in each train window.")
+    walk.add_argument("--test-days", type=int, default=90, help="Calendar days in each test window.")
+    walk.add_argument("--step-days", type=int, default=None, help="Days between consecutive test windows (default: --test-days).")
+    walk.add_argument("--lookback-years", type=int, default=5, help="Years of history for earnings events.")
+    walk.add_argument("--max-tickers", type=int, default=None, help="Limit number of tickers.")
+    walk.add_argument("--tickers", type=str, default=None, help="Comma-separated tickers to override universe selection.")
+    walk.add_argument("--horizons", type=str, default=None, help="Comma-separated post-earnings horizons in trading days.")
+    walk.add_argument("--llm-provider", choices=["local", "http"], default="local", help="Prediction backend: built-in heuristic or an HTTP endpoint.")
+    walk.add_argument("--llm-endpoint", type=str, default=None, help="URL of the HTTP prediction endpoint.")
+    walk.add_argument("--offline", action="store_true", help="Use offline sample data.")
+    walk.add_argument("--sample-data-dir", type=Path, default=Path("sample_data"), help="Path to offline sample data.")
+    walk.add_argument("--packed-store", type=Path, default=None, help="Offline data packed by `options-prediction pack`.")
+
+    runs = subparsers.add_parser("runs", help="Query, import or export the run-log store.")
+    runs.add_argument("action", choices=["accuracy", "metrics", "folds", "import", "export"], help="What to do with the store.")
+    runs.add_argument("csv_path", type=Path, nargs="?", default=Path("notes/run_log.csv"), help="CSV file for import/export.")
+    runs.add_argument("--store", type=Path, default=Path("notes/runs.sqlite"), help="Run-log store to use.")
+    runs.add_argument("--last", type=int, default=5, help="Number of most recent runs to average over.")
+    runs.add_argument("--tickers", type=str, default=None, help="Comma-separated tickers to report (default: all).")
+    runs.add_argument("--run", type=int, default=None, help="Run id for metrics or folds (default: the latest run).")
+    runs.add_argument("--by", choices=["run", "ticker", "quarter"], default="run", help="Grouping for metrics.")
+
+    serve = subparsers.add_parser("serve", help="Keep data and the predictor warm and answer requests over local HTTP.")
+    serve.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind.")
+    serve.add_argument("--port", type=int, default=8766, help="Port to listen on.")
+    serve.add_argument("--socket", type=Path, default=None, help="Listen on this Unix socket instead of TCP.")
+    serve.add_argument("--refresh-minutes", type=float, default=60.0, help="Minutes between background cache refreshes (0 disables).")
+    serve.add_argument("--max-extra-symbols", type=int, default=256, help="Tickers outside the universe kept warm between refreshes (least recently used dropped first).")
+    serve.add_argument("--lookback-years", type=int, default=2, help="Years of history for earnings events.")
+    serve.add_argument("--max-tickers", type=int, default=None, help="Limit number of tickers kept warm.")
+    serve.add_argument("--horizons", type=str, default=None, help="Comma-separated post-earnings horizons in trading days.")
+    serve.add_argument("--tickers", type=str, default=None, help="Comma-separated tickers to override universe selection.")
+    serve.add_argument("--llm-provider", choices=["local", "http"], default="local", help="Prediction backend: built-in heuristic or an HTTP endpoint.")
+    serve.add_argument("--llm-endpoint", type=str, default=None, help="URL of the HTTP prediction endpoint.")
+    serve.add_argument("--offline", action="store_true", help="Use offline sample data.")
+    serve.add_argument("--sample-data-dir", type=Path, default=Path("sample_data"), help="Path to offline sample data.")
+    serve.add_argument("--packed-store", type=Path, default=None, help="Offline data packed by `options-prediction pack`.")
+
+    bench = subparsers.add_parser("bench", help="Benchmark the backtest hot paths on a synthetic universe.")
+    bench.add_argument("--tickers", type=int, default=50, help="Synthetic tickers to generate.")
+    bench.add_argument("--years", type=int, default=5, help="Years of daily bars per ticker.")
+    bench.add_argument("--repeat", type=int, default=3, help="Timed repetitions per benchmark.")
+    bench.add_argument("--seed", type=int, default=7, help="Seed for the synthetic data generator.")
+    bench.add_argument("--output", type=Path, default=None, help="Write the JSON report to this path.")
+    bench.add_argument("--baseline", type=Path, default=None, help="Earlier JSON report to compare median timings against.")
+
     return parser.parse_args()
 
 
@@ -68,21 +240,204 @@ def main() -> None:
             lookback_years=args.lookback_years,
             offline=args.offline,
             sample_data_dir=args.sample_data_dir,
+            use_cache=not args.no_cache,
+            download_chunk_size=args.chunk_size,
+            screen_workers=args.screen_workers,
+            screen_requests_per_second=args.screen_rate,
+            horizons=tuple(sorted({int(h) for h in args.horizons.split(",") if h.strip()})) if args.horizons else (),
+            post_event_window_days=args.post_window_days,
+            workers=args.workers,
+            executor=args.executor,
+            fetch_workers=args.fetch_workers,
+            pipeline_depth=args.pipeline_depth,
+            prediction_cache=not args.no_prediction_cache,
+            llm_provider=args.llm_provider,
+            llm_endpoint=args.llm_endpoint,
+            llm_concurrency=args.llm_concurrency,
+            timings=args.timings or args.profile,
+            packed_store=args.packed_store,
+            results_path=args.results_path,
+            listing_ttl_hours=args.listing_ttl_hours,
+            universe_as_of=args.universe_as_of,
+            context_features=args.features,
+            transport_mode="replay" if args.replay else "record" if args.record else "live",
+            fixtures=args.replay or (str(args.record) if args.record else None),
         )
         custom_tickers = [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None
-        required = [] if args.offline else ["pandas", "yfinance"]
+        required = [] if args.offline or args.replay else ["pandas", "yfinance"]
+        if args.results_path.suffix == ".parquet":
+            required.append("pyarrow")
         try:
             require_packages(required)
         except MissingDependencyError as exc:  # pragma: no cover - CLI safety path
             print(exc)
             return
-        if args.iterative:
-            iterative_cycle(config, tickers=custom_tickers)
-        else:
-            backtest_once(config, tickers=custom_tickers)
+        from .profiling import profile_to
+        from .runner import backtest_once, iterative_cycle
+
+        profiler = (
+            profile_to(config.run.log_path.with_name("profile.pstats")) if args.profile else contextlib.nullcontext()
+        )
+        with profiler:
+            if args.iterative:
+                iterative_cycle(config, tickers=custom_tickers, resume=args.resume)
+            else:
+                backtest_once(config, tickers=custom_tickers, resume=args.resume)
     elif args.command == "add-note":
-        save_custom_notes(args.notes_path, [args.note])
+        from .notes import append_notes
+
+        append_notes(args.notes_path, [args.note])
         print(f"Saved note to {args.notes_path}")
+    elif args.command == "universe":
+        from .universe import UniverseManager
+
+        manager = UniverseManager(args.cache_dir)
+        if args.as_of is not None:
+            try:
+                snapshot = manager.as_of(args.as_of)
+            except LookupError as exc:
+                print(exc)
+                return
+            print(f"Snapshot {snapshot.created_at.isoformat()} (threshold {snapshot.threshold:,.0f}):")
+            print(",".join(snapshot.members()))
+            return
+        for stamp in manager.versions():
+            snapshot = manager.load(stamp)
+            print(
+                f"{stamp.isoformat()}: {len(snapshot.listing)} listed, {len(snapshot.members())} members, "
+                f"+{len(snapshot.added)} / -{len(snapshot.removed)}"
+            )
+    elif args.command == "pack":
+        from .data import pack_cache, pack_sample_data
+
+        count = pack_cache(args.from_cache, args.output) if args.from_cache else pack_sample_data(args.source, args.output)
+        print(f"Packed {count} symbols into {args.output}")
+    elif args.command == "sweep":
+        from .sweep import main as run_sweep, parameter_grid
+
+        def floats(text: str) -> list:
+            return [float(value) for value in text.split(",") if value.strip()]
+
+        config = build_config(
+            lookback_years=args.lookback_years,
+            max_tickers=args.max_tickers,
+            offline=args.offline,
+            sample_data_dir=args.sample_data_dir,
+            packed_store=args.packed_store,
+            prediction_cache=False,
+        )
+        try:
+            require_packages([] if args.offline else ["pandas", "yfinance"])
+        except MissingDependencyError as exc:  # pragma: no cover - CLI safety path
+            print(exc)
+            return
+        config.ensure_paths()
+        grid = parameter_grid(
+            floats(args.thresholds), floats(args.bases), floats(args.slopes), floats(args.caps), floats(args.flat_confidences)
+        )
+        run_sweep(
+            config,
+            [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None,
+            [int(w) for w in floats(args.windows)],
+            [int(h) for h in floats(args.horizons)],
+            grid,
+            args.output,
+            top=args.top,
+        )
+    elif args.command == "walk-forward":
+        from .walkforward import main as run_walk_forward
+
+        config = build_config(
+            lookback_years=args.lookback_years,
+            max_tickers=args.max_tickers,
+            offline=args.offline,
+            sample_data_dir=args.sample_data_dir,
+            packed_store=args.packed_store,
+            horizons=tuple(sorted({int(h) for h in args.horizons.split(",") if h.strip()})) if args.horizons else (),
+            llm_provider=args.llm_provider,
+            llm_endpoint=args.llm_endpoint,
+        )
+        try:
+            require_packages([] if args.offline else ["pandas", "yfinance"])
+        except MissingDependencyError as exc:  # pragma: no cover - CLI safety path
+            print(exc)
+            return
+        run_walk_forward(
+            config,
+            [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None,
+            dt.timedelta(days=args.train_days),
+            dt.timedelta(days=args.test_days),
+            dt.timedelta(days=args.step_days) if args.step_days else None,
+        )
+    elif args.command == "runs":
+        from .runstore import RunStore
+
+        with RunStore(args.store) as store:
+            if args.action == "import":
+                print(f"Imported {store.import_csv(args.csv_path)} runs from {args.csv_path}")
+            elif args.action == "export":
+                print(f"Exported {store.export_csv(args.csv_path)} entries to {args.csv_path}")
+            elif args.action == "folds":
+                from .walkforward import format_folds
+
+                for line in format_folds(store.folds(args.run)) or ["No walk-forward folds recorded."]:
+                    print(line)
+            elif args.action == "metrics":
+                from .metrics import compute, format_report
+                from .results import ResultBatch
+
+                run_ids = [args.run] if args.run is not None else store.run_ids(1)
+                if not run_ids:
+                    print("No runs recorded yet.")
+                    return
+                results = list(store.results(run_ids[0]))
+                horizons = sorted({h for result in results for h in result.horizon_returns})
+                print(f"Run {run_ids[0]}:")
+                for line in format_report(compute(ResultBatch.from_results(results, horizons), by=args.by)):
+                    print(line)
+            else:
+                tickers = [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None
+                for ticker, accuracy in sorted(store.ticker_accuracy(args.last, tickers).items()):
+                    print(f"{ticker}: {accuracy:.1%}")
+    elif args.command == "serve":
+        from .service import serve as run_service
+
+        config = build_config(
+            lookback_years=args.lookback_years,
+            max_tickers=args.max_tickers,
+            offline=args.offline,
+            sample_data_dir=args.sample_data_dir,
+            packed_store=args.packed_store,
+            horizons=tuple(sorted({int(h) for h in args.horizons.split(",") if h.strip()})) if args.horizons else (),
+            llm_provider=args.llm_provider,
+            llm_endpoint=args.llm_endpoint,
+        )
+        try:
+            require_packages([] if args.offline else ["pandas", "yfinance"])
+        except MissingDependencyError as exc:  # pragma: no cover - CLI safety path
+            print(exc)
+            return
+        run_service(
+            config,
+            [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None,
+            host=args.host,
+            port=args.port,
+            unix_socket=args.socket,
+            refresh_interval=dt.timedelta(minutes=args.refresh_minutes) if args.refresh_minutes > 0 else None,
+            max_extra=args.max_extra_symbols,
+        )
+    elif args.command == "bench":
+        from .bench import main as run_bench
+
+        run_bench(args.tickers, args.years, args.repeat, args.seed, output=args.output, baseline=args.baseline)
+    elif args.command == "fixture-server":
+        from .transport import serve_fixtures
+
+        serve_fixtures(args.fixtures, args.host, args.port, latency=args.latency_ms / 1000.0, failure_rate=args.failure_rate)
+    elif args.command == "llm-stub":
+        from .llm_stub import serve_stub
+
+        serve_stub(args.host, args.port, latency=args.latency_ms / 1000.0, failure_rate=args.failure_rate)
 
 
 if __name__ == "__main__":
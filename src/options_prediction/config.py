@@ -3,7 +3,7 @@ from __future__ import annotations
 import dataclasses
 import datetime as dt
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 
 @dataclasses.dataclass
@@ -16,6 +16,35 @@ class DataConfig:
     max_tickers: Optional[int] = None
     offline_mode: bool = False
     sample_data_dir: Path = Path("sample_data")
+    packed_store: Optional[Path] = None
+    post_event_window_days: int = 2
+    horizons: Tuple[int, ...] = ()
+    use_cache: bool = True
+    download_chunk_size: int = 100
+    screen_workers: int = 8
+    screen_requests_per_second: float = 10.0
+    market_cap_ttl: dt.timedelta = dt.timedelta(days=1)
+    listing_ttl: dt.timedelta = dt.timedelta(days=1)
+    # "live", "record" (live, saving payloads to ``fixtures``) or "replay" (payloads only from ``fixtures``).
+    transport_mode: str = "live"
+    fixtures: Optional[str] = None
+    http_retries: int = 3
+    http_backoff: float = 0.5
+    http_pool_size: int = 8
+    http_timeout: float = 30.0
+    # Pin live runs to the newest universe snapshot taken at or before this time.
+    universe_as_of: Optional[dt.datetime] = None
+    price_refresh_interval: dt.timedelta = dt.timedelta(hours=12)
+    earnings_ttl: dt.timedelta = dt.timedelta(days=1)
+
+    @property
+    def cache_enabled(self) -> bool:
+        """Whether downloads go through ``.cache``; record and replay runs always bypass it.
+
+        A replay must not leave fixture data behind as if it were market data,
+        and a recording must see every download to capture it.
+        """
+        return self.use_cache and self.transport_mode == "live"
 
 
 @dataclasses.dataclass
@@ -27,6 +56,24 @@ class LLMConfig:
     temperature: float = 0.2
     max_tokens: int = 256
     request_budget: int = 1000
+    endpoint: str = "http://127.0.0.1:8765/predict"
+    request_timeout: float = 30.0
+    max_concurrency: int = 8
+    max_retries: int = 3
+    retry_backoff: float = 0.5
+    cache_size: int = 4096
+    disk_cache: bool = True
+    # Bounds on .cache/predictions.sqlite: older rows are ignored and pruned, and at most this many are kept.
+    disk_cache_ttl: dt.timedelta = dt.timedelta(days=30)
+    disk_cache_max_rows: int = 100_000
+    # Add point-in-time momentum, volatility and prior-reaction features to each prompt (changes every cache key).
+    context_features: bool = False
+    # Mapping used by the local heuristic provider; tune with ``options-prediction sweep``.
+    surprise_threshold: float = 0.0
+    confidence_base: float = 0.5
+    confidence_slope: float = 1.0
+    confidence_cap: float = 0.95
+    flat_confidence: float = 0.4
 
 
 @dataclasses.dataclass
@@ -36,8 +83,19 @@ class RunConfig:
     duration: dt.timedelta = dt.timedelta(minutes=30)
     iterative: bool = True
     notes_path: Path = Path("notes/learning_notes.txt")
+    notes_max_bytes: int = 1_000_000
+    notes_keep: int = 200
     log_path: Path = Path("notes/run_log.csv")
+    store_path: Path = Path("notes/runs.sqlite")
+    results_path: Path = Path("notes/backtest_results.csv")
     cache_dir: Path = Path(".cache")
+    workers: int = 1
+    executor: str = "process"
+    fetch_workers: int = 4
+    pipeline_batch_size: int = 25
+    pipeline_depth: int = 8
+    timings: bool = False
+    stale_after: dt.timedelta = dt.timedelta(days=1)
 
 
 @dataclasses.dataclass
@@ -52,5 +110,5 @@ class AppConfig:
         self.run.cache_dir.mkdir(parents=True, exist_ok=True)
 
 
+# Directories are created by ``ensure_paths`` when a run starts, never at import time.
 DEFAULT_CONFIG = AppConfig()
-DEFAULT_CONFIG.ensure_paths()
@@ -2,20 +2,19 @@ from __future__ import annotations
 
 import datetime as dt
 import csv
+import io
+from bisect import bisect_right
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
-
-try:  # Optional for offline mode
-    import pandas as pd  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    pd = None
-
-try:  # Optional for offline mode
-    import yfinance as yf  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    yf = None
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+from .cache import MarketDataCache, read_columns, to_epoch
 from .config import DataConfig
+from .packstore import open_store, write_store
+from .price_index import POST_EVENT_WINDOW, PriceIndex, horizon_span
+from .profiling import span
+from .screening import MarketCapScreener, load_market_caps
+from .transport import FixtureMissingError, Transport, TransportError, transport_for
+from .universe import UniverseManager
 
 NASDAQ_LISTINGS_URL = "https://datahub.io/core/nasdaq-listings/r/nasdaq-listed-symbols.csv"
 
@@ -23,13 +22,41 @@ NASDAQ_LISTINGS_URL = "https://datahub.io/core/nasdaq-listings/r/nasdaq-listed-s
 PriceSeries = List[Tuple[dt.datetime, float]]
 
 
-def _load_sample_universe(config: DataConfig) -> List[str]:
-    sample_path = config.sample_data_dir / "universe.csv"
-    if not sample_path.exists():
+# pandas and yfinance take most of a second to import, so they are only loaded on
+# live-data code paths; offline runs and note-taking never pay for them.
+def _pandas():
+    try:
+        import pandas as pd  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return pd
+
+
+def _yfinance():
+    try:
+        import yfinance as yf  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return yf
+
+
+def _replaying(config: DataConfig) -> bool:
+    return config.transport_mode == "replay"
+
+
+def _read_sample_universe(path: Path) -> List[dict]:
+    if not path.exists():
         return []
-    with sample_path.open() as handle:
-        reader = csv.DictReader(handle)
-        rows = list(reader)
+    with path.open() as handle:
+        return list(csv.DictReader(handle))
+
+
+def _load_sample_universe(config: DataConfig) -> List[str]:
+    if config.packed_store is not None:
+        store = open_store(config.packed_store)
+        rows = [{"Symbol": symbol, "MarketCap": store.market_cap(symbol) or 0} for symbol in store.symbols()]
+    else:
+        rows = _read_sample_universe(config.sample_data_dir / "universe.csv")
     filtered: List[str] = []
     for row in rows:
         symbol = (row.get("Symbol") or "").upper()
@@ -44,39 +71,81 @@ def _load_sample_universe(config: DataConfig) -> List[str]:
     return filtered
 
 
-def fetch_nasdaq_tickers(cache_dir: Path, max_tickers: Optional[int] = None) -> List[str]:
-    if pd is None:
-        raise ImportError("pandas is required for live universe fetching")
-    cache_path = cache_dir / "nasdaq_listings.csv"
-    if cache_path.exists():
-        listings = pd.read_csv(cache_path)
-    else:
-        listings = pd.read_csv(NASDAQ_LISTINGS_URL)
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        listings.to_csv(cache_path, index=False)
-    tickers = listings["Symbol"].dropna().astype(str).str.upper().tolist()
+def _download_listing(config: DataConfig) -> List[str]:
+    transport = transport_for(config)
+    if transport.replaying:
+        return transport.replay("listing", "nasdaq")
+    response = transport.get(NASDAQ_LISTINGS_URL, endpoint="datahub.listing")
+    if response.status != 200:
+        raise TransportError(f"{NASDAQ_LISTINGS_URL} returned HTTP {response.status}")
+    symbols = [(row.get("Symbol") or "").strip().upper() for row in csv.DictReader(io.StringIO(response.text()))]
+    symbols = [symbol for symbol in symbols if symbol]
+    transport.record("listing", "nasdaq", symbols)
+    return symbols
+
+
+def universe_manager(config: DataConfig, cache_dir: Path) -> UniverseManager:
+    """The universe manager for ``config``; with caching off (or a record/replay run), nothing is read from or saved to ``cache_dir``."""
+    return UniverseManager(
+        cache_dir if config.cache_enabled else None,
+        lambda: _download_listing(config),
+        lambda symbols: market_cap_verdicts(symbols, config.market_cap_threshold, cache_dir, config),
+        config.market_cap_threshold,
+        listing_ttl=config.listing_ttl,
+        verdict_ttl=config.market_cap_ttl,
+    )
+
+
+def fetch_nasdaq_tickers(config: DataConfig, cache_dir: Path, max_tickers: Optional[int] = None) -> List[str]:
+    """The NASDAQ listing cached under ``cache_dir``, re-downloaded once older than ``config.listing_ttl``."""
+    tickers = universe_manager(config, cache_dir).listing()
     if max_tickers:
         return tickers[:max_tickers]
     return tickers
 
 
-def filter_by_market_cap(tickers: Iterable[str], threshold: float) -> List[str]:
-    if yf is None:
+def _fetch_market_cap(symbol: str, transport: Transport) -> Optional[float]:
+    if transport.replaying:
+        return transport.replay("market_cap", symbol)
+    info = transport.call("yahoo.fast_info", lambda: _yfinance().Ticker(symbol, session=transport.session()).fast_info)
+    market_cap = getattr(info, "market_cap", None)
+    market_cap = float(market_cap) if market_cap is not None else None
+    transport.record("market_cap", symbol, market_cap)
+    return market_cap
+
+
+def market_cap_verdicts(
+    tickers: Iterable[str],
+    threshold: float,
+    cache_dir: Optional[Path] = None,
+    config: Optional[DataConfig] = None,
+) -> Dict[str, bool]:
+    """Whether each ticker's market cap is at least ``threshold``; tickers whose lookup failed are left out."""
+    config = config or DataConfig()
+    transport = transport_for(config)
+    if not transport.replaying and _yfinance() is None:
         raise ImportError("yfinance is required for live market cap filtering")
-    passed: List[str] = []
-    for symbol in tickers:
-        ticker = yf.Ticker(symbol)
-        info = ticker.fast_info
-        market_cap = getattr(info, "market_cap", None)
-        if market_cap is None:
-            continue
-        if market_cap >= threshold:
-            passed.append(symbol)
-    return passed
+    screener = MarketCapScreener(
+        lambda symbol: _fetch_market_cap(symbol, transport),
+        snapshot_path=cache_dir / "market_caps.csv" if cache_dir is not None and config.cache_enabled else None,
+        workers=config.screen_workers,
+        requests_per_second=config.screen_requests_per_second,
+        ttl=config.market_cap_ttl,
+    )
+    with span("data.screen"):
+        return screener.verdicts(tickers, threshold)
 
 
-def _sample_earnings(symbol: str, config: DataConfig) -> List[dict]:
-    path = config.sample_data_dir / f"earnings_{symbol}.csv"
+def filter_by_market_cap(
+    tickers: Iterable[str],
+    threshold: float,
+    cache_dir: Optional[Path] = None,
+    config: Optional[DataConfig] = None,
+) -> List[str]:
+    return [symbol for symbol, passed in market_cap_verdicts(tickers, threshold, cache_dir, config).items() if passed]
+
+
+def _read_sample_earnings(path: Path) -> List[dict]:
     if not path.exists():
         return []
     events: List[dict] = []
@@ -88,33 +157,62 @@ def _sample_earnings(symbol: str, config: DataConfig) -> List[dict]:
             except Exception:
                 continue
             events.append({"earnings_date": when, "surprise": float(row.get("surprise", 0) or 0)})
+    return events
+
+
+def _sample_earnings(symbol: str, config: DataConfig) -> List[dict]:
+    if config.packed_store is not None:
+        events = open_store(config.packed_store).earnings(symbol)
+    else:
+        events = _read_sample_earnings(config.sample_data_dir / f"earnings_{symbol}.csv")
     cutoff = dt.datetime.utcnow() - dt.timedelta(days=365 * config.lookback_years)
     return [e for e in events if e["earnings_date"] >= cutoff]
 
 
-def earnings_dates(symbol: str, config: DataConfig) -> List[dict]:
-    if config.offline_mode:
-        return _sample_earnings(symbol, config)
-    if yf is None or pd is None:
-        raise ImportError("pandas and yfinance are required for live earnings lookups")
-    ticker = yf.Ticker(symbol)
-    df = ticker.get_earnings_dates(limit=config.lookback_years * 4)
-    if df is None:
-        return []
+def _download_earnings(symbol: str, config: DataConfig) -> List[dict]:
+    transport = transport_for(config)
+    if transport.replaying:
+        return transport.replay("earnings", symbol)
+    ticker = _yfinance().Ticker(symbol, session=transport.session())
+    # Throttled requests come back as empty frames, so those are retried too.
+    df = transport.call(
+        "yahoo.earnings_dates",
+        lambda: ticker.get_earnings_dates(limit=config.lookback_years * 4),
+        empty=lambda frame: frame is None or frame.empty,
+    )
+    if df is None or df.empty:
+        # Indistinguishable from throttling, so it fails the ticker rather than being cached as "no events".
+        raise TransportError(f"no earnings dates for {symbol} after {transport.max_retries} retries")
     df = df.reset_index().rename(columns={"index": "earnings_date"})
-    cutoff = dt.datetime.utcnow() - dt.timedelta(days=365 * config.lookback_years)
-    filtered = df[df["earnings_date"] >= pd.Timestamp(cutoff)]
-    return [
+    events = [
         {
-            "earnings_date": row["earnings_date"].to_pydatetime(),
+            # Stored and compared as naive wall-clock times, like the price bars.
+            "earnings_date": row["earnings_date"].to_pydatetime().replace(tzinfo=None),
             "surprise": float(row.get("surprise", 0.0) or 0.0),
         }
-        for _, row in filtered.iterrows()
+        for _, row in df.iterrows()
     ]
+    transport.record("earnings", symbol, events)
+    return events
 
 
-def _sample_prices(symbol: str, config: DataConfig) -> PriceSeries:
-    path = config.sample_data_dir / f"prices_{symbol}.csv"
+def earnings_dates(symbol: str, config: DataConfig, cache_dir: Optional[Path] = None) -> List[dict]:
+    if config.offline_mode:
+        return _sample_earnings(symbol, config)
+    if not _replaying(config) and (_yfinance() is None or _pandas() is None):
+        raise ImportError("pandas and yfinance are required for live earnings lookups")
+    cutoff = dt.datetime.utcnow() - dt.timedelta(days=365 * config.lookback_years)
+    cache = MarketDataCache(cache_dir, config) if cache_dir is not None and config.cache_enabled else None
+    events = cache.load_earnings(symbol, cutoff) if cache is not None else None
+    if events is None:
+        with span("data.earnings_download", symbol):
+            events = _download_earnings(symbol, config)
+        if cache is not None and events:
+            cache.store_earnings(symbol, events, cutoff)
+    return [e for e in events if e["earnings_date"] >= cutoff]
+
+
+def _read_sample_prices(path: Path) -> PriceSeries:
     if not path.exists():
         return []
     with path.open() as handle:
@@ -130,34 +228,223 @@ def _sample_prices(symbol: str, config: DataConfig) -> PriceSeries:
     return sorted(prices, key=lambda x: x[0])
 
 
-def price_on_dates(symbol: str, dates: List[dt.datetime], config: DataConfig) -> PriceSeries:
+def _sample_prices(symbol: str, config: DataConfig) -> PriceSeries:
+    if config.packed_store is not None:
+        return open_store(config.packed_store).prices(symbol)
+    return _read_sample_prices(config.sample_data_dir / f"prices_{symbol}.csv")
+
+
+def packed_price_index(symbol: str, config: DataConfig) -> Optional[PriceIndex]:
+    """Zero-copy index over the packed store for offline runs; ``None`` when no store is configured."""
+    if not config.offline_mode or config.packed_store is None:
+        return None
+    return open_store(config.packed_store).price_index(symbol)
+
+
+def _closes_from_frame(hist, symbols: Sequence[str]) -> Dict[str, PriceSeries]:
+    if hist is None or hist.empty:
+        return {symbol: [] for symbol in symbols}
+    closes = hist["Close"]
+    if isinstance(closes, _pandas().Series):
+        closes = closes.to_frame(name=symbols[0])
+    series: Dict[str, PriceSeries] = {}
+    for symbol in symbols:
+        if symbol not in closes.columns:
+            series[symbol] = []
+            continue
+        column = closes[symbol].dropna()
+        series[symbol] = [(idx.to_pydatetime().replace(tzinfo=None), float(val)) for idx, val in column.items()]
+    return series
+
+
+def _replayed_closes(transport: Transport, symbol: str, start: dt.datetime, end: dt.datetime) -> PriceSeries:
+    try:
+        bars = transport.replay("closes", symbol)
+    except FixtureMissingError:
+        return []  # like a download that has no bars for the symbol
+    return [(ts, close) for ts, close in bars if start <= ts <= end]
+
+
+def _record_closes(transport: Transport, symbol: str, bars: PriceSeries) -> None:
+    if not transport.recording:
+        return
+    # Incremental downloads cover only new bars, so they are merged into what was recorded before.
+    recorded = transport.recorded("closes", symbol, [])
+    transport.record("closes", symbol, sorted(dict([tuple(bar) for bar in recorded] + bars).items()))
+
+
+def _download_closes(
+    symbols: Sequence[str], start: dt.datetime, end: dt.datetime, config: DataConfig, incremental: bool = False
+) -> Dict[str, PriceSeries]:
+    """Download daily closes for ``symbols``, ``config.download_chunk_size`` symbols per request.
+
+    A chunk that is still empty after every retry raises, unless the download is
+    ``incremental`` (only bars past ones already cached), where no new bars is normal.
+    """
+    transport = transport_for(config)
+    symbols = list(symbols)
+    if transport.replaying:
+        return {symbol: _replayed_closes(transport, symbol, start, end) for symbol in symbols}
+    series: Dict[str, PriceSeries] = {}
+    chunk_size = max(config.download_chunk_size, 1)
+    for offset in range(0, len(symbols), chunk_size):
+        chunk = symbols[offset : offset + chunk_size]
+        with span("data.prices_download"):
+            hist = transport.call(
+                "yahoo.download",
+                lambda: _yfinance().download(
+                    chunk, start=start, end=end, progress=False, group_by="column", session=transport.session()
+                ),
+                empty=lambda frame: frame is None or frame.empty,
+            )
+        if (hist is None or hist.empty) and not incremental:
+            raise TransportError(f"no closes for {', '.join(chunk)} after {transport.max_retries} retries")
+        closes = _closes_from_frame(hist, chunk)
+        for symbol in chunk:
+            _record_closes(transport, symbol, closes[symbol])
+        series.update(closes)
+    return series
+
+
+def _load_closes(
+    symbols: Sequence[str],
+    start: dt.datetime,
+    end: dt.datetime,
+    config: DataConfig,
+    cache_dir: Optional[Path],
+) -> Dict[str, PriceSeries]:
+    if cache_dir is None or not config.cache_enabled:
+        return _download_closes(symbols, start, end, config)
+
+    cache = MarketDataCache(cache_dir, config)
+    stored: Dict[str, tuple] = {}
+    fetch_from: Dict[str, dt.datetime] = {}
+    for symbol in symbols:
+        bars, covered = cache.load_prices(symbol)
+        stored[symbol] = (bars, covered)
+        missing = cache.missing_ranges(covered, bars[-1][0] if bars else None, start, end)
+        if missing:
+            fetch_from[symbol] = min(gap_start for gap_start, _ in missing)
+
+    # Symbols refreshed together share a gap start, so ordering by it keeps chunks tight.
+    pending = sorted(fetch_from, key=lambda symbol: (fetch_from[symbol], symbol))
+    chunk_size = max(config.download_chunk_size, 1)
+    horizon = min(end, dt.datetime.utcnow())
+    for offset in range(0, len(pending), chunk_size):
+        chunk = pending[offset : offset + chunk_size]
+        incremental = all(stored[s][0] for s in chunk)
+        downloaded = _download_closes(chunk, min(fetch_from[s] for s in chunk), end, config, incremental)
+        for symbol in chunk:
+            bars, covered = stored[symbol]
+            merged = sorted(dict(bars + downloaded.get(symbol, [])).items())
+            covered = (min(covered[0], start), max(covered[1], horizon)) if covered else (start, horizon)
+            cache.store_prices(symbol, merged, covered)
+            stored[symbol] = (merged, covered)
+
+    return {symbol: [(ts, close) for ts, close in stored[symbol][0] if start <= ts <= end] for symbol in symbols}
+
+
+def post_event_span(config: DataConfig) -> dt.timedelta:
+    """Calendar days of history needed after an event to cover the window and every horizon."""
+    horizons = horizon_span(max(config.horizons)) if config.horizons else dt.timedelta(0)
+    return max(dt.timedelta(days=config.post_event_window_days), horizons)
+
+
+def price_on_dates(
+    symbol: str, dates: List[dt.datetime], config: DataConfig, cache_dir: Optional[Path] = None
+) -> PriceSeries:
     if config.offline_mode:
         return _sample_prices(symbol, config)
-    if yf is None or pd is None:
+    if not _replaying(config) and (_yfinance() is None or _pandas() is None):
         raise ImportError("pandas and yfinance are required for live price history")
     if not dates:
         return []
     start = min(dates) - dt.timedelta(days=2)
-    end = max(dates) + dt.timedelta(days=2)
-    hist = yf.download(symbol, start=start, end=end, progress=False)
-    if hist.empty:
-        return []
-    closes = hist["Close"]
-    return [(idx.to_pydatetime(), float(val)) for idx, val in closes.items()]
+    end = max(dates) + post_event_span(config)
+    return _load_closes([symbol], start, end, config, cache_dir)[symbol]
+
+
+def load_price_batch(symbols: Iterable[str], config: DataConfig, cache_dir: Optional[Path] = None) -> Dict[str, PriceSeries]:
+    """Closes covering the lookback window for every symbol, fetched in bulk.
+
+    Live downloads request ``config.download_chunk_size`` symbols at a time
+    instead of one request per symbol.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if config.offline_mode:
+        return {symbol: _sample_prices(symbol, config) for symbol in symbols}
+    if not _replaying(config) and (_yfinance() is None or _pandas() is None):
+        raise ImportError("pandas and yfinance are required for live price history")
+    if not symbols:
+        return {}
+    now = dt.datetime.utcnow()
+    start = now - dt.timedelta(days=365 * config.lookback_years + 2)
+    end = now + dt.timedelta(days=2)
+    return _load_closes(symbols, start, end, config, cache_dir)
 
 
 def end_of_day_close(prices: PriceSeries, date: dt.datetime) -> Optional[tuple]:
+    """Single-event lookup on date-sorted ``prices``; use ``PriceIndex.event_closes`` for many events."""
     if not prices:
         return None
-    pre_candidates = [price for ts, price in prices if ts <= date]
-    post_candidates = [price for ts, price in prices if date < ts <= date + dt.timedelta(days=2)]
-    pre_close = pre_candidates[-1] if pre_candidates else None
-    post_close = post_candidates[0] if post_candidates else None
+    after = bisect_right(prices, date, key=lambda bar: bar[0])
+    pre_close = prices[after - 1][1] if after else None
+    post_close = None
+    if after < len(prices) and prices[after][0] <= date + POST_EVENT_WINDOW:
+        post_close = prices[after][1]
     return pre_close, post_close
 
 
 def build_universe(config: DataConfig, cache_dir: Path) -> List[str]:
     if config.offline_mode:
         return _load_sample_universe(config)
-    tickers = fetch_nasdaq_tickers(cache_dir, config.max_tickers)
-    return filter_by_market_cap(tickers, config.market_cap_threshold)
+    if config.universe_as_of is not None:
+        # Pinning reads the snapshot history, which is kept even when caching is off.
+        return UniverseManager(cache_dir).as_of(config.universe_as_of).members(config.max_tickers)
+    return universe_manager(config, cache_dir).refresh(config.max_tickers).members(config.max_tickers)
+
+
+def pack_sample_data(source_dir: Path, output: Path) -> int:
+    """Pack an offline ``sample_data``-style directory into a single store; returns the symbol count."""
+    rows = _read_sample_universe(source_dir / "universe.csv")
+    symbols = [(row.get("Symbol") or "").upper() for row in rows]
+    if not symbols:
+        symbols = sorted(p.stem[len("prices_") :] for p in source_dir.glob("prices_*.csv"))
+    caps: Dict[str, Optional[float]] = {}
+    for row in rows:
+        try:
+            caps[(row.get("Symbol") or "").upper()] = float(row.get("MarketCap", 0))
+        except ValueError:
+            continue
+
+    def entries():
+        for symbol in symbols:
+            prices = _read_sample_prices(source_dir / f"prices_{symbol}.csv")
+            events = sorted(_read_sample_earnings(source_dir / f"earnings_{symbol}.csv"), key=lambda e: e["earnings_date"])
+            yield (
+                symbol,
+                caps.get(symbol),
+                ([to_epoch(ts) for ts, _ in prices], [close for _, close in prices]),
+                ([to_epoch(e["earnings_date"]) for e in events], [e["surprise"] for e in events]),
+            )
+
+    return write_store(output, entries())
+
+
+def pack_cache(cache_dir: Path, output: Path) -> int:
+    """Pack the live price/earnings cache into a single store for offline replay."""
+    snapshot = load_market_caps(cache_dir / "market_caps.csv")
+    symbols = sorted(p.stem for p in (cache_dir / "prices").glob("*.bin"))
+
+    def entries():
+        for symbol in symbols:
+            prices = read_columns(cache_dir / "prices" / f"{symbol}.bin")
+            earnings = read_columns(cache_dir / "earnings" / f"{symbol}.bin")
+            yield (
+                symbol,
+                snapshot[symbol][0] if symbol in snapshot else None,
+                prices[0] if prices else ((), ()),
+                earnings[0] if earnings else ((), ()),
+            )
+
+    return write_store(output, entries())
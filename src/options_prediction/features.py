@@ -0,0 +1,227 @@
+"""Per-symbol pre-earnings features, looked up point-in-time.
+
+An event is served the row of the last bar dated before its calendar day, so
+no feature can see the event's own reaction.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import math
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cache import atomic_open, to_epoch
+from .price_index import PriceIndex
+
+MOMENTUM_BARS = 20
+VOLATILITY_BARS = 20
+REACTION_EVENTS = 4
+FEATURES = ("momentum_20d", "volatility_20d", "last_reaction", "mean_abs_reaction")
+
+_MAGIC = b"OPF1"
+# magic, row count, feature count, signature of the inputs
+_HEADER = struct.Struct("<4sQQ32s")
+_NAN = float("nan")
+
+
+def _day_start(date: dt.datetime) -> int:
+    return to_epoch(dt.datetime.combine(date.date(), dt.time()))
+
+
+def signature(index: PriceIndex, event_epochs: Sequence[int], window: dt.timedelta) -> bytes:
+    """Digest identifying a table's inputs; a persisted table with another signature is rebuilt.
+
+    The price cache only extends a series at either end, so its bar count,
+    end points and end closes identify it in O(1) instead of hashing every bar.
+    """
+    digest = hashlib.sha256(",".join(FEATURES).encode("utf-8"))
+    digest.update(struct.pack("<qq", int(window.total_seconds()), len(index)))
+    if len(index):
+        digest.update(struct.pack("<qqdd", index.epoch_at(0), index.epoch_at(-1), index.closes[0], index.closes[-1]))
+    events = array("q", event_epochs)
+    digest.update(struct.pack("<q", len(events)))
+    digest.update(events.tobytes())
+    return digest.digest()
+
+
+class FeatureTable:
+    """Feature columns aligned with a symbol's bars, plus an event-date to row map for O(1) lookups."""
+
+    def __init__(self, epochs: Sequence[int], columns: Dict[str, array], key: bytes = b""):
+        self.epochs = epochs
+        self.columns = columns
+        self.key = key
+        self._rows: Dict[int, int] = {}
+
+    @classmethod
+    def compute(
+        cls,
+        index: PriceIndex,
+        event_dates: Sequence[dt.datetime],
+        window: dt.timedelta = dt.timedelta(days=2),
+    ) -> "FeatureTable":
+        """All feature columns in one pass over the closes, using prefix sums for the rolling windows."""
+        epochs = index.epochs()
+        closes = index.closes
+        n = len(closes)
+        event_epochs = sorted(to_epoch(date) for date in event_dates)
+        key = signature(index, event_epochs, window)
+        returns = [0.0] + [
+            math.log(closes[i] / closes[i - 1]) if closes[i] > 0 and closes[i - 1] > 0 else 0.0 for i in range(1, n)
+        ]
+        sums = list(accumulate(returns, initial=0.0))
+        squares = list(accumulate((r * r for r in returns), initial=0.0))
+
+        momentum = array("d", [_NAN]) * n
+        volatility = array("d", [_NAN]) * n
+        for i in range(MOMENTUM_BARS, n):
+            if closes[i - MOMENTUM_BARS] > 0:
+                momentum[i] = closes[i] / closes[i - MOMENTUM_BARS] - 1.0
+        w = VOLATILITY_BARS
+        for i in range(w, n):
+            # returns[i - w + 1 .. i]
+            total = sums[i + 1] - sums[i - w + 1]
+            variance = (squares[i + 1] - squares[i - w + 1] - total * total / w) / (w - 1)
+            volatility[i] = math.sqrt(variance) if variance > 0 else 0.0
+
+        # Earnings reactions, each known from its post-event bar onwards.
+        reactions: List[tuple] = []
+        span = int(window.total_seconds())
+        for epoch in event_epochs:
+            after = bisect_right(epochs, epoch)
+            if after and after < n and epochs[after] <= epoch + span and closes[after - 1]:
+                reactions.append((after, closes[after] / closes[after - 1] - 1.0))
+        reactions.sort()
+        last_reaction = array("d", [_NAN]) * n
+        mean_abs = array("d", [_NAN]) * n
+        recent: deque = deque(maxlen=REACTION_EVENTS)
+        position = 0
+        for i in range(n):
+            while position < len(reactions) and reactions[position][0] <= i:
+                recent.append(reactions[position][1])
+                position += 1
+            if recent:
+                last_reaction[i] = recent[-1]
+                mean_abs[i] = sum(abs(r) for r in recent) / len(recent)
+
+        columns = dict(zip(FEATURES, (momentum, volatility, last_reaction, mean_abs)))
+        return cls(epochs, columns, key)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def index_events(self, event_dates: Sequence[dt.datetime]) -> None:
+        """Map each event date to the last bar before its day, in one merged pass."""
+        lo = 0
+        for date in sorted(event_dates):
+            lo = bisect_left(self.epochs, _day_start(date), lo)
+            self._rows[to_epoch(date)] = lo - 1
+
+    def row_before(self, date: dt.datetime) -> int:
+        """Row of the last bar dated before ``date``'s day; -1 when there is none."""
+        row = self._rows.get(to_epoch(date))
+        if row is None:
+            row = bisect_left(self.epochs, _day_start(date)) - 1
+        return row
+
+    def lookup(self, date: dt.datetime) -> Dict[str, float]:
+        """Features known before ``date``; missing ones are left out."""
+        row = self.row_before(date)
+        if row < 0:
+            return {}
+        features: Dict[str, float] = {}
+        for name, column in self.columns.items():
+            value = column[row]
+            if value == value:
+                features[name] = round(value, 4)
+        return features
+
+    def save(self, path: Path) -> None:
+        epochs = array("q", self.epochs)
+        columns = [array("d", self.columns[name]) for name in FEATURES]
+        if sys.byteorder == "big":  # pragma: no cover - files are always little-endian
+            epochs.byteswap()
+            for column in columns:
+                column.byteswap()
+        with atomic_open(path) as handle:
+            handle.write(_HEADER.pack(_MAGIC, len(epochs), len(columns), self.key))
+            epochs.tofile(handle)
+            for column in columns:
+                column.tofile(handle)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["FeatureTable"]:
+        """A table written by :meth:`save`; ``None`` if missing, unreadable or from another feature set."""
+        if not path.exists():
+            return None
+        with path.open("rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, count, width, key = _HEADER.unpack(header)
+            if magic != _MAGIC or width != len(FEATURES):
+                return None
+            epochs = array("q")
+            columns = [array("d") for _ in FEATURES]
+            try:
+                epochs.fromfile(handle, count)
+                for column in columns:
+                    column.fromfile(handle, count)
+            except (EOFError, ValueError):  # truncated, possibly mid-value
+                return None
+        if sys.byteorder == "big":  # pragma: no cover - files are always little-endian
+            epochs.byteswap()
+            for column in columns:
+                column.byteswap()
+        return cls(epochs, dict(zip(FEATURES, columns)), key)
+
+
+class FeatureStore:
+    """Feature tables per symbol, kept in memory and persisted under ``cache_dir/features``.
+
+    A table is rebuilt only when the symbol's bar range, end closes or
+    earnings dates change; see :func:`signature`.
+    """
+
+    def __init__(self, cache_dir: Optional[Path], window: dt.timedelta = dt.timedelta(days=2)):
+        self.directory = cache_dir / "features" if cache_dir is not None else None
+        self.window = window
+        self._tables: Dict[str, Tuple[PriceIndex, Tuple[dt.datetime, ...], FeatureTable]] = {}
+        self._lock = threading.Lock()
+
+    def table(self, symbol: str, index: PriceIndex, event_dates: Sequence[dt.datetime]) -> FeatureTable:
+        events = tuple(event_dates)
+        with self._lock:
+            cached = self._tables.get(symbol)
+        # The same index object with the same events (e.g. a warm ``serve`` process) skips hashing.
+        if cached is not None and cached[0] is index and cached[1] == events:
+            return cached[2]
+        key = signature(index, sorted(to_epoch(date) for date in events), self.window)
+        table = cached[2] if cached is not None else None
+        if table is None or table.key != key:
+            path = self.directory / f"{symbol}.bin" if self.directory is not None else None
+            table = FeatureTable.load(path) if path is not None else None
+            if table is None or table.key != key:
+                table = FeatureTable.compute(index, event_dates, self.window)
+                if path is not None:
+                    table.save(path)
+            table.index_events(events)
+        with self._lock:
+            self._tables[symbol] = (index, events, table)
+        return table
+
+    def for_events(self, symbol: str, index: PriceIndex, event_dates: Sequence[dt.datetime]) -> List[Dict[str, float]]:
+        """Point-in-time features for each event date, in order."""
+        if not len(index):
+            return [{} for _ in event_dates]
+        table = self.table(symbol, index, event_dates)
+        return [table.lookup(date) for date in event_dates]
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses
-from typing import Dict, List
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from .config import LLMConfig
+from .throttle import backoff_delay
 
 
 @dataclasses.dataclass
@@ -13,44 +26,365 @@ class Prediction:
     rationale: str
 
 
+BatchItem = Tuple[str, Dict[str, str]]
+
+
+class LLMRequestError(RuntimeError):
+    """A provider call failed in a way that is worth retrying (timeouts, throttling, 5xx)."""
+
+
+class BudgetExhaustedError(RuntimeError):
+    """Raised when a client has no request budget left for another call."""
+
+
 class LLMClient:
     def __init__(self, config: LLMConfig):
         self.config = config
         self._used_tokens = 0
+        self._budget_lock = threading.Lock()
 
     @property
     def remaining_budget(self) -> int:
         return max(self.config.request_budget - self._used_tokens, 0)
 
+    @property
+    def used_tokens(self) -> int:
+        return self._used_tokens
+
+    def restore_usage(self, tokens: int) -> None:
+        """Carry budget spent by an earlier, interrupted pass over to this client."""
+        with self._budget_lock:
+            self._used_tokens = tokens
+
+    def _charge(self, tokens: int) -> None:
+        with self._budget_lock:
+            self._used_tokens += tokens
+
+    def _reserve(self, tokens: int) -> None:
+        """Claim ``tokens`` of budget before a call so concurrent requests cannot overspend it."""
+        with self._budget_lock:
+            if self.config.request_budget - self._used_tokens < tokens:
+                raise BudgetExhaustedError(f"LLM request budget of {self.config.request_budget} tokens is exhausted")
+            self._used_tokens += tokens
+
+    def _settle(self, reserved: int, used: int) -> None:
+        with self._budget_lock:
+            self._used_tokens += used - reserved
+
     def predict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
         raise NotImplementedError
 
+    def invalidate(self) -> None:
+        """Drop any state derived from earlier contexts; called when the notes change."""
+
+    def predict_batch(self, items: Sequence[BatchItem], concurrency: Optional[int] = None) -> List[Prediction]:
+        """Predict every ``(ticker, context)`` pair, in order, with up to ``concurrency`` calls in flight."""
+        if not items:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.apredict_batch(items, concurrency))
+        # asyncio.run cannot nest inside a running loop, so give the batch its own loop on a helper thread.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.apredict_batch(items, concurrency)).result()
+
+    async def apredict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        return await asyncio.to_thread(self.predict_direction, ticker, context)
+
+    async def apredict_batch(self, items: Sequence[BatchItem], concurrency: Optional[int] = None) -> List[Prediction]:
+        limit = asyncio.Semaphore(max(concurrency or self.config.max_concurrency, 1))
+
+        async def bounded(ticker: str, context: Dict[str, str]) -> Prediction:
+            async with limit:
+                return await self._apredict_with_retries(ticker, context)
+
+        return list(await asyncio.gather(*(bounded(ticker, context) for ticker, context in items)))
+
+    async def _apredict_with_retries(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        attempt = 0
+        while True:
+            try:
+                return await self.apredict_direction(ticker, context)
+            except LLMRequestError:
+                if attempt >= self.config.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(self.config.retry_backoff, attempt))
+                attempt += 1
+
+
+_HEURISTIC_RATIONALE = {
+    "up": "Positive EPS surprise suggests bullish move.",
+    "down": "Negative EPS surprise suggests bearish move.",
+    "flat": "No surprise detected; expecting muted reaction.",
+}
+
+
+def heuristic_call(surprise: float, config: LLMConfig) -> Tuple[str, float]:
+    """Direction and confidence the heuristic provider assigns to an EPS surprise.
+
+    Surprises within ``surprise_threshold`` of zero are called flat; otherwise
+    confidence grows linearly with the surprise's size up to ``confidence_cap``.
+    """
+    if abs(surprise) <= config.surprise_threshold:
+        return "flat", config.flat_confidence
+    direction = "up" if surprise > 0 else "down"
+    return direction, min(config.confidence_base + config.confidence_slope * abs(surprise), config.confidence_cap)
+
 
 class HeuristicLLM(LLMClient):
     """A lightweight, offline-friendly stand-in for an LLM call."""
 
     def predict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
         surprise = float(context.get("eps_surprise", 0.0) or 0.0)
-        rationale_parts: List[str] = []
-        if surprise > 0:
-            direction = "up"
-            confidence = min(0.5 + surprise, 0.95)
-            rationale_parts.append("Positive EPS surprise suggests bullish move.")
-        elif surprise < 0:
-            direction = "down"
-            confidence = min(0.5 + abs(surprise), 0.95)
-            rationale_parts.append("Negative EPS surprise suggests bearish move.")
-        else:
-            direction = "flat"
-            confidence = 0.4
-            rationale_parts.append("No surprise detected; expecting muted reaction.")
+        direction, confidence = heuristic_call(surprise, self.config)
+        rationale_parts: List[str] = [_HEURISTIC_RATIONALE[direction]]
 
         notes = context.get("notes")
         if notes:
             rationale_parts.append(f"Incorporated notes: {notes}")
-        self._used_tokens += int(len(rationale_parts) * 50)
+        self._charge(int(len(rationale_parts) * 50))
         return Prediction(direction=direction, confidence=confidence, rationale=" ".join(rationale_parts))
 
+    async def apredict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        return self.predict_direction(ticker, context)
+
+    def predict_batch(self, items: Sequence[BatchItem], concurrency: Optional[int] = None) -> List[Prediction]:
+        # Pure CPU work: an event loop would only add overhead.
+        return [self.predict_direction(ticker, context) for ticker, context in items]
+
+
+class HTTPLLM(LLMClient):
+    """Client for a JSON prediction endpoint, e.g. the local stub from ``options-prediction llm-stub``.
+
+    The endpoint receives ``{"ticker", "context", "model", "temperature", "max_tokens"}``
+    and answers ``{"direction", "confidence", "rationale", "tokens"}``.
+    """
+
+    def predict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        reserved = self.config.max_tokens
+        self._reserve(reserved)
+        used = 0
+        try:
+            payload = {
+                "ticker": ticker,
+                "context": context,
+                "model": self.config.model,
+                "temperature": self.config.temperature,
+                "max_tokens": self.config.max_tokens,
+            }
+            request = urllib.request.Request(
+                self.config.endpoint,
+                data=json.dumps(payload, default=str).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.config.request_timeout) as response:
+                    body = json.loads(response.read().decode("utf-8"))
+            except urllib.error.HTTPError as exc:
+                if exc.code == 429 or exc.code >= 500:
+                    raise LLMRequestError(f"{self.config.endpoint} returned HTTP {exc.code}") from exc
+                raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as exc:
+                raise LLMRequestError(f"{self.config.endpoint} unreachable: {exc}") from exc
+            used = int(body.get("tokens", reserved))
+            return Prediction(
+                direction=str(body["direction"]),
+                confidence=float(body["confidence"]),
+                rationale=str(body.get("rationale", "")),
+            )
+        finally:
+            self._settle(reserved, used)
+
+
+# The "[timestamp] " prefix append_notes puts on every note.
+_NOTE_STAMP = re.compile(r"\[\d{4}-\d\d-\d\dT[\d:.]+\]\s*")
+# Stored rows between prunes of the SQLite tier.
+_PRUNE_EVERY = 1024
+
+
+class CachedLLM(LLMClient):
+    """Memoize another client's predictions keyed on ticker, context and model settings.
+
+    An in-memory LRU tier sits in front of an optional SQLite tier that is
+    shared across runs and worker processes; its rows expire after
+    ``disk_cache_ttl`` and at most ``disk_cache_max_rows`` are kept. Cache
+    hits do not spend budget.
+    """
+
+    def __init__(self, inner: LLMClient, max_entries: int = 4096, db_path: Optional[Path] = None):
+        super().__init__(inner.config)
+        self.inner = inner
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Prediction]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._unpruned = 0
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions"
+                " (key TEXT PRIMARY KEY, direction TEXT, confidence REAL, rationale TEXT, stored_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(predictions)")}
+            if "stored_at" not in columns:  # caches created before rows expired; their rows count as expired
+                self._db.execute("ALTER TABLE predictions ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS predictions_by_age ON predictions (stored_at)")
+            self._prune()
+            self._db.commit()
+
+    @property
+    def remaining_budget(self) -> int:
+        return self.inner.remaining_budget
+
+    @property
+    def used_tokens(self) -> int:
+        return self.inner.used_tokens
+
+    def restore_usage(self, tokens: int) -> None:
+        self.inner.restore_usage(tokens)
+
+    def cache_key(self, ticker: str, context: Dict[str, str]) -> str:
+        """Digest of the ticker, the context the provider's answer depends on and the model settings.
+
+        The local heuristic's call ignores the notes, so they are left out of
+        its key and a new note does not miss the cache (cached rationales may
+        quote older notes). Other providers key on the notes without their
+        timestamps.
+        """
+        context = dict(context)
+        if "notes" in context:
+            if self.config.provider == "local":
+                del context["notes"]
+            else:
+                context["notes"] = _NOTE_STAMP.sub("", str(context["notes"]))
+        settings = {
+            "provider": self.config.provider,
+            "model": self.config.model,
+            "temperature": self.config.temperature,
+            "max_tokens": self.config.max_tokens,
+        }
+        if self.config.provider == "local":
+            settings["heuristic"] = [
+                self.config.surprise_threshold,
+                self.config.confidence_base,
+                self.config.confidence_slope,
+                self.config.confidence_cap,
+                self.config.flat_confidence,
+            ]
+        payload = json.dumps({"ticker": ticker, "context": context, "settings": settings}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, prediction: Prediction) -> None:
+        self._memory[key] = prediction
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def predict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        key = self.cache_key(ticker, context)
+        prediction = self._lookup(key)
+        if prediction is None:
+            prediction = self.inner.predict_direction(ticker, context)
+            self._store([(key, prediction)])
+        return prediction
+
+    def _lookup(self, key: str) -> Optional[Prediction]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return cached
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT direction, confidence, rationale FROM predictions WHERE key = ? AND stored_at >= ?",
+                    (key, time.time() - self.config.disk_cache_ttl.total_seconds()),
+                ).fetchone()
+                if row is not None:
+                    prediction = Prediction(direction=row[0], confidence=row[1], rationale=row[2])
+                    self._remember(key, prediction)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return prediction
+            self.misses += 1
+        return None
+
+    def _store(self, entries: Sequence[Tuple[str, Prediction]]) -> None:
+        with self._lock:
+            for key, prediction in entries:
+                self._remember(key, prediction)
+            if self._db is not None:
+                now = time.time()
+                # One transaction per batch; committing per row dominates small batches.
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    [(key, p.direction, p.confidence, p.rationale, now) for key, p in entries],
+                )
+                self._unpruned += len(entries)
+                if self._unpruned >= _PRUNE_EVERY:
+                    self._prune()
+                self._db.commit()
+
+    def _prune(self) -> None:
+        """Drop expired rows and the oldest beyond ``disk_cache_max_rows``; the caller commits."""
+        self._unpruned = 0
+        self._db.execute(
+            "DELETE FROM predictions WHERE stored_at < ?", (time.time() - self.config.disk_cache_ttl.total_seconds(),)
+        )
+        self._db.execute(
+            "DELETE FROM predictions WHERE key IN"
+            " (SELECT key FROM predictions ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (max(self.config.disk_cache_max_rows, 0),),
+        )
+
+    def predict_batch(self, items: Sequence[BatchItem], concurrency: Optional[int] = None) -> List[Prediction]:
+        keys = [self.cache_key(ticker, context) for ticker, context in items]
+        predictions: Dict[str, Optional[Prediction]] = {}
+        for key in keys:
+            if key not in predictions:
+                predictions[key] = self._lookup(key)
+        # Identical requests within the batch are sent to the provider once.
+        missing: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if predictions[key] is None:
+                missing.setdefault(key, i)
+        if missing:
+            fresh = self.inner.predict_batch([items[i] for i in missing.values()], concurrency)
+            predictions.update(zip(missing, fresh))
+            self._store(list(zip(missing, fresh)))
+        return [predictions[key] for key in keys]  # type: ignore[misc]
+
+    async def apredict_direction(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        key = self.cache_key(ticker, context)
+        prediction = self._lookup(key)
+        if prediction is None:
+            prediction = await self.inner._apredict_with_retries(ticker, context)
+            self._store([(key, prediction)])
+        return prediction
+
+    async def _apredict_with_retries(self, ticker: str, context: Dict[str, str]) -> Prediction:
+        # The wrapped client already retries cache misses.
+        return await self.apredict_direction(ticker, context)
+
+    def invalidate(self) -> None:
+        if self.config.provider != "local":
+            # Notes are part of the key, so stale entries can never be hit again; this just frees them.
+            with self._lock:
+                self._memory.clear()
+        self.inner.invalidate()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self._memory)}
+
 
-def make_llm(config: LLMConfig) -> LLMClient:
-    return HeuristicLLM(config)
+def make_llm(config: LLMConfig, cache_dir: Optional[Path] = None) -> LLMClient:
+    client: LLMClient = HTTPLLM(config) if config.provider == "http" else HeuristicLLM(config)
+    if config.cache_size > 0:
+        db_path = cache_dir / "predictions.sqlite" if cache_dir is not None and config.disk_cache else None
+        client = CachedLLM(client, max_entries=config.cache_size, db_path=db_path)
+    return client
@@ -0,0 +1,75 @@
+"""Local HTTP stand-in for a networked LLM provider, for offline throughput testing."""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from .config import LLMConfig
+from .llm import HeuristicLLM
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "StubLLMServer"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "invalid JSON body")
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self.send_error(503, "simulated provider overload")
+            return
+        prediction = self.server.model.predict_direction(str(request.get("ticker", "")), request.get("context") or {})
+        body = json.dumps(
+            {
+                "direction": prediction.direction,
+                "confidence": prediction.confidence,
+                "rationale": prediction.rationale,
+                "tokens": 50,
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - signature from BaseHTTPRequestHandler
+        pass
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """Answer ``HTTPLLM`` requests with the heuristic model after an artificial delay.
+
+    ``failure_rate`` returns HTTP 503 for that fraction of requests to exercise retries.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 0), latency: float = 0.0, failure_rate: float = 0.0):
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.model = HeuristicLLM(LLMConfig(request_budget=2**62))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/predict"
+
+
+def serve_stub(host: str = "127.0.0.1", port: int = 8765, latency: float = 0.0, failure_rate: float = 0.0) -> None:
+    with StubLLMServer((host, port), latency=latency, failure_rate=failure_rate) as server:
+        print(f"[llm-stub] Serving predictions at {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
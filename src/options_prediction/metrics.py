@@ -0,0 +1,207 @@
+"""Accuracy, calibration and return metrics over columnar backtest results."""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import compress, repeat
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .backtest import prediction_correct
+from .cache import from_epoch
+from .results import DIRECTIONS, ResultBatch
+
+# Upper confidence bounds of the calibration buckets; the last bucket is closed.
+CALIBRATION_EDGES: Tuple[float, ...] = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+# Inner boundaries of the EPS-surprise buckets; the outer buckets are open-ended.
+SURPRISE_EDGES: Tuple[float, ...] = (-0.10, -0.05, -0.02, 0.0, 0.02, 0.05, 0.10)
+GROUPINGS = ("run", "ticker", "quarter")
+
+_CORRECT = [[prediction_correct(predicted, actual) for predicted in DIRECTIONS] for actual in DIRECTIONS]
+
+
+@dataclass
+class GroupMetrics:
+    events: int = 0
+    correct: int = 0
+    accuracy: float = 0.0
+    weighted_accuracy: float = 0.0
+    mean_confidence: float = 0.0
+    mean_return: Optional[float] = None
+    # (low, high, events, mean confidence, hit rate) per confidence bucket
+    calibration: List[Tuple[float, float, int, float, float]] = field(default_factory=list)
+    # (actual, predicted) -> events
+    confusion: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # (low, high, events, hit rate) per EPS-surprise bucket
+    surprise_hit_rate: List[Tuple[float, float, int, float]] = field(default_factory=list)
+    horizon_accuracy: Dict[int, float] = field(default_factory=dict)
+
+
+@dataclass
+class FoldMetrics:
+    fold: int
+    train_start: dt.datetime
+    test_start: dt.datetime
+    test_end: dt.datetime
+    train_events: int
+    train_accuracy: float
+    test_events: int
+    test_accuracy: float
+    test_mean_confidence: float
+    test_brier: float
+    # Brier score with each test confidence replaced by its bucket's hit rate in the train window.
+    calibrated_brier: float
+
+
+def quarter_label(epoch: int) -> str:
+    when = from_epoch(epoch)
+    return f"{when.year}Q{(when.month - 1) // 3 + 1}"
+
+
+def _group_codes(batch: ResultBatch, by: str) -> Tuple[Sequence[int], List[str]]:
+    if by == "run":
+        return list(repeat(0, len(batch))), ["all"]
+    if by == "ticker":
+        return batch.ticker, list(batch.tickers.values)
+    if by == "quarter":
+        labels: List[str] = []
+        codes_by_epoch: Dict[int, int] = {}
+        codes_by_label: Dict[str, int] = {}
+        codes: List[int] = []
+        for epoch in batch.earnings_date:
+            code = codes_by_epoch.get(epoch)
+            if code is None:
+                label = quarter_label(epoch)
+                code = codes_by_label.get(label)
+                if code is None:
+                    code = codes_by_label[label] = len(labels)
+                    labels.append(label)
+                codes_by_epoch[epoch] = code
+            codes.append(code)
+        return codes, labels
+    raise ValueError(f"unknown grouping {by!r}; expected one of {', '.join(GROUPINGS)}")
+
+
+def _horizon_hits(batch: ResultBatch, horizon: int) -> List[bool]:
+    flat = DIRECTIONS.index("flat")
+    hits: List[bool] = []
+    for predicted, value in zip(batch.predicted, batch.horizon_returns[horizon]):
+        if value != value:  # NaN: no close that far out
+            hits.append(False)
+        elif predicted == flat:
+            hits.append(value == 0.0)
+        else:
+            hits.append(DIRECTIONS[predicted] == ("up" if value > 0 else "down" if value < 0 else "flat"))
+    return hits
+
+
+def compute(
+    batch: ResultBatch,
+    by: str = "run",
+    calibration_edges: Sequence[float] = CALIBRATION_EDGES,
+    surprise_edges: Sequence[float] = SURPRISE_EDGES,
+) -> Dict[str, GroupMetrics]:
+    """Metrics per group (``run``, ``ticker`` or ``quarter``) in a few passes over the columns.
+
+    Integer tallies come from one ``Counter`` over zipped code columns; float
+    sums are accumulated into flat per-group lists.
+    """
+    codes, labels = _group_codes(batch, by)
+    groups = len(labels)
+    conf_buckets = list(map(partial(bisect_right, tuple(calibration_edges[:-1])), batch.confidence))
+    surprise_bucket = partial(bisect_right, tuple(surprise_edges))
+    surprise_buckets = [-1 if s != s else surprise_bucket(s) for s in batch.surprise]
+
+    cells = Counter(zip(codes, batch.actual, batch.predicted, conf_buckets, surprise_buckets))
+
+    n_conf = len(calibration_edges)
+    conf_sums = [0.0] * (groups * n_conf)
+    weighted_hits = [0.0] * groups
+    for code, bucket, confidence, correct in zip(codes, conf_buckets, batch.confidence, batch.correct):
+        conf_sums[code * n_conf + bucket] += confidence
+        if correct:
+            weighted_hits[code] += confidence
+    return_sums = [0.0] * groups
+    return_counts = [0] * groups
+    for code, pre, post in zip(codes, batch.pre_close, batch.post_close):
+        if pre == pre and post == post and pre:
+            return_sums[code] += post / pre - 1.0
+            return_counts[code] += 1
+    horizon_events = Counter(codes)
+    horizon_hits = {h: Counter(compress(codes, _horizon_hits(batch, h))) for h in batch.horizons}
+
+    n_surprise = len(surprise_edges) + 1
+    events = [0] * groups
+    hits = [0] * groups
+    conf_counts = [0] * (groups * n_conf)
+    conf_hits = [0] * (groups * n_conf)
+    surprise_counts = [0] * (groups * n_surprise)
+    surprise_hits = [0] * (groups * n_surprise)
+    confusion: List[Dict[Tuple[str, str], int]] = [{} for _ in range(groups)]
+    for (code, actual, predicted, conf_bucket, s_bucket), count in cells.items():
+        ok = count if _CORRECT[actual][predicted] else 0
+        events[code] += count
+        hits[code] += ok
+        key = (DIRECTIONS[actual], DIRECTIONS[predicted])
+        confusion[code][key] = confusion[code].get(key, 0) + count
+        conf_counts[code * n_conf + conf_bucket] += count
+        conf_hits[code * n_conf + conf_bucket] += ok
+        if s_bucket >= 0:
+            surprise_counts[code * n_surprise + s_bucket] += count
+            surprise_hits[code * n_surprise + s_bucket] += ok
+
+    conf_bounds = list(zip((0.0,) + tuple(calibration_edges[:-1]), calibration_edges))
+    surprise_bounds = list(zip((-math.inf,) + tuple(surprise_edges), tuple(surprise_edges) + (math.inf,)))
+    report: Dict[str, GroupMetrics] = {}
+    for code, label in enumerate(labels):
+        total = events[code]
+        if not total:
+            continue
+        calibration = []
+        for k, (low, high) in enumerate(conf_bounds):
+            i = code * n_conf + k
+            n = conf_counts[i]
+            calibration.append((low, high, n, conf_sums[i] / n if n else 0.0, conf_hits[i] / n if n else 0.0))
+        by_surprise = []
+        for k, (low, high) in enumerate(surprise_bounds):
+            i = code * n_surprise + k
+            n = surprise_counts[i]
+            by_surprise.append((low, high, n, surprise_hits[i] / n if n else 0.0))
+        conf_total = sum(conf_sums[code * n_conf : (code + 1) * n_conf])
+        report[label] = GroupMetrics(
+            events=total,
+            correct=hits[code],
+            accuracy=hits[code] / total,
+            weighted_accuracy=weighted_hits[code] / conf_total if conf_total else 0.0,
+            mean_confidence=conf_total / total,
+            mean_return=return_sums[code] / return_counts[code] if return_counts[code] else None,
+            calibration=calibration,
+            confusion=confusion[code],
+            surprise_hit_rate=by_surprise,
+            horizon_accuracy={h: horizon_hits[h][code] / horizon_events[code] for h in batch.horizons},
+        )
+    return report
+
+
+def format_report(report: Dict[str, GroupMetrics]) -> List[str]:
+    """One summary line per group, plus calibration and surprise rows for non-empty buckets."""
+    lines: List[str] = []
+    for label, metrics in report.items():
+        mean_return = "n/a" if metrics.mean_return is None else f"{metrics.mean_return:+.2%}"
+        horizons = "".join(f"; {h}d {accuracy:.1%}" for h, accuracy in metrics.horizon_accuracy.items())
+        lines.append(
+            f"{label}: {metrics.correct}/{metrics.events} correct ({metrics.accuracy:.1%}); "
+            f"confidence-weighted {metrics.weighted_accuracy:.1%}; mean confidence {metrics.mean_confidence:.2f}; "
+            f"mean post-earnings return {mean_return}{horizons}"
+        )
+        for low, high, n, confidence, hit_rate in metrics.calibration:
+            if n:
+                lines.append(f"  confidence [{low:.1f}, {high:.1f}): {n} events, mean {confidence:.2f}, hit rate {hit_rate:.1%}")
+        for low, high, n, hit_rate in metrics.surprise_hit_rate:
+            if n:
+                lines.append(f"  surprise [{low:+.2f}, {high:+.2f}): {n} events, hit rate {hit_rate:.1%}")
+    return lines
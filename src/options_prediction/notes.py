@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import datetime as dt
+import os
 from pathlib import Path
-from typing import Iterable, List
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+from .cache import atomic_open
+
+_BLOCK_SIZE = 8192
 
 
 def load_notes(path: Path) -> List[str]:
@@ -20,3 +25,117 @@ def append_notes(path: Path, notes: Iterable[str]) -> None:
 
 def record_iteration_summary(path: Path, summary: str) -> None:
     append_notes(path, [summary])
+
+
+def _tail_offset(handle: BinaryIO, count: int) -> int:
+    """Byte offset where the last ``count`` non-empty lines of ``handle`` begin, read backwards in blocks."""
+    handle.seek(0, os.SEEK_END)
+    pos = end = handle.tell()
+    data = b""
+    while pos > 0:
+        step = min(_BLOCK_SIZE, pos)
+        pos -= step
+        handle.seek(pos)
+        data = handle.read(step) + data
+        starts: List[Tuple[int, bytes]] = []
+        offset = pos
+        for part in data.split(b"\n"):
+            starts.append((offset, part))
+            offset += len(part) + 1
+        if pos > 0:
+            starts = starts[1:]  # may begin mid-line
+        lines = [start for start, part in starts if part.strip()]
+        if len(lines) >= count:
+            return lines[-count] if count > 0 else end
+    return 0
+
+
+def tail_notes(path: Path, count: int) -> List[str]:
+    """The last ``count`` notes, reading only the end of the file."""
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return []
+    with handle:
+        handle.seek(_tail_offset(handle, count))
+        data = handle.read()
+    lines = [line.strip() for line in data.decode("utf-8").splitlines() if line.strip()]
+    return lines[-count:] if count > 0 else []
+
+
+def _older_archive(archive: Path) -> Path:
+    if archive.suffix == ".1":
+        return archive.with_suffix(".2")
+    return archive.with_name(archive.name + ".1")
+
+
+def compact_notes(path: Path, keep: int, archive: Optional[Path] = None, max_archive_bytes: int = 0) -> int:
+    """Keep the last ``keep`` notes in ``path`` and append the older ones to ``archive``.
+
+    The archive defaults to ``<path>.1``. With ``max_archive_bytes``, an
+    archive that would grow past it is first moved aside (``<path>.1`` to
+    ``<path>.2``), overwriting the previous one, so at most two archive
+    generations are kept and the oldest notes are discarded. Returns the
+    number of bytes moved.
+    """
+    if not path.exists():
+        return 0
+    archive = archive or path.with_name(path.name + ".1")
+    with path.open("rb") as handle:
+        offset = _tail_offset(handle, keep)
+        if offset == 0:
+            return 0
+        try:
+            archived_size = archive.stat().st_size
+        except FileNotFoundError:
+            archived_size = 0
+        if max_archive_bytes > 0 and archived_size and archived_size + offset > max_archive_bytes:
+            os.replace(archive, _older_archive(archive))
+        handle.seek(0)
+        with archive.open("ab") as archived:
+            remaining = offset
+            while remaining:
+                chunk = handle.read(min(_BLOCK_SIZE, remaining))
+                archived.write(chunk)
+                remaining -= len(chunk)
+        with atomic_open(path) as kept:
+            kept.write(handle.read())
+    return offset
+
+
+def rotate_notes(path: Path, max_bytes: int, keep: int) -> bool:
+    """Compact ``path`` down to ``keep`` notes once it grows past ``max_bytes``; archives rotate at the same size."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return False
+    if max_bytes <= 0 or size <= max_bytes:
+        return False
+    return compact_notes(path, keep, max_archive_bytes=max_bytes) > 0
+
+
+class NotesStore:
+    """The tail of a notes file, re-read only when its size, mtime or inode change."""
+
+    def __init__(self, path: Path, tail: int = 5):
+        self.path = path
+        self.tail = tail
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._notes: List[str] = []
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def changed(self) -> bool:
+        return self._stat() != self._signature
+
+    def latest(self) -> List[str]:
+        signature = self._stat()
+        if signature != self._signature:
+            self._notes = tail_notes(self.path, self.tail) if signature is not None else []
+            self._signature = signature
+        return self._notes
@@ -0,0 +1,138 @@
+"""Single-file, memory-mapped store of price and earnings columns for offline replays."""
+
+from __future__ import annotations
+
+import functools
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache import atomic_open, from_epoch
+from .price_index import PriceIndex
+
+_MAGIC = b"OPPK"
+_VERSION = 1
+# magic, format version, byte length of the JSON symbol index that follows
+_PREAMBLE = struct.Struct("<4sIQ")
+
+# (symbol, market cap, (price epochs, closes), (earnings epochs, surprises))
+PackEntry = Tuple[str, Optional[float], Tuple[Sequence[int], Sequence[float]], Tuple[Sequence[int], Sequence[float]]]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def write_store(path: Path, entries: Iterable[PackEntry]) -> int:
+    """Pack ``entries`` into ``path``; returns the number of symbols written.
+
+    Layout: preamble, JSON index (symbol -> offsets, counts, market cap), then
+    four contiguous little-endian columns: price epochs, closes, earnings
+    epochs and surprises. Symbol order is preserved as the universe order.
+    """
+    price_ts, price_close = array("q"), array("d")
+    earn_ts, earn_val = array("q"), array("d")
+    symbols: Dict[str, dict] = {}
+    for symbol, market_cap, (p_ts, p_close), (e_ts, e_val) in entries:
+        symbols[symbol] = {
+            "market_cap": market_cap,
+            "prices": [len(price_ts), len(p_ts)],
+            "earnings": [len(earn_ts), len(e_ts)],
+        }
+        price_ts.extend(p_ts)
+        price_close.extend(p_close)
+        earn_ts.extend(e_ts)
+        earn_val.extend(e_val)
+    index = json.dumps(
+        {"symbols": symbols, "price_count": len(price_ts), "earnings_count": len(earn_ts)}, separators=(",", ":")
+    ).encode("utf-8")
+    header = _PREAMBLE.pack(_MAGIC, _VERSION, len(index)) + index
+    header += b"\0" * (_aligned(len(header)) - len(header))
+    if sys.byteorder == "big":  # pragma: no cover - the format is always little-endian
+        for column in (price_ts, price_close, earn_ts, earn_val):
+            column.byteswap()
+    with atomic_open(path) as handle:
+        handle.write(header)
+        for column in (price_ts, price_close, earn_ts, earn_val):
+            column.tofile(handle)
+    return len(symbols)
+
+
+class PackedStore:
+    """Read-only view over a packed file; per-symbol slices are zero-copy memoryviews."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_len = _PREAMBLE.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} packed store")
+        start = _PREAMBLE.size
+        index = json.loads(self._map[start : start + index_len])
+        self._symbols: Dict[str, dict] = index["symbols"]
+        prices, earnings = index["price_count"], index["earnings_count"]
+        view = memoryview(self._map)
+        offset = _aligned(start + index_len)
+        columns = []
+        for count, typecode in ((prices, "q"), (prices, "d"), (earnings, "q"), (earnings, "d")):
+            columns.append(self._column(view[offset : offset + count * 8], typecode))
+            offset += count * 8
+        self._price_ts, self._price_close, self._earn_ts, self._earn_val = columns
+
+    @staticmethod
+    def _column(raw: memoryview, typecode: str) -> Sequence:
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        column = array(typecode, raw.tobytes())  # pragma: no cover - big-endian hosts copy
+        column.byteswap()  # pragma: no cover
+        return column  # pragma: no cover
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def market_cap(self, symbol: str) -> Optional[float]:
+        entry = self._symbols.get(symbol)
+        return entry["market_cap"] if entry else None
+
+    def price_columns(self, symbol: str) -> Tuple[Sequence[int], Sequence[float]]:
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            return (), ()
+        offset, count = entry["prices"]
+        return self._price_ts[offset : offset + count], self._price_close[offset : offset + count]
+
+    def earnings_columns(self, symbol: str) -> Tuple[Sequence[int], Sequence[float]]:
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            return (), ()
+        offset, count = entry["earnings"]
+        return self._earn_ts[offset : offset + count], self._earn_val[offset : offset + count]
+
+    def price_index(self, symbol: str) -> PriceIndex:
+        return PriceIndex.from_columns(*self.price_columns(symbol))
+
+    def prices(self, symbol: str) -> List[Tuple]:
+        epochs, closes = self.price_columns(symbol)
+        return [(from_epoch(ts), close) for ts, close in zip(epochs, closes)]
+
+    def earnings(self, symbol: str) -> List[dict]:
+        epochs, surprises = self.earnings_columns(symbol)
+        return [{"earnings_date": from_epoch(ts), "surprise": surprise} for ts, surprise in zip(epochs, surprises)]
+
+
+@functools.lru_cache(maxsize=8)
+def _open_cached(path: str, mtime_ns: int) -> PackedStore:
+    return PackedStore(Path(path))
+
+
+def open_store(path: Path) -> PackedStore:
+    """Open ``path`` once per process; a repacked file (new mtime) is reopened."""
+    return _open_cached(str(path.resolve()), path.stat().st_mtime_ns)
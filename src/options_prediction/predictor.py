@@ -1,33 +1,75 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
 
 from .config import AppConfig
-from .llm import LLMClient, Prediction, make_llm
-from .notes import load_notes
+from .llm import CachedLLM, LLMClient, Prediction, make_llm
+from .notes import NotesStore
+from .profiling import span
+
+# Only the most recent notes go into the prompt context, so only those are read.
+NOTES_IN_CONTEXT = 5
 
 
 class Predictor:
     def __init__(self, config: AppConfig):
         self.config = config
-        self.llm: LLMClient = make_llm(config.llm)
-        self.cached_notes = load_notes(config.run.notes_path)
+        self.llm: LLMClient = make_llm(config.llm, config.run.cache_dir)
+        self.notes = NotesStore(config.run.notes_path, tail=NOTES_IN_CONTEXT)
+        self.cached_notes = self.notes.latest()
 
     def build_context(self, eps_surprise: float | None, extra: Dict[str, str] | None = None) -> Dict[str, str]:
         context: Dict[str, str] = {"eps_surprise": eps_surprise or 0.0}
         if self.cached_notes:
-            context["notes"] = " ; ".join(self.cached_notes[-5:])
+            context["notes"] = " ; ".join(self.cached_notes[-NOTES_IN_CONTEXT:])
         if extra:
             context.update(extra)
         return context
 
     def predict(self, ticker: str, eps_surprise: float | None, extra: Dict[str, str] | None = None) -> Prediction:
         context = self.build_context(eps_surprise, extra)
-        return self.llm.predict_direction(ticker, context)
+        with span("predictor.predict", ticker):
+            return self.llm.predict_direction(ticker, context)
+
+    def predict_batch(
+        self, requests: Sequence[Tuple[str, float | None]], extras: Sequence[Dict[str, float]] | None = None
+    ) -> List[Prediction]:
+        """Predict ``(ticker, eps_surprise)`` pairs in one batch, up to ``LLMConfig.max_concurrency`` at a time.
+
+        ``extras`` adds per-request context entries, e.g. pre-earnings features.
+        """
+        extras = extras or [None] * len(requests)
+        items = [(ticker, self.build_context(eps_surprise, extra)) for (ticker, eps_surprise), extra in zip(requests, extras)]
+        with span("predictor.predict", requests[0][0] if requests else None):
+            return self.llm.predict_batch(items)
 
     def remaining_budget(self) -> int:
         return self.llm.remaining_budget
 
+    def state(self) -> Dict[str, int]:
+        """What a checkpoint needs to restore this predictor mid-pass."""
+        return {"used_tokens": self.llm.used_tokens}
+
+    def restore(self, state: Dict[str, int]) -> None:
+        self.llm.restore_usage(int(state.get("used_tokens", 0)))
+
+    def usage_since(self, state: Dict[str, int]) -> Dict[str, int]:
+        """Budget spent since ``state`` was taken, in the same shape."""
+        return {"used_tokens": self.llm.used_tokens - int(state.get("used_tokens", 0))}
+
+    def absorb(self, usage: Dict[str, int]) -> None:
+        """Add budget another process's predictor spent on this one's behalf."""
+        self.llm.restore_usage(self.llm.used_tokens + int(usage.get("used_tokens", 0)))
+
     def refresh_notes(self) -> List[str]:
-        self.cached_notes = load_notes(self.config.run.notes_path)
+        """Re-read the notes tail if the file changed since the last call; a ``stat`` otherwise."""
+        if not self.notes.changed():
+            return self.cached_notes
+        notes = self.notes.latest()
+        if notes != self.cached_notes:
+            self.llm.invalidate()
+        self.cached_notes = notes
         return self.cached_notes
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.llm.stats() if isinstance(self.llm, CachedLLM) else {}
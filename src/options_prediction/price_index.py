@@ -0,0 +1,124 @@
+"""Sorted, array-backed price lookups for earnings event windows."""
+
+from __future__ import annotations
+
+import datetime as dt
+from array import array
+from bisect import bisect_right
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cache import to_epoch
+
+EventCloses = Optional[Tuple[Optional[float], Optional[float]]]
+
+
+class EventWindow(NamedTuple):
+    pre_close: Optional[float]
+    post_close: Optional[float]
+    horizon_closes: Tuple[Optional[float], ...]
+
+
+POST_EVENT_WINDOW = dt.timedelta(days=2)
+
+
+def horizon_span(horizon: int) -> dt.timedelta:
+    """Calendar time a ``horizon``-trading-day close may lie after the event."""
+    # Trading days widened for weekends, plus a margin for market holidays.
+    return dt.timedelta(days=horizon * 7 // 5 + 4)
+
+
+class PriceIndex:
+    """Closes for one symbol kept in timestamp order so event windows resolve by binary search.
+
+    Timestamps are either datetimes or, for indexes built by :meth:`from_columns`,
+    epoch seconds; queries are converted to match.
+    """
+
+    __slots__ = ("timestamps", "closes", "_key")
+
+    def __init__(self, timestamps: Sequence[dt.datetime], closes: Sequence[float]):
+        if len(timestamps) != len(closes):
+            raise ValueError("timestamps and closes must have the same length")
+        self.timestamps: Sequence = list(timestamps)
+        self.closes: Sequence[float] = array("d", closes)
+        self._key: Optional[Callable[[dt.datetime], int]] = None
+
+    @classmethod
+    def from_columns(cls, epochs: Sequence[int], closes: Sequence[float]) -> "PriceIndex":
+        """Wrap sorted epoch-second and close columns (e.g. memoryviews) without copying them."""
+        if len(epochs) != len(closes):
+            raise ValueError("timestamps and closes must have the same length")
+        index = cls.__new__(cls)
+        index.timestamps = epochs
+        index.closes = closes
+        index._key = to_epoch
+        return index
+
+    @classmethod
+    def from_series(cls, prices: Sequence[Tuple[dt.datetime, float]]) -> "PriceIndex":
+        if any(prices[i][0] > prices[i + 1][0] for i in range(len(prices) - 1)):
+            prices = sorted(prices, key=lambda bar: bar[0])
+        return cls([ts for ts, _ in prices], [close for _, close in prices])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def epoch_at(self, position: int) -> int:
+        """Epoch seconds of one bar, without converting the whole column."""
+        timestamp = self.timestamps[position]
+        return timestamp if self._key is not None else to_epoch(timestamp)
+
+    def epochs(self) -> Sequence[int]:
+        """Timestamps as epoch seconds (the column itself for indexes built by :meth:`from_columns`)."""
+        if self._key is not None:
+            return self.timestamps
+        return [to_epoch(ts) for ts in self.timestamps]
+
+    def event_windows(
+        self,
+        dates: Sequence[dt.datetime],
+        horizons: Sequence[int] = (),
+        window: dt.timedelta = POST_EVENT_WINDOW,
+    ) -> List[Optional[EventWindow]]:
+        """Resolve the closes around every date in one batched pass.
+
+        ``pre_close`` is the last close at or before the date and ``post_close``
+        the first close after it but no later than ``date + window``. Each
+        horizon ``h`` is the close ``h`` bars after the pre-event bar, or
+        ``None`` when that bar is later than ``date + horizon_span(h)`` (a gap
+        in the data would otherwise stretch the horizon). Returns ``None`` per
+        date when the index is empty, matching ``end_of_day_close``.
+        """
+        if not self.timestamps:
+            return [None for _ in dates]
+        resolved: List[Optional[EventWindow]] = [None] * len(dates)
+        timestamps = self.timestamps
+        closes = self.closes
+        key = self._key
+        count = len(timestamps)
+        spans = [horizon_span(h) for h in horizons]
+        lo = 0
+        # Visiting dates in order lets each search start where the previous one ended.
+        for position in sorted(range(len(dates)), key=lambda i: dates[i]):
+            date = dates[position]
+            query, limit = (date, date + window) if key is None else (key(date), key(date + window))
+            after = bisect_right(timestamps, query, lo)
+            lo = after
+            pre_close = closes[after - 1] if after else None
+            post_close = None
+            if after < count and timestamps[after] <= limit:
+                post_close = closes[after]
+            horizon_closes = tuple(
+                closes[after - 1 + h]
+                if after
+                and after - 1 + h < count
+                and timestamps[after - 1 + h] <= (date + span if key is None else key(date + span))
+                else None
+                for h, span in zip(horizons, spans)
+            )
+            resolved[position] = EventWindow(pre_close, post_close, horizon_closes)
+        return resolved
+
+    def event_closes(self, dates: Sequence[dt.datetime], window: dt.timedelta = POST_EVENT_WINDOW) -> List[EventCloses]:
+        """``(pre_close, post_close)`` per date; see :meth:`event_windows`."""
+        return [None if w is None else (w.pre_close, w.post_close) for w in self.event_windows(dates, (), window)]
@@ -0,0 +1,137 @@
+"""Opt-in timing spans and latency histograms for the backtest stages."""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the histogram buckets written to the timings report.
+BUCKETS: Tuple[float, ...] = (0.001, 0.01, 0.1, 1.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+_enabled = False
+_lock = threading.Lock()
+_by_stage: Dict[str, List[float]] = defaultdict(list)
+_by_ticker: Dict[str, List[float]] = defaultdict(list)
+# Time spent on each ticker across its stages so far, until ``finish_ticker`` turns it into one sample.
+_open_tickers: Dict[str, float] = defaultdict(float)
+
+
+def enable(flag: bool = True) -> None:
+    global _enabled
+    _enabled = flag
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    with _lock:
+        _by_stage.clear()
+        _by_ticker.clear()
+        _open_tickers.clear()
+
+
+def span(stage: str, ticker: Optional[str] = None) -> ContextManager[None]:
+    """Time the enclosed block under ``stage``, adding it to ``ticker``'s total; a shared no-op when disabled."""
+    if not _enabled:
+        return _NOOP
+    return _timed(stage, ticker)
+
+
+@contextlib.contextmanager
+def _timed(stage: str, ticker: Optional[str]) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _by_stage[stage].append(elapsed)
+            if ticker is not None:
+                _open_tickers[ticker] += elapsed
+
+
+def finish_ticker(ticker: str) -> None:
+    """Record the time spent on ``ticker`` since its last finish as one total-latency sample."""
+    if not _enabled:
+        return
+    with _lock:
+        if ticker in _open_tickers:
+            _by_ticker[ticker].append(_open_tickers.pop(ticker))
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def _row(kind: str, key: str, samples: List[float]) -> list:
+    ordered = sorted(samples)
+    counts = [0] * (len(BUCKETS) + 1)
+    for sample in ordered:
+        counts[next((i for i, bound in enumerate(BUCKETS) if sample <= bound), len(BUCKETS))] += 1
+    total = sum(ordered)
+    return [
+        kind,
+        key,
+        len(ordered),
+        round(total, 6),
+        round(total / len(ordered) * 1000, 3),
+        round(_percentile(ordered, 0.5) * 1000, 3),
+        round(_percentile(ordered, 0.95) * 1000, 3),
+        round(ordered[-1] * 1000, 3),
+    ] + counts
+
+
+def write_report(path: Path) -> None:
+    """Write per-stage and per-ticker latency summaries and histograms as CSV.
+
+    A stage row has one sample per span; a ticker row has one sample per
+    finished backtest of that ticker, summing all of its stages.
+    """
+    with _lock:
+        stages = {key: list(samples) for key, samples in _by_stage.items()}
+        tickers = {key: list(samples) for key, samples in _by_ticker.items()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            ["kind", "key", "count", "total_s", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+            + [f"le_{bound:g}s" for bound in BUCKETS]
+            + [f"gt_{BUCKETS[-1]:g}s"]
+        )
+        for key in sorted(stages):
+            writer.writerow(_row("stage", key, stages[key]))
+        for key in sorted(tickers):
+            writer.writerow(_row("ticker", key, tickers[key]))
+
+
+@contextlib.contextmanager
+def profile_to(path: Path, top: int = 30) -> Iterator[None]:
+    """Run the block under cProfile, dump raw stats to ``path`` and a text summary beside it."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(top)
+        path.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+
+
+def timings_path(log_path: Path) -> Path:
+    """The timings report lives next to the run log."""
+    return log_path.with_name("timings.csv")
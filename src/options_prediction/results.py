@@ -0,0 +1,293 @@
+"""Columnar ``BacktestResult`` batches and streaming result writers."""
+
+from __future__ import annotations
+
+import csv
+import math
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from .backtest import BacktestResult, price_direction, prediction_correct
+from .cache import from_epoch, to_epoch
+from .checks import require_packages
+from .profiling import span
+
+DIRECTIONS = ("up", "down", "flat", "unknown")
+_DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+_NAN = float("nan")
+
+# Columns every result writer emits, in order, before the per-horizon pairs.
+COLUMNS = (
+    "ticker",
+    "earnings_date",
+    "pre_close",
+    "post_close",
+    "actual_direction",
+    "predicted_direction",
+    "confidence",
+    "rationale",
+    "eps_surprise",
+)
+
+
+def result_columns(horizons: Sequence[int] = ()) -> List[str]:
+    return list(COLUMNS) + [column for h in horizons for column in (f"return_{h}d", f"direction_{h}d")]
+
+
+def _optional(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class Categories:
+    """Interns repeated strings (tickers, rationales) as integer codes."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ResultBatch:
+    """Struct-of-arrays store for backtest results.
+
+    Each column is a typed ``array``: missing closes and returns are NaN, and
+    directions, tickers and rationales are small integer codes. The actual
+    direction and correctness are computed once on append.
+    """
+
+    def __init__(self, horizons: Sequence[int] = ()):
+        self.horizons = tuple(horizons)
+        self.tickers = Categories()
+        self.rationales = Categories()
+        self.ticker = array("I")
+        self.earnings_date = array("q")
+        self.pre_close = array("d")
+        self.post_close = array("d")
+        self.actual = array("b")
+        self.predicted = array("b")
+        self.correct = array("b")
+        self.confidence = array("d")
+        self.rationale = array("I")
+        self.surprise = array("d")
+        self.horizon_returns: Dict[int, array] = {h: array("d") for h in self.horizons}
+
+    @classmethod
+    def from_results(cls, results: Iterable[BacktestResult], horizons: Sequence[int] = ()) -> "ResultBatch":
+        batch = cls(horizons)
+        batch.extend(results)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ticker)
+
+    def append(self, result: BacktestResult) -> None:
+        actual = price_direction(result.pre_close, result.post_close)
+        self.ticker.append(self.tickers.code(result.ticker))
+        self.earnings_date.append(to_epoch(result.earnings_date))
+        self.pre_close.append(_NAN if result.pre_close is None else result.pre_close)
+        self.post_close.append(_NAN if result.post_close is None else result.post_close)
+        self.actual.append(_DIRECTION_CODES[actual])
+        self.predicted.append(_DIRECTION_CODES[result.predicted_direction])
+        self.correct.append(prediction_correct(result.predicted_direction, actual))
+        self.confidence.append(result.confidence)
+        self.rationale.append(self.rationales.code(result.rationale))
+        self.surprise.append(_NAN if result.eps_surprise is None else result.eps_surprise)
+        for h, column in self.horizon_returns.items():
+            value = result.horizon_returns.get(h)
+            column.append(_NAN if value is None else value)
+
+    def extend(self, results: Iterable[BacktestResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    def row(self, i: int) -> BacktestResult:
+        return BacktestResult(
+            ticker=self.tickers[self.ticker[i]],
+            earnings_date=from_epoch(self.earnings_date[i]),
+            pre_close=_optional(self.pre_close[i]),
+            post_close=_optional(self.post_close[i]),
+            direction="unknown",
+            predicted_direction=DIRECTIONS[self.predicted[i]],
+            confidence=self.confidence[i],
+            rationale=self.rationales[self.rationale[i]],
+            horizon_returns={h: _optional(column[i]) for h, column in self.horizon_returns.items()},
+            eps_surprise=_optional(self.surprise[i]),
+        )
+
+    def __iter__(self) -> Iterator[BacktestResult]:
+        return (self.row(i) for i in range(len(self)))
+
+    def nbytes(self) -> int:
+        columns = [
+            self.ticker,
+            self.earnings_date,
+            self.pre_close,
+            self.post_close,
+            self.actual,
+            self.predicted,
+            self.correct,
+            self.confidence,
+            self.rationale,
+            self.surprise,
+            *self.horizon_returns.values(),
+        ]
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+class ResultWriter:
+    """Write ``BacktestResult`` rows to CSV incrementally, flushing after every batch."""
+
+    def __init__(self, path: Path, horizons: Sequence[int] = ()):
+        self.path = path
+        self.horizons = tuple(horizons)
+        self._handle = None
+        self._writer = None
+
+    def __enter__(self) -> "ResultWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(result_columns(self.horizons))
+
+    def write(self, results: Iterable[BacktestResult]) -> None:
+        with span("backtest.export"):
+            self._write(results)
+
+    def _write(self, results: Iterable[BacktestResult]) -> None:
+        for r in results:
+            self._writer.writerow(
+                [
+                    r.ticker,
+                    r.earnings_date,
+                    r.pre_close,
+                    r.post_close,
+                    r.actual_direction,
+                    r.predicted_direction,
+                    r.confidence,
+                    r.rationale,
+                    r.eps_surprise,
+                ]
+                + [value for h in self.horizons for value in (r.horizon_returns.get(h), r.horizon_direction(h))]
+            )
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class ParquetResultWriter:
+    """Stream results to Parquet, one row group per ``row_group_size`` buffered rows.
+
+    Requires ``pyarrow``, which is imported only when the writer is opened.
+    """
+
+    def __init__(self, path: Path, horizons: Sequence[int] = (), row_group_size: int = 50_000):
+        self.path = path
+        self.horizons = tuple(horizons)
+        self.row_group_size = row_group_size
+        self._batch = ResultBatch(self.horizons)
+        self._writer = None
+        self._pa = None
+
+    def __enter__(self) -> "ParquetResultWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        require_packages(["pyarrow"])
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(str(self.path), self._schema())
+
+    def _schema(self):
+        pa = self._pa
+        category = pa.dictionary(pa.int32(), pa.string())
+        types = {
+            "ticker": category,
+            "earnings_date": pa.timestamp("s"),
+            "actual_direction": category,
+            "predicted_direction": category,
+            "rationale": category,
+        }
+        return pa.schema(
+            [
+                (name, category if name.startswith("direction_") else types.get(name, pa.float64()))
+                for name in result_columns(self.horizons)
+            ]
+        )
+
+    def write(self, results: Iterable[BacktestResult]) -> None:
+        self._batch.extend(results)
+        if len(self._batch) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch = self._batch
+        if not len(batch):
+            return
+        pa = self._pa
+
+        def categorical(codes: array, values: Sequence[str]):
+            return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), pa.array(values, type=pa.string()))
+
+        def floats(column: array):
+            return pa.array(column, type=pa.float64(), from_pandas=True)  # NaN -> null
+
+        columns = [
+            categorical(batch.ticker, batch.tickers.values),
+            pa.array(batch.earnings_date, type=pa.int64()).cast(pa.timestamp("s")),
+            floats(batch.pre_close),
+            floats(batch.post_close),
+            categorical(batch.actual, list(DIRECTIONS)),
+            categorical(batch.predicted, list(DIRECTIONS)),
+            pa.array(batch.confidence, type=pa.float64()),
+            categorical(batch.rationale, batch.rationales.values),
+            floats(batch.surprise),
+        ]
+        for h in self.horizons:
+            returns = batch.horizon_returns[h]
+            codes = array("b", (_DIRECTION_CODES[price_direction(0.0, _optional(r))] for r in returns))
+            columns += [floats(returns), categorical(codes, list(DIRECTIONS))]
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self._writer.schema))
+        self._batch = ResultBatch(self.horizons)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+
+def open_result_writer(path: Path, horizons: Sequence[int] = ()):
+    """A streaming writer for ``path``: Parquet for ``.parquet`` files, CSV otherwise."""
+    if path.suffix == ".parquet":
+        return ParquetResultWriter(path, horizons)
+    return ResultWriter(path, horizons)
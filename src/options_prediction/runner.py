@@ -1,56 +1,290 @@
 from __future__ import annotations
 
 import datetime as dt
+import itertools
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .backtest import Backtester, RunLogEntry, append_run_log
+from .backtest import BacktestResult, Backtester, RunLogEntry, SymbolData, append_run_log
+from .checkpoint import Checkpoint, CheckpointState, checkpoint_path, universe_digest
 from .config import AppConfig, DEFAULT_CONFIG
 from .data import build_universe
-from .notes import append_notes
+from .notes import append_notes, rotate_notes
+from . import profiling
+from .profiling import span
+from .results import open_result_writer
+from .runstore import RunStore
+from .scheduler import Deadline, prioritize
+from .transport import transport_for
 
 
-def run_once(config: AppConfig, tickers: Iterable[str]) -> List[RunLogEntry]:
+SymbolOutcome = Tuple[str, List[BacktestResult], Optional[str]]
+# An outcome from a worker and the predictor budget it spent there.
+ShardOutcome = Tuple[SymbolOutcome, Dict[str, int]]
+
+
+def _evaluate_loaded(backtester: Backtester, loaded: List[SymbolData]) -> Iterator[SymbolOutcome]:
+    for data in loaded:
+        if data.error is not None:
+            yield data.symbol, [], data.error
+            continue
+        try:
+            yield data.symbol, backtester.evaluate(data), None
+        except Exception as exc:
+            yield data.symbol, [], f"{type(exc).__name__}: {exc}"
+
+
+def _backtest_shard(
+    config: AppConfig,
+    symbols: List[str],
+    stop_at: Optional[float] = None,
+    predictor_state: Optional[Dict[str, int]] = None,
+) -> List[ShardOutcome]:
+    """Backtest a slice of the universe; failures are captured per symbol instead of raised.
+
+    The worker's predictor starts from ``predictor_state`` and each outcome
+    carries the budget spent on it. No ticker is started after the
+    wall-clock time ``stop_at``, so the result may cover only a prefix of
+    ``symbols``.
+    """
+    if stop_at is not None and time.time() >= stop_at:
+        return []
     backtester = Backtester(config)
-    log_entries: List[RunLogEntry] = []
-    for symbol in tickers:
-        results = backtester.backtest_symbol(symbol)
-        summary = backtester.summarize(results)
-        notes = f"Predictions={summary['total_predictions']} accuracy={summary['accuracy']:.2%}"
-        print(
-            f"[backtest] {symbol}: {summary['correct']}/{summary['total_predictions']} correct; accuracy "
-            f"{summary['accuracy']:.1%}"
-        )
-        log_entries.append(
-            RunLogEntry(timestamp=dt.datetime.utcnow(), ticker=symbol, accuracy=summary["accuracy"], notes=notes)
-        )
-        if results:
-            for res in results:
-                print(
-                    f"  - {res.earnings_date.date()} pre={res.pre_close} post={res.post_close} "
-                    f"actual={res.actual_direction} predicted={res.predicted_direction} ({res.confidence:.0%})"
-                )
+    predictor = backtester.predictor
+    if predictor_state:
+        predictor.restore(predictor_state)
+    outcomes: List[ShardOutcome] = []
+    before = predictor.state()
+    for outcome in _evaluate_loaded(backtester, backtester.load_symbols(symbols)):
+        outcomes.append((outcome, predictor.usage_since(before)))
+        before = predictor.state()
+        if stop_at is not None and time.time() >= stop_at:
+            break
+    return outcomes
+
+
+def _pipeline(
+    config: AppConfig, tickers: List[str], backtester: Optional[Backtester] = None
+) -> Iterator[SymbolOutcome]:
+    """Fetch batches on background threads while the caller predicts on earlier ones.
+
+    At most ``pipeline_depth`` batches are fetched ahead of the consumer, which
+    bounds memory and stops producers from racing through the universe.
+    """
+    backtester = backtester or Backtester(config)
+    size = max(config.run.pipeline_batch_size, 1)
+    batches = iter([tickers[offset : offset + size] for offset in range(0, len(tickers), size)])
+    pending: Deque[Tuple[List[str], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max(config.run.fetch_workers, 1)) as pool:
+        try:
+            for batch in itertools.islice(batches, max(config.run.pipeline_depth, 1)):
+                pending.append((batch, pool.submit(backtester.load_symbols, batch)))
+            while pending:
+                batch, future = pending.popleft()
+                upcoming = next(batches, None)
+                if upcoming is not None:
+                    pending.append((upcoming, pool.submit(backtester.load_symbols, upcoming)))
+                try:
+                    loaded = future.result()
+                except Exception as exc:
+                    for symbol in batch:
+                        yield symbol, [], f"{type(exc).__name__}: {exc}"
+                    continue
+                yield from _evaluate_loaded(backtester, loaded)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _shards(tickers: List[str], size: int) -> List[List[str]]:
+    # Fixed-size shards keep the work in flight at the deadline independent of the universe size.
+    size = max(size, 1)
+    return [tickers[offset : offset + size] for offset in range(0, len(tickers), size)]
+
+
+def backtest_universe(
+    config: AppConfig,
+    tickers: List[str],
+    backtester: Optional[Backtester] = None,
+    deadline: Optional[Deadline] = None,
+) -> Iterator[SymbolOutcome]:
+    """Yield ``(symbol, results, error)`` for every ticker in input order.
+
+    By default fetching overlaps prediction through :func:`_pipeline`. With
+    ``config.run.workers > 1`` the universe is instead split into shards of
+    ``config.run.pipeline_batch_size`` tickers across a process or thread
+    pool; outcomes are still yielded in the original ticker order. Workers
+    start no ticker once ``deadline`` has expired, and the iteration then
+    ends early. ``backtester`` runs the in-process pipeline; with workers its
+    predictor is charged the budget each one spent before that ticker is
+    yielded, so its state stays valid for checkpoints.
+    """
+    workers = config.run.workers
+    if workers <= 1 or len(tickers) <= 1:
+        yield from _pipeline(config, tickers, backtester)
+        return
+    executor_cls = ThreadPoolExecutor if config.run.executor == "thread" else ProcessPoolExecutor
+    # Deadlines are monotonic per process, so workers get the wall-clock equivalent.
+    stop_at = time.time() + deadline.remaining() if deadline is not None else None
+    predictor = backtester.predictor if backtester is not None else None
+    predictor_state = predictor.state() if predictor is not None else None
+    with executor_cls(max_workers=workers) as pool:
+        shards = _shards(tickers, config.run.pipeline_batch_size)
+        futures = [pool.submit(_backtest_shard, config, shard, stop_at, predictor_state) for shard in shards]
+        try:
+            for shard, future in zip(shards, futures):
+                try:
+                    outcomes = future.result()
+                except Exception as exc:  # worker crashed; keep the rest of the run going
+                    outcomes = [((symbol, [], f"{type(exc).__name__}: {exc}"), {}) for symbol in shard]
+                for outcome, usage in outcomes:
+                    if predictor is not None:
+                        predictor.absorb(usage)
+                    yield outcome
+                if len(outcomes) < len(shard):
+                    return  # the shard stopped at the deadline
+        finally:
+            # A consumer that stops early (e.g. at its deadline) should not wait for queued shards.
+            for future in futures:
+                future.cancel()
+
+
+def run_once(
+    config: AppConfig,
+    tickers: Iterable[str],
+    checkpoint: Optional[Checkpoint] = None,
+    cycle: int = 1,
+    resume: Optional[CheckpointState] = None,
+    deadline: Optional[Deadline] = None,
+) -> List[RunLogEntry]:
+    """Backtest ``tickers`` once, journaling each finished ticker to ``checkpoint`` if given.
+
+    With ``resume`` (a state loaded from the same checkpoint) the tickers it
+    already finished are not re-run: their results are replayed into the
+    results file and the predictor picks up the budget they spent. Once
+    ``deadline`` expires no further ticker is started; the checkpoint is then
+    kept so the pass can be resumed.
+    """
+    tickers = list(tickers)
+    if config.run.timings:
+        profiling.enable()
+    backtester = Backtester(config)
+    store = RunStore(config.run.store_path)
+    completed = resume.completed if resume is not None else {}
+    if resume is not None:
+        backtester.predictor.restore(resume.predictor)
+    run_id = resume.run_id if resume is not None and resume.run_id is not None else store.start_run(tickers=len(tickers))
+    if checkpoint is not None:
+        if resume is not None:
+            checkpoint.reopen()
         else:
-            print("  - No earnings events found; skipped")
-    append_run_log(config.run.log_path, log_entries)
+            checkpoint.start(cycle, universe_digest(config, tickers), backtester.predictor.state(), run_id)
+    pending = [symbol for symbol in tickers if symbol not in completed]
+    if completed:
+        print(f"[backtest] Resuming cycle {cycle}: {len(completed)} tickers done, {len(pending)} remaining")
+    log_entries: List[RunLogEntry] = []
+    try:
+        with open_result_writer(config.run.results_path, config.data.horizons) as result_writer:
+            for symbol in tickers:
+                if symbol in completed:
+                    results, entry = completed[symbol]
+                    log_entries.append(entry)
+                    result_writer.write(results)
+            outcomes = backtest_universe(config, pending, backtester, deadline)
+            done = 0
+            try:
+                for done, (symbol, results, error) in enumerate(outcomes, start=1):
+                    with span("runner.report", symbol):
+                        entry = _report_symbol(config, backtester, symbol, results, error)
+                        log_entries.append(entry)
+                        # Stream each ticker out as soon as it finishes rather than at the end of the pass.
+                        store.record(run_id, [entry], results)
+                        append_run_log(config.run.log_path, [entry])
+                        result_writer.write(results)
+                        if checkpoint is not None:
+                            checkpoint.record(symbol, results, entry, backtester.predictor.state())
+                    profiling.finish_ticker(symbol)
+                    # Checked per ticker, so the overrun is bounded by one ticker plus in-flight fetches.
+                    if deadline is not None and done < len(pending) and deadline.expired():
+                        break
+            finally:
+                outcomes.close()
+            finished = done == len(pending)
+    finally:
+        store.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    if profiling.enabled():
+        profiling.write_report(profiling.timings_path(config.run.log_path))
+    network = transport_for(config.data).summary()
+    if network:
+        print(f"[backtest] Network: {network}")
+    if finished:
+        summary = f"Completed run for {len(log_entries)} tickers"
+    else:
+        summary = f"Stopped at deadline after {len(log_entries)} of {len(tickers)} tickers"
+        print(f"[backtest] {summary}; rerun with --resume to finish the pass.")
     append_notes(
         config.run.notes_path,
-        [f"Completed run for {len(log_entries)} tickers; average accuracy: {average_accuracy(log_entries):.2%}"],
+        [f"{summary}; average accuracy: {average_accuracy(log_entries):.2%}"],
     )
+    rotate_notes(config.run.notes_path, config.run.notes_max_bytes, config.run.notes_keep)
+    if checkpoint is not None and finished:
+        checkpoint.clear()
     return log_entries
 
 
+def _report_symbol(
+    config: AppConfig, backtester: Backtester, symbol: str, results: List[BacktestResult], error: Optional[str]
+) -> RunLogEntry:
+    if error is not None:
+        print(f"[backtest] {symbol}: failed ({error})")
+        return RunLogEntry(timestamp=dt.datetime.utcnow(), ticker=symbol, accuracy=0.0, notes=f"Failed: {error}")
+    summary = backtester.summarize(results)
+    notes = f"Predictions={summary['total_predictions']} accuracy={summary['accuracy']:.2%}"
+    horizon_report = "".join(f"; {h}d {summary[f'accuracy_{h}d']:.1%}" for h in config.data.horizons)
+    print(
+        f"[backtest] {symbol}: {summary['correct']}/{summary['total_predictions']} correct; accuracy "
+        f"{summary['accuracy']:.1%}{horizon_report}"
+    )
+    if results:
+        for res in results:
+            print(
+                f"  - {res.earnings_date.date()} pre={res.pre_close} post={res.post_close} "
+                f"actual={res.actual_direction} predicted={res.predicted_direction} ({res.confidence:.0%})"
+            )
+    else:
+        print("  - No earnings events found; skipped")
+    return RunLogEntry(timestamp=dt.datetime.utcnow(), ticker=symbol, accuracy=summary["accuracy"], notes=notes)
+
+
 def average_accuracy(entries: List[RunLogEntry]) -> float:
     if not entries:
         return 0.0
     return sum(e.accuracy for e in entries) / len(entries)
 
 
-def iterative_cycle(config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] | None = None) -> None:
+def _load_checkpoint(config: AppConfig, universe: List[str], resume: bool) -> Tuple[Checkpoint, Optional[CheckpointState]]:
+    checkpoint = Checkpoint(checkpoint_path(config))
+    state = checkpoint.load(universe_digest(config, universe)) if resume else None
+    if resume and state is None:
+        print("[backtest] No matching checkpoint; starting from the beginning.")
+    return checkpoint, state
+
+
+def iterative_cycle(
+    config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] | None = None, resume: bool = False
+) -> None:
     config.ensure_paths()
-    start = time.monotonic()
-    universe = list(tickers) if tickers is not None else build_universe(config.data, config.run.cache_dir)
+    deadline = Deadline(config.run.duration)
+    # Before the universe is built, so screening is timed too.
+    if config.run.timings:
+        profiling.enable()
+    with span("runner.universe"):
+        universe = list(tickers) if tickers is not None else build_universe(config.data, config.run.cache_dir)
     if config.data.max_tickers and tickers is None:
         universe = universe[: config.data.max_tickers]
     if not universe:
@@ -59,16 +293,29 @@ def iterative_cycle(config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] |
             ["No tickers available for backtest; verify network access and market cap filters."],
         )
         return
-    while time.monotonic() - start < config.run.duration.total_seconds():
-        run_once(config, universe)
+    checkpoint, state = _load_checkpoint(config, universe, resume)
+    cycle = state.cycle if state is not None else 1
+    while not deadline.expired():
+        with span("runner.schedule"):
+            with RunStore(config.run.store_path) as store:
+                history = store.history()
+            ordered = prioritize(universe, history, config.run.stale_after)
+        run_once(config, ordered, checkpoint=checkpoint, cycle=cycle, resume=state, deadline=deadline)
+        state = None
+        cycle += 1
         if not config.run.iterative:
             break
 
 
-def backtest_once(config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] | None = None) -> List[RunLogEntry]:
+def backtest_once(
+    config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] | None = None, resume: bool = False
+) -> List[RunLogEntry]:
     config.ensure_paths()
+    if config.run.timings:
+        profiling.enable()
     if tickers is None:
-        tickers = build_universe(config.data, config.run.cache_dir)
+        with span("runner.universe"):
+            tickers = build_universe(config.data, config.run.cache_dir)
     tickers_list = list(tickers)
     if not tickers_list:
         append_notes(
@@ -77,8 +324,9 @@ def backtest_once(config: AppConfig = DEFAULT_CONFIG, tickers: Iterable[str] | N
         )
         print("[backtest] No tickers available to process. Adjust filters or use --tickers.")
         return []
+    checkpoint, state = _load_checkpoint(config, tickers_list, resume)
     print(f"[backtest] Running single pass for {len(tickers_list)} tickers...")
-    return run_once(config, tickers_list)
+    return run_once(config, tickers_list, checkpoint=checkpoint, resume=state)
 
 
 def save_custom_notes(path: Path, lines: Iterable[str]) -> None:
@@ -0,0 +1,336 @@
+"""Indexed SQLite store for run-log entries and backtest results."""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .backtest import BacktestResult, RunLogEntry, append_run_log
+from .metrics import FoldMetrics
+from .scheduler import TickerHistory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    tickers INTEGER NOT NULL DEFAULT 0,
+    kind TEXT NOT NULL DEFAULT 'backtest'
+);
+CREATE TABLE IF NOT EXISTS run_log (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    ticker TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    accuracy REAL NOT NULL,
+    scored INTEGER NOT NULL,
+    notes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_log_by_run ON run_log (run_id, scored, ticker, accuracy);
+CREATE INDEX IF NOT EXISTS run_log_by_ticker ON run_log (ticker, run_id, scored, accuracy, timestamp);
+-- Per-ticker totals over backtest runs, kept up to date on insert for the scheduler.
+CREATE TABLE IF NOT EXISTS ticker_history (
+    ticker TEXT PRIMARY KEY,
+    last_run TEXT NOT NULL,
+    accuracy_sum REAL NOT NULL,
+    scored_runs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    ticker TEXT NOT NULL,
+    earnings_date TEXT NOT NULL,
+    pre_close REAL,
+    post_close REAL,
+    actual_direction TEXT NOT NULL,
+    predicted_direction TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    correct INTEGER NOT NULL,
+    rationale TEXT NOT NULL,
+    horizon_returns TEXT NOT NULL,
+    eps_surprise REAL
+);
+CREATE INDEX IF NOT EXISTS results_by_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_by_ticker ON results (ticker, earnings_date);
+CREATE TABLE IF NOT EXISTS folds (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    fold INTEGER NOT NULL,
+    train_start TEXT NOT NULL,
+    test_start TEXT NOT NULL,
+    test_end TEXT NOT NULL,
+    train_events INTEGER NOT NULL,
+    train_accuracy REAL NOT NULL,
+    test_events INTEGER NOT NULL,
+    test_accuracy REAL NOT NULL,
+    test_mean_confidence REAL NOT NULL,
+    test_brier REAL NOT NULL,
+    calibrated_brier REAL NOT NULL,
+    PRIMARY KEY (run_id, fold)
+);
+"""
+
+
+def scored(notes: str) -> bool:
+    """Whether a run-log entry's accuracy reflects predictions (failures and empty tickers log 0.0)."""
+    return notes.startswith("Predictions=") and not notes.startswith("Predictions=0 ")
+
+
+class RunStore:
+    """Run-log entries and ``BacktestResult`` rows keyed by run, queryable by ticker.
+
+    Each ticker's entry and results are written in one transaction; WAL mode
+    keeps those commits cheap while readers query concurrently.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        had_history = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticker_history'"
+        ).fetchone()
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+        if "eps_surprise" not in columns:  # stores created before surprises were recorded
+            self._db.execute("ALTER TABLE results ADD COLUMN eps_surprise REAL")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(runs)")}
+        if "kind" not in columns:  # stores created before runs had a kind; only walk-forward runs have folds
+            self._db.execute("ALTER TABLE runs ADD COLUMN kind TEXT NOT NULL DEFAULT 'backtest'")
+            self._db.execute("UPDATE runs SET kind = 'walk-forward' WHERE id IN (SELECT run_id FROM folds)")
+        if not had_history:  # stores created before the per-ticker totals were kept
+            self._db.execute(
+                "INSERT INTO ticker_history SELECT ticker, MAX(timestamp), SUM(CASE WHEN scored THEN accuracy ELSE 0 END),"
+                " SUM(scored) FROM run_log JOIN runs ON runs.id = run_log.run_id WHERE runs.kind = 'backtest' GROUP BY ticker"
+            )
+        self._db.commit()
+
+    def __enter__(self) -> "RunStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def start_run(self, started_at: Optional[dt.datetime] = None, tickers: int = 0, kind: str = "backtest") -> int:
+        """A new run; ``kind`` keeps walk-forward evaluations out of the backtest run history."""
+        with self._db:
+            return self._start_run(started_at or dt.datetime.utcnow(), tickers, kind)
+
+    def record(self, run_id: int, entries: Iterable[RunLogEntry], results: Iterable[BacktestResult] = ()) -> None:
+        """Insert run-log ``entries`` and their ``results`` in a single transaction."""
+        with self._db:
+            self._insert(run_id, entries, results)
+
+    def _start_run(self, started_at: dt.datetime, tickers: int, kind: str = "backtest") -> int:
+        cursor = self._db.execute(
+            "INSERT INTO runs (started_at, tickers, kind) VALUES (?, ?, ?)", (started_at.isoformat(), tickers, kind)
+        )
+        return int(cursor.lastrowid)
+
+    def _insert(self, run_id: int, entries: Iterable[RunLogEntry], results: Iterable[BacktestResult]) -> None:
+        rows = [(run_id, e.ticker, e.timestamp.isoformat(), e.accuracy, int(scored(e.notes)), e.notes) for e in entries]
+        self._db.executemany(
+            "INSERT INTO run_log (run_id, ticker, timestamp, accuracy, scored, notes) VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        kind = self._db.execute("SELECT kind FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if rows and kind is not None and kind[0] == "backtest":
+            self._db.executemany(
+                "INSERT INTO ticker_history VALUES (?, ?, ?, ?) ON CONFLICT (ticker) DO UPDATE SET"
+                " last_run = MAX(last_run, excluded.last_run), accuracy_sum = accuracy_sum + excluded.accuracy_sum,"
+                " scored_runs = scored_runs + excluded.scored_runs",
+                [(ticker, when, accuracy if was_scored else 0.0, was_scored) for _, ticker, when, accuracy, was_scored, _ in rows],
+            )
+        self._db.executemany(
+            "INSERT INTO results (run_id, ticker, earnings_date, pre_close, post_close, actual_direction,"
+            " predicted_direction, confidence, correct, rationale, horizon_returns, eps_surprise)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run_id,
+                    r.ticker,
+                    r.earnings_date.isoformat(),
+                    r.pre_close,
+                    r.post_close,
+                    r.actual_direction,
+                    r.predicted_direction,
+                    r.confidence,
+                    int(r.correct),
+                    r.rationale,
+                    json.dumps({str(h): value for h, value in r.horizon_returns.items()}),
+                    r.eps_surprise,
+                )
+                for r in results
+            ],
+        )
+
+    def run_ids(self, last: Optional[int] = None, kind: str = "backtest") -> List[int]:
+        """Runs of ``kind``, newest first."""
+        query = "SELECT id FROM runs WHERE kind = ? ORDER BY id DESC"
+        params: Tuple = (kind,)
+        if last is not None:
+            query += " LIMIT ?"
+            params = (kind, last)
+        return [row[0] for row in self._db.execute(query, params)]
+
+    def ticker_accuracy(self, last_runs: int, tickers: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Mean scored accuracy per ticker across the ``last_runs`` most recent backtest runs.
+
+        Reads only the index entries of those runs (or, with ``tickers``, only
+        those tickers' index entries) rather than the whole log.
+        """
+        recent = self.run_ids(last_runs)
+        if not recent:
+            return {}
+        runs = ", ".join("?" for _ in recent)
+        if tickers is None:
+            query = f"SELECT ticker, AVG(accuracy) FROM run_log INDEXED BY run_log_by_run WHERE run_id IN ({runs}) AND scored = 1"
+            params: List = list(recent)
+        else:
+            tickers = list(tickers)
+            query = (
+                "SELECT ticker, AVG(accuracy) FROM run_log INDEXED BY run_log_by_ticker"
+                f" WHERE ticker IN ({', '.join('?' for _ in tickers)}) AND run_id IN ({runs}) AND scored = 1"
+            )
+            params = [*tickers, *recent]
+        query += " GROUP BY ticker"
+        return {ticker: accuracy for ticker, accuracy in self._db.execute(query, params)}
+
+    def ticker_trend(self, ticker: str, last_runs: int) -> List[Tuple[int, dt.datetime, float]]:
+        """``(run_id, timestamp, accuracy)`` for the ticker's ``last_runs`` scored backtest runs, newest first."""
+        rows = self._db.execute(
+            "SELECT run_id, timestamp, accuracy FROM run_log WHERE ticker = ? AND scored = 1"
+            " AND run_id IN (SELECT id FROM runs WHERE kind = 'backtest') ORDER BY run_id DESC LIMIT ?",
+            (ticker, last_runs),
+        )
+        return [(run_id, dt.datetime.fromisoformat(when), accuracy) for run_id, when, accuracy in rows]
+
+    def history(self) -> Dict[str, TickerHistory]:
+        """Latest run time and scored accuracy totals per ticker over backtest runs, for the scheduler."""
+        rows = self._db.execute("SELECT ticker, last_run, accuracy_sum, scored_runs FROM ticker_history")
+        return {
+            ticker: TickerHistory(dt.datetime.fromisoformat(last_run), accuracy_sum, scored_runs)
+            for ticker, last_run, accuracy_sum, scored_runs in rows
+        }
+
+    def entries(self, run_id: Optional[int] = None) -> List[RunLogEntry]:
+        query = "SELECT timestamp, ticker, accuracy, notes FROM run_log"
+        params: Tuple = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            params = (run_id,)
+        query += " ORDER BY run_id, rowid"
+        return [
+            RunLogEntry(timestamp=dt.datetime.fromisoformat(when), ticker=ticker, accuracy=accuracy, notes=notes)
+            for when, ticker, accuracy, notes in self._db.execute(query, params)
+        ]
+
+    def results(self, run_id: int) -> Iterator[BacktestResult]:
+        """Stream the stored results of ``run_id`` in insertion order."""
+        rows = self._db.execute(
+            "SELECT ticker, earnings_date, pre_close, post_close, predicted_direction, confidence, rationale,"
+            " horizon_returns, eps_surprise FROM results WHERE run_id = ? ORDER BY rowid",
+            (run_id,),
+        )
+        for ticker, when, pre, post, predicted, confidence, rationale, horizons, surprise in rows:
+            yield BacktestResult(
+                ticker=ticker,
+                earnings_date=dt.datetime.fromisoformat(when),
+                pre_close=pre,
+                post_close=post,
+                direction="unknown",
+                predicted_direction=predicted,
+                confidence=confidence,
+                rationale=rationale,
+                horizon_returns={int(h): value for h, value in json.loads(horizons).items()},
+                eps_surprise=surprise,
+            )
+
+    def record_folds(self, run_id: int, folds: Iterable[FoldMetrics]) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO folds (run_id, fold, train_start, test_start, test_end, train_events,"
+                " train_accuracy, test_events, test_accuracy, test_mean_confidence, test_brier, calibrated_brier)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        f.fold,
+                        f.train_start.isoformat(),
+                        f.test_start.isoformat(),
+                        f.test_end.isoformat(),
+                        f.train_events,
+                        f.train_accuracy,
+                        f.test_events,
+                        f.test_accuracy,
+                        f.test_mean_confidence,
+                        f.test_brier,
+                        f.calibrated_brier,
+                    )
+                    for f in folds
+                ],
+            )
+
+    def folds(self, run_id: Optional[int] = None) -> List[FoldMetrics]:
+        """Walk-forward folds of ``run_id``, or of the latest run that has any."""
+        if run_id is None:
+            row = self._db.execute("SELECT MAX(run_id) FROM folds").fetchone()
+            if row is None or row[0] is None:
+                return []
+            run_id = row[0]
+        rows = self._db.execute(
+            "SELECT fold, train_start, test_start, test_end, train_events, train_accuracy, test_events,"
+            " test_accuracy, test_mean_confidence, test_brier, calibrated_brier FROM folds WHERE run_id = ? ORDER BY fold",
+            (run_id,),
+        )
+        return [
+            FoldMetrics(
+                fold,
+                dt.datetime.fromisoformat(train_start),
+                dt.datetime.fromisoformat(test_start),
+                dt.datetime.fromisoformat(test_end),
+                *metrics,
+            )
+            for fold, train_start, test_start, test_end, *metrics in rows
+        ]
+
+    def export_csv(self, path: Path) -> int:
+        """Write every entry in the legacy ``run_log.csv`` format."""
+        if path.exists():
+            path.unlink()
+        entries = self.entries()
+        append_run_log(path, entries)
+        return len(entries)
+
+    def import_csv(self, path: Path) -> int:
+        """Load a legacy ``run_log.csv``; returns the number of runs created.
+
+        The CSV has no run column, so a new run starts whenever a ticker
+        repeats within the current one.
+        """
+        runs: List[List[RunLogEntry]] = []
+        seen: set = set()
+        with path.open("r", newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                try:
+                    entry = RunLogEntry(
+                        timestamp=dt.datetime.fromisoformat(row["timestamp"]),
+                        ticker=row["ticker"],
+                        accuracy=float(row["accuracy"]),
+                        notes=row.get("notes") or "",
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if not runs or entry.ticker in seen:
+                    runs.append([])
+                    seen = set()
+                runs[-1].append(entry)
+                seen.add(entry.ticker)
+        with self._db:
+            for entries in runs:
+                self._insert(self._start_run(entries[0].timestamp, len(entries)), entries, ())
+        return len(runs)
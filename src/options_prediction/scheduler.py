@@ -0,0 +1,62 @@
+"""Deadline tracking and run-log driven ticker ordering for time-boxed runs."""
+
+from __future__ import annotations
+
+import datetime as dt
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class Deadline:
+    """A monotonic point in time after which no new ticker should be started."""
+
+    def __init__(self, budget: dt.timedelta, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + budget.total_seconds()
+
+    def remaining(self) -> float:
+        return max(self.expires_at - self._clock(), 0.0)
+
+    def expired(self) -> bool:
+        return self._clock() >= self.expires_at
+
+
+@dataclass
+class TickerHistory:
+    last_run: dt.datetime
+    accuracy_sum: float = 0.0
+    scored_runs: int = 0
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        return self.accuracy_sum / self.scored_runs if self.scored_runs else None
+
+
+def prioritize(
+    tickers: Iterable[str],
+    history: Dict[str, TickerHistory],
+    stale_after: dt.timedelta,
+    now: Optional[dt.datetime] = None,
+) -> List[str]:
+    """Order ``tickers`` so a run cut short by its deadline has spent time where it matters most.
+
+    ``history`` comes from :meth:`RunStore.history`. Never-seen tickers come
+    first (in their original order), then tickers whose last run is older than
+    ``stale_after``, then the rest; within each group the lowest historical
+    accuracy and then the oldest run go first.
+    """
+    now = now or dt.datetime.utcnow()
+    tickers = list(tickers)
+    unseen = [ticker for ticker in tickers if ticker not in history]
+
+    def rank(ticker: str) -> tuple:
+        entry = history[ticker]
+        accuracy = entry.accuracy
+        return (
+            now - entry.last_run <= stale_after,
+            accuracy if accuracy is not None else 1.0,
+            entry.last_run,
+        )
+
+    return unseen + sorted((ticker for ticker in tickers if ticker in history), key=rank)
@@ -0,0 +1,103 @@
+"""Concurrent market-cap screening backed by a dated snapshot cache."""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import atomic_open
+from .throttle import TokenBucket
+
+MarketCapLookup = Callable[[str], Optional[float]]
+
+
+def load_market_caps(path: Path) -> Dict[str, Tuple[Optional[float], dt.datetime]]:
+    """Read a snapshot file into ``{symbol: (market_cap, fetched_at)}``."""
+    if not path.exists():
+        return {}
+    snapshot: Dict[str, Tuple[Optional[float], dt.datetime]] = {}
+    with path.open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                fetched_at = dt.datetime.fromisoformat(row["FetchedAt"])
+                market_cap = float(row["MarketCap"]) if row.get("MarketCap") else None
+            except (KeyError, ValueError):
+                continue
+            snapshot[(row.get("Symbol") or "").upper()] = (market_cap, fetched_at)
+    return snapshot
+
+
+def save_market_caps(path: Path, snapshot: Dict[str, Tuple[Optional[float], dt.datetime]]) -> None:
+    with atomic_open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Symbol", "MarketCap", "FetchedAt"])
+        for symbol in sorted(snapshot):
+            market_cap, fetched_at = snapshot[symbol]
+            writer.writerow([symbol, "" if market_cap is None else market_cap, fetched_at.isoformat()])
+
+
+class MarketCapScreener:
+    """Look up market caps on a thread pool, throttled by a shared token bucket.
+
+    Snapshots younger than ``ttl`` are served from ``snapshot_path`` without a
+    network call. Symbols with no market cap are cached too so delisted or
+    unsupported tickers are not retried on every run; failed lookups are not.
+    """
+
+    def __init__(
+        self,
+        lookup: MarketCapLookup,
+        snapshot_path: Optional[Path] = None,
+        workers: int = 8,
+        requests_per_second: float = 10.0,
+        ttl: dt.timedelta = dt.timedelta(days=1),
+    ):
+        self.lookup = lookup
+        self.snapshot_path = snapshot_path
+        self.workers = max(workers, 1)
+        self.bucket = TokenBucket(requests_per_second)
+        self.ttl = ttl
+
+    def _throttled_lookup(self, symbol: str) -> Tuple[bool, Optional[float]]:
+        self.bucket.acquire()
+        try:
+            return True, self.lookup(symbol)
+        except Exception:
+            return False, None
+
+    def _snapshot(self, symbols: List[str]) -> Dict[str, Tuple[Optional[float], dt.datetime]]:
+        snapshot = load_market_caps(self.snapshot_path) if self.snapshot_path else {}
+        now = dt.datetime.utcnow()
+        stale = [s for s in symbols if s not in snapshot or now - snapshot[s][1] > self.ttl]
+        if stale:
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    for symbol, (ok, market_cap) in zip(stale, pool.map(self._throttled_lookup, stale)):
+                        if ok:
+                            snapshot[symbol] = (market_cap, now)
+            finally:
+                if self.snapshot_path:
+                    save_market_caps(self.snapshot_path, snapshot)
+        return snapshot
+
+    def market_caps(self, tickers: Iterable[str]) -> Dict[str, Optional[float]]:
+        symbols = list(dict.fromkeys(tickers))
+        snapshot = self._snapshot(symbols)
+        return {symbol: snapshot[symbol][0] if symbol in snapshot else None for symbol in symbols}
+
+    def verdicts(self, tickers: Iterable[str], threshold: float) -> Dict[str, bool]:
+        """Whether each symbol's market cap is at least ``threshold``; symbols whose lookup failed are left out."""
+        symbols = list(dict.fromkeys(tickers))
+        snapshot = self._snapshot(symbols)
+        return {
+            symbol: snapshot[symbol][0] is not None and snapshot[symbol][0] >= threshold
+            for symbol in symbols
+            if symbol in snapshot
+        }
+
+    def screen(self, tickers: Iterable[str], threshold: float) -> List[str]:
+        """Symbols whose market cap is at least ``threshold``, in input order."""
+        return [symbol for symbol, passed in self.verdicts(tickers, threshold).items() if passed]
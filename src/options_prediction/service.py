@@ -0,0 +1,270 @@
+"""Long-running backtest/prediction service that keeps data and the predictor warm."""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import socket
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .backtest import Backtester, SymbolData, result_to_dict
+from .config import AppConfig
+from .data import build_universe
+from .llm import BudgetExhaustedError, Prediction
+from .price_index import PriceIndex
+from .profiling import span
+
+
+class WarmState:
+    """Universe, per-symbol events and price indexes, and one ``Predictor``, shared by request threads.
+
+    ``refresh`` reloads everything through the on-disk caches (so only new
+    bars and expired events are downloaded) and swaps the new data in under a
+    lock; requests keep using the previous snapshot until then. Tickers
+    requested from outside the universe are kept in an LRU of at most
+    ``max_extra`` symbols, emptied on every refresh so they never go stale.
+    """
+
+    def __init__(self, config: AppConfig, tickers: Optional[Sequence[str]] = None, max_extra: int = 256):
+        self.config = config
+        self.pinned = list(tickers) if tickers else None
+        self.backtester = Backtester(config)
+        self.universe: List[str] = []
+        self.refreshed_at: Optional[dt.datetime] = None
+        self.max_extra = max_extra
+        self._symbols: Dict[str, SymbolData] = {}
+        self._extra: "OrderedDict[str, SymbolData]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _load(self, symbols: Sequence[str]) -> Dict[str, SymbolData]:
+        size = max(self.config.run.pipeline_batch_size, 1)
+        batches = [list(symbols[offset : offset + size]) for offset in range(0, len(symbols), size)]
+        loaded: Dict[str, SymbolData] = {}
+        with ThreadPoolExecutor(max_workers=max(self.config.run.fetch_workers, 1)) as pool:
+            for batch in pool.map(self.backtester.load_symbols, batches):
+                for data in batch:
+                    index = data.index
+                    if index is None and data.error is None:
+                        index = PriceIndex.from_series(data.prices)
+                    # Keep only the index; the raw bar list would double the memory per symbol.
+                    loaded[data.symbol] = SymbolData(data.symbol, data.events, [], error=data.error, index=index)
+        return loaded
+
+    def refresh(self) -> int:
+        """Reload the universe and its data; returns the number of symbols now warm."""
+        with self._refresh_lock, span("service.refresh"):
+            if self.pinned is not None:
+                universe = list(self.pinned)
+            else:
+                universe = build_universe(self.config.data, self.config.run.cache_dir)
+                if self.config.data.max_tickers:
+                    universe = universe[: self.config.data.max_tickers]
+            loaded = self._load(universe)
+            self.backtester.predictor.refresh_notes()
+            with self._lock:
+                self.universe = universe
+                self._symbols = loaded
+                self._extra.clear()
+                self.refreshed_at = dt.datetime.utcnow()
+            return len(loaded)
+
+    def symbol(self, ticker: str) -> SymbolData:
+        with self._lock:
+            data = self._symbols.get(ticker)
+            if data is None:
+                data = self._extra.get(ticker)
+                if data is not None:
+                    self._extra.move_to_end(ticker)
+        if data is None:
+            data = self._load([ticker])[ticker]
+            with self._lock:
+                self._extra[ticker] = data
+                while len(self._extra) > max(self.max_extra, 0):
+                    self._extra.popitem(last=False)
+        return data
+
+    def backtest(self, tickers: Optional[Sequence[str]] = None) -> List[dict]:
+        with self._lock:
+            tickers = list(tickers) if tickers else list(self.universe)
+        report: List[dict] = []
+        for ticker in tickers:
+            data = self.symbol(ticker)
+            if data.error is not None:
+                report.append({"ticker": ticker, "error": data.error})
+                continue
+            results = self.backtester.evaluate(data)
+            report.append(
+                {
+                    "ticker": ticker,
+                    "summary": self.backtester.summarize(results),
+                    "results": [result_to_dict(result) for result in results],
+                }
+            )
+        return report
+
+    def predict(self, ticker: str, eps_surprise: Optional[float]) -> Prediction:
+        return self.backtester.predictor.predict(ticker, eps_surprise)
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                "status": "ok",
+                "symbols": len(self._symbols),
+                "extra_symbols": len(self._extra),
+                "universe": len(self.universe),
+                "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+                "remaining_budget": self.backtester.predictor.remaining_budget(),
+            }
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    server: "BacktestServer"
+
+    def _reply(self, status: int, payload: object) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, routes: Dict[str, Callable[[dict], object]]) -> None:
+        handler = routes.get(self.path.split("?", 1)[0])
+        if handler is None:
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON body"})
+            return
+        if not isinstance(request, dict):
+            self._reply(400, {"error": "JSON body must be an object"})
+            return
+        try:
+            self._reply(200, handler(request))
+        except BudgetExhaustedError as exc:
+            self._reply(429, {"error": str(exc)})
+        except (KeyError, TypeError, ValueError) as exc:
+            self._reply(400, {"error": f"{type(exc).__name__}: {exc}"})
+        except Exception as exc:  # keep serving other requests
+            self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        state = self.server.state
+        self._dispatch({"/health": lambda _: state.health(), "/universe": lambda _: state.universe})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        state = self.server.state
+        self._dispatch(
+            {
+                "/predict": self._predict,
+                "/backtest": lambda request: state.backtest(_tickers(request)),
+                "/refresh": lambda _: {"symbols": state.refresh()},
+            }
+        )
+
+    def _predict(self, request: dict) -> dict:
+        surprise = request.get("eps_surprise")
+        prediction = self.server.state.predict(str(request["ticker"]).upper(), None if surprise is None else float(surprise))
+        return {"direction": prediction.direction, "confidence": prediction.confidence, "rationale": prediction.rationale}
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - signature from BaseHTTPRequestHandler
+        pass
+
+
+def _tickers(request: dict) -> List[str]:
+    tickers = request.get("tickers") or []
+    if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+        raise TypeError("tickers must be a list of strings")
+    return [ticker.upper() for ticker in tickers]
+
+
+class BacktestServer(ThreadingHTTPServer):
+    """JSON over HTTP: ``GET /health``, ``GET /universe``, ``POST /predict``, ``POST /backtest``, ``POST /refresh``.
+
+    With ``refresh_interval`` set, a background thread refreshes the warm
+    state on that period.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, state: WarmState, refresh_interval: Optional[dt.timedelta] = None):
+        super().__init__(address, _ServiceHandler)
+        self.state = state
+        self.refresh_interval = refresh_interval
+        self._stopped = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def start_refresher(self) -> None:
+        if not self.refresh_interval or self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="service-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped.wait(self.refresh_interval.total_seconds()):
+            try:
+                self.state.refresh()
+            except Exception as exc:  # a failed refresh keeps serving the previous snapshot
+                print(f"[serve] Refresh failed: {type(exc).__name__}: {exc}")
+
+    def server_close(self) -> None:
+        self._stopped.set()
+        super().server_close()
+
+    @property
+    def url(self) -> str:
+        if self.address_family == getattr(socket, "AF_UNIX", None):
+            return f"unix:{self.server_address}"
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class UnixBacktestServer(BacktestServer):
+    address_family = getattr(socket, "AF_UNIX", socket.AF_INET)
+
+    def server_bind(self) -> None:
+        # HTTPServer.server_bind expects a (host, port) address; a socket left by a killed server is replaced.
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name, self.server_port = str(self.server_address), 0
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve(
+    config: AppConfig,
+    tickers: Optional[Sequence[str]] = None,
+    host: str = "127.0.0.1",
+    port: int = 8766,
+    unix_socket: Optional[Path] = None,
+    refresh_interval: Optional[dt.timedelta] = None,
+    max_extra: int = 256,
+) -> None:
+    config.ensure_paths()
+    state = WarmState(config, tickers, max_extra)
+    print(f"[serve] Warmed {state.refresh()} symbols")
+    if unix_socket is not None:
+        server: BacktestServer = UnixBacktestServer(str(unix_socket), state, refresh_interval)
+    else:
+        server = BacktestServer((host, port), state, refresh_interval)
+    with server:
+        server.start_refresher()
+        print(f"[serve] Listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
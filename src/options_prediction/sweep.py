@@ -0,0 +1,255 @@
+"""Grid search over the heuristic predictor's parameters and post-earnings windows, scored from prefix sums."""
+
+from __future__ import annotations
+
+import csv
+import dataclasses
+import datetime as dt
+import itertools
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .backtest import Backtester
+from .config import AppConfig
+from .metrics import CALIBRATION_EDGES
+from .price_index import PriceIndex
+
+_UP, _DOWN, _FLAT, _UNKNOWN = 1, -1, 0, 2
+
+
+class HeuristicParams(NamedTuple):
+    surprise_threshold: float = 0.0
+    confidence_base: float = 0.5
+    confidence_slope: float = 1.0
+    confidence_cap: float = 0.95
+    flat_confidence: float = 0.4
+
+
+class SweepRow(NamedTuple):
+    window_days: int
+    horizon: int  # 0 means the first close inside the post-event window
+    params: HeuristicParams
+    events: int
+    accuracy: float
+    mean_confidence: float
+    brier: float
+    calibration_error: float
+
+
+def _outcome(before: Optional[float], after: Optional[float]) -> int:
+    if before is None or after is None:
+        return _UNKNOWN
+    return _UP if after > before else _DOWN if after < before else _FLAT
+
+
+class _Column:
+    """Events of one (window, horizon) sorted by ``|surprise|`` with prefix sums.
+
+    ``hits`` counts events whose actual move matches the sign of their
+    surprise, i.e. the ones a directional call gets right; ``flats`` counts
+    events that did not move.
+    """
+
+    def __init__(self, surprises: Sequence[float], outcomes: Sequence[int]):
+        ordered = sorted(zip((abs(s) for s in surprises), surprises, outcomes))
+        self.size = len(ordered)
+        self.magnitude = array("d", (a for a, _, _ in ordered))
+        hits = [1.0 if (s > 0 and o == _UP) or (s < 0 and o == _DOWN) else 0.0 for _, s, o in ordered]
+        self.a = self._prefix(self.magnitude)
+        self.a2 = self._prefix(a * a for a in self.magnitude)
+        self.hits = self._prefix(hits)
+        self.hits_a = self._prefix(h * a for h, a in zip(hits, self.magnitude))
+        self.flats = self._prefix(1.0 if o == _FLAT else 0.0 for _, _, o in ordered)
+
+    @staticmethod
+    def _prefix(values: Iterable[float]) -> array:
+        return array("d", itertools.accumulate(values, initial=0.0))
+
+    def above(self, value: float) -> int:
+        return bisect_right(self.magnitude, value)
+
+    def at_least(self, value: float) -> int:
+        return bisect_left(self.magnitude, value)
+
+    def split(self, params: HeuristicParams) -> Tuple[int, int]:
+        """Indices where directional calls start and where their confidence reaches the cap."""
+        base, slope, cap = params.confidence_base, params.confidence_slope, params.confidence_cap
+        start = self.above(params.surprise_threshold)
+        if base >= cap:
+            return start, start
+        if slope <= 0:
+            return start, self.size
+        return start, max(self.at_least((cap - base) / slope), start)
+
+
+@dataclasses.dataclass
+class SweepDataset:
+    columns: Dict[Tuple[int, int], _Column]
+
+    @classmethod
+    def load(cls, config: AppConfig, symbols: Sequence[str], windows: Sequence[int], horizons: Sequence[int]) -> "SweepDataset":
+        """Fetch events and closes for ``symbols`` once and resolve every window and horizon."""
+        horizons = tuple(sorted(set(horizons)))
+        backtester = Backtester(config)
+        surprises: Dict[Tuple[int, int], List[float]] = {}
+        outcomes: Dict[Tuple[int, int], List[int]] = {}
+        for key in itertools.product(windows, (0,) + horizons):
+            surprises[key], outcomes[key] = [], []
+        for data in backtester.load_symbols(symbols):
+            if data.error is not None or not data.events:
+                continue
+            index = data.index if data.index is not None else PriceIndex.from_series(data.prices)
+            dates = [event["earnings_date"] for event in data.events]
+            values = [float(event.get("surprise", 0.0) or 0.0) for event in data.events]
+            for days in windows:
+                resolved = index.event_windows(dates, horizons, dt.timedelta(days=days))
+                for surprise, window in zip(values, resolved):
+                    if window is None:
+                        continue
+                    moves = [_outcome(window.pre_close, window.post_close)]
+                    moves += [_outcome(window.pre_close, close) for close in window.horizon_closes]
+                    for horizon, move in zip((0,) + horizons, moves):
+                        surprises[days, horizon].append(surprise)
+                        outcomes[days, horizon].append(move)
+        return cls({key: _Column(surprises[key], outcomes[key]) for key in surprises})
+
+    def evaluate(self, params: HeuristicParams, window_days: int, horizon: int = 0) -> SweepRow:
+        column = self.columns[window_days, horizon]
+        n = column.size
+        if not n:
+            return SweepRow(window_days, horizon, params, 0, 0.0, 0.0, 0.0, 0.0)
+        base, slope, cap = params.confidence_base, params.confidence_slope, params.confidence_cap
+        flat = params.flat_confidence
+        start, knee = column.split(params)
+
+        def span(prefix: array, lo: int, hi: int) -> float:
+            return prefix[hi] - prefix[lo]
+
+        hits = span(column.hits, start, n) + span(column.flats, 0, start)
+        linear = knee - start
+        conf = linear * base + slope * span(column.a, start, knee) + (n - knee) * cap + start * flat
+        conf_sq = (
+            linear * base * base
+            + 2 * base * slope * span(column.a, start, knee)
+            + slope * slope * span(column.a2, start, knee)
+            + (n - knee) * cap * cap
+            + start * flat * flat
+        )
+        conf_hit = (
+            base * span(column.hits, start, knee)
+            + slope * span(column.hits_a, start, knee)
+            + cap * span(column.hits, knee, n)
+            + flat * span(column.flats, 0, start)
+        )
+        buckets = self.calibration(params, window_days, horizon)
+        calibration_error = sum(abs(b_conf - b_hits) for _, _, _, b_conf, b_hits in buckets) / n
+        return SweepRow(
+            window_days,
+            horizon,
+            params,
+            n,
+            hits / n,
+            conf / n,
+            (conf_sq - 2 * conf_hit + hits) / n,
+            calibration_error,
+        )
+
+    def calibration(
+        self, params: HeuristicParams, window_days: int, horizon: int = 0, edges: Sequence[float] = CALIBRATION_EDGES
+    ) -> List[Tuple[float, float, int, float, float]]:
+        """``(low, high, events, confidence_sum, hit_sum)`` per confidence bucket."""
+        column = self.columns[window_days, horizon]
+        n = column.size
+        base, slope, cap = params.confidence_base, params.confidence_slope, params.confidence_cap
+        start, knee = column.split(params)
+        bounds = list(zip((0.0,) + tuple(edges[:-1]), edges))
+        rows: List[Tuple[float, float, int, float, float]] = []
+        for position, (low, high) in enumerate(bounds):
+            last = position == len(bounds) - 1
+
+            def holds(value: float) -> bool:
+                return low <= value and (value < high or last)
+
+            count, conf, hits = 0, 0.0, 0.0
+            if slope > 0:
+                lo = min(max(column.at_least((low - base) / slope), start), knee)
+                hi = knee if last else min(max(column.at_least((high - base) / slope), start), knee)
+                if hi > lo:
+                    count += hi - lo
+                    conf += (hi - lo) * base + slope * (column.a[hi] - column.a[lo])
+                    hits += column.hits[hi] - column.hits[lo]
+            elif knee > start and holds(base):
+                count += knee - start
+                conf += (knee - start) * base
+                hits += column.hits[knee] - column.hits[start]
+            if n > knee and holds(cap):
+                count += n - knee
+                conf += (n - knee) * cap
+                hits += column.hits[n] - column.hits[knee]
+            if start and holds(params.flat_confidence):
+                count += start
+                conf += start * params.flat_confidence
+                hits += column.flats[start]
+            rows.append((low, high, count, conf, hits))
+        return rows
+
+
+def parameter_grid(
+    thresholds: Sequence[float],
+    bases: Sequence[float],
+    slopes: Sequence[float],
+    caps: Sequence[float],
+    flat_confidences: Sequence[float],
+) -> List[HeuristicParams]:
+    return [HeuristicParams(*values) for values in itertools.product(thresholds, bases, slopes, caps, flat_confidences)]
+
+
+def sweep(dataset: SweepDataset, grid: Sequence[HeuristicParams]) -> List[SweepRow]:
+    """Score every parameter set against every loaded (window, horizon)."""
+    return [dataset.evaluate(params, days, horizon) for (days, horizon) in sorted(dataset.columns) for params in grid]
+
+
+def write_table(rows: Iterable[SweepRow], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            ["window_days", "horizon"]
+            + list(HeuristicParams._fields)
+            + ["events", "accuracy", "mean_confidence", "brier", "calibration_error"]
+        )
+        for row in rows:
+            writer.writerow(
+                [row.window_days, row.horizon]
+                + list(row.params)
+                + [row.events, round(row.accuracy, 6), round(row.mean_confidence, 6), round(row.brier, 6), round(row.calibration_error, 6)]
+            )
+
+
+def main(
+    config: AppConfig,
+    tickers: Optional[Sequence[str]],
+    windows: Sequence[int],
+    horizons: Sequence[int],
+    grid: Sequence[HeuristicParams],
+    output: Path,
+    top: int = 10,
+) -> List[SweepRow]:
+    from .data import build_universe
+
+    symbols = list(tickers) if tickers else build_universe(config.data, config.run.cache_dir)
+    if config.data.max_tickers and not tickers:
+        symbols = symbols[: config.data.max_tickers]
+    dataset = SweepDataset.load(config, symbols, windows, horizons)
+    rows = sweep(dataset, grid)
+    write_table(rows, output)
+    print(f"[sweep] {len(rows)} configurations over {len(symbols)} tickers written to {output}")
+    for row in sorted(rows, key=lambda r: (-r.accuracy, r.brier))[:top]:
+        print(
+            f"  window={row.window_days}d horizon={row.horizon} {row.params._asdict()}: "
+            f"accuracy {row.accuracy:.1%} brier {row.brier:.3f} calibration error {row.calibration_error:.3f} "
+            f"({row.events} events)"
+        )
+    return rows
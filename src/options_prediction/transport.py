@@ -0,0 +1,400 @@
+"""Shared data-access layer: pooled HTTP, bounded retries, request counters and fixture record/replay."""
+
+from __future__ import annotations
+
+import datetime as dt
+import http.client
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+from .cache import atomic_open
+from .config import DataConfig
+from .throttle import backoff_delay
+
+MODES = ("live", "record", "replay")
+_USER_AGENT = "options-prediction/0.1"
+_MISSING = object()
+
+
+class TransportError(RuntimeError):
+    """A request still failed after every retry."""
+
+
+class FixtureMissingError(TransportError):
+    """Replay found no recorded payload for a request."""
+
+
+class RetryableError(TransportError):
+    """A call failed in a way worth retrying (throttling, 5xx, connection errors, empty results)."""
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    empty: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    replayed: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        calls = self.requests + self.replayed
+        mean = self.seconds / calls if calls else 0.0
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "empty": self.empty,
+            "replayed": self.replayed,
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+_Key = Tuple[str, str, Optional[int]]
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per ``(scheme, host, port)``, at most ``size`` kept per host."""
+
+    def __init__(self, size: int = 8, timeout: float = 30.0):
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self._idle: Dict[_Key, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: _Key) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout)
+
+    def release(self, key: _Key, connection: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.size:
+                    idle.append(connection)
+                    return
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, dt.datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"cannot record {type(value).__name__}")
+
+
+def _decode(record: dict) -> Any:
+    if len(record) == 1 and "$dt" in record:
+        return dt.datetime.fromisoformat(record["$dt"])
+    return record
+
+
+def _fixture_name(key: str) -> str:
+    return quote(key, safe="") + ".json"
+
+
+def _http_session(size: int) -> Any:
+    # yfinance 0.2.5x only accepts curl_cffi sessions, which keep their connections alive;
+    # older releases take a requests session, pooled here to ``size`` connections per host.
+    try:
+        from curl_cffi import requests as curl_requests  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        pass
+    else:
+        return curl_requests.Session(impersonate="chrome")
+    try:
+        import requests  # type: ignore
+        from requests.adapters import HTTPAdapter  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Transport:
+    """Pooled, retrying access to remote data with per-endpoint counters.
+
+    ``mode`` is ``live``, ``record`` (live, saving payloads to ``fixtures``)
+    or ``replay`` (payloads only from ``fixtures``, which may be a directory
+    or the URL of a :class:`FixtureServer`).
+    """
+
+    def __init__(
+        self,
+        mode: str = "live",
+        fixtures: Optional[str] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        pool_size: int = 8,
+        timeout: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"unknown transport mode {mode!r}; expected one of {', '.join(MODES)}")
+        if mode != "live" and not fixtures:
+            raise ValueError(f"{mode} mode needs a fixtures directory or URL")
+        self.mode = mode
+        self.fixtures = fixtures
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool = ConnectionPool(pool_size, timeout)
+        self._sleep = sleep
+        self._stats: Dict[str, EndpointStats] = {}
+        self._session: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _remote_fixtures(self) -> bool:
+        return bool(self.fixtures) and self.fixtures.startswith(("http://", "https://"))
+
+    def _count(self, endpoint: str, elapsed: float = 0.0, **counters: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            for name, value in counters.items():
+                setattr(stats, name, getattr(stats, name) + value)
+            stats.seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def _wait(self, attempt: int) -> None:
+        self._sleep(backoff_delay(self.backoff, attempt))
+
+    def session(self) -> Any:
+        """A pooled HTTP session for ``yfinance``, created on first use; ``None`` leaves yfinance on its own."""
+        with self._lock:
+            if self._session is None:
+                self._session = _http_session(self.pool.size)
+            return self._session
+
+    def call(self, endpoint: str, fn: Callable[[], Any], empty: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Run ``fn`` with up to ``max_retries`` retries on exceptions or, with ``empty``, on empty results.
+
+        An empty result that survives every retry is returned as is; an
+        exception is re-raised.
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                value = fn()
+            except Exception:
+                self._count(endpoint, time.perf_counter() - started, requests=1, failures=1)
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                elapsed = time.perf_counter() - started
+                if empty is None or not empty(value):
+                    self._count(endpoint, elapsed, requests=1)
+                    return value
+                self._count(endpoint, elapsed, requests=1, empty=1)
+                if attempt >= self.max_retries:
+                    return value
+            self._count(endpoint, retries=1)
+            self._wait(attempt)
+            attempt += 1
+
+    def get(self, url: str, endpoint: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        """GET ``url`` over a pooled connection, retrying throttling (429), 5xx and connection errors."""
+        parts = urlsplit(url)
+        key: _Key = (parts.scheme or "http", parts.hostname or "", parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request_headers = {"User-Agent": _USER_AGENT, "Connection": "keep-alive", **(headers or {})}
+
+        def attempt() -> Response:
+            connection = self.pool.acquire(key)
+            try:
+                connection.request("GET", path, headers=request_headers)
+                raw = connection.getresponse()
+                body = raw.read()
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                raise RetryableError(f"{url}: {type(exc).__name__}: {exc}") from exc
+            self.pool.release(key, connection, not raw.will_close)
+            if raw.status == 429 or raw.status >= 500:
+                raise RetryableError(f"{url} returned HTTP {raw.status}")
+            return Response(raw.status, dict(raw.getheaders()), body)
+
+        try:
+            return self.call(endpoint or parts.netloc, attempt)
+        except RetryableError as exc:
+            raise TransportError(f"{exc} (after {self.max_retries} retries)") from exc
+
+    def record(self, endpoint: str, key: str, value: Any) -> None:
+        """Save ``value`` as the fixture for ``(endpoint, key)`` when recording."""
+        if not self.recording:
+            return
+        with atomic_open(Path(self.fixtures) / endpoint / _fixture_name(key), "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(value, default=_encode))
+
+    def replay(self, endpoint: str, key: str) -> Any:
+        """The recorded payload for ``(endpoint, key)``; raises :class:`FixtureMissingError` if there is none."""
+        started = time.perf_counter()
+        if self._remote_fixtures():
+            response = self.get(f"{self.fixtures.rstrip('/')}/{endpoint}/{_fixture_name(key)}", endpoint=f"fixtures.{endpoint}")
+            if response.status == 404:
+                raise FixtureMissingError(f"no {endpoint} fixture for {key}")
+            value = json.loads(response.body, object_hook=_decode)
+        else:
+            value = self.recorded(endpoint, key, _MISSING)
+            if value is _MISSING:
+                raise FixtureMissingError(f"no {endpoint} fixture for {key} in {self.fixtures}")
+        self._count(endpoint, time.perf_counter() - started, replayed=1)
+        return value
+
+    def recorded(self, endpoint: str, key: str, default: Any = None) -> Any:
+        """The payload saved in the local fixtures directory for ``(endpoint, key)``, or ``default``."""
+        path = Path(self.fixtures) / endpoint / _fixture_name(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return default
+        return json.loads(text, object_hook=_decode)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._stats.items())}
+
+    def summary(self) -> Optional[str]:
+        """One line of totals across endpoints, or ``None`` when nothing was requested."""
+        stats = self.stats()
+        requests = sum(s["requests"] for s in stats.values())
+        replayed = sum(s["replayed"] for s in stats.values())
+        if not requests and not replayed:
+            return None
+        retries = sum(s["retries"] for s in stats.values())
+        failures = sum(s["failures"] for s in stats.values())
+        empty = sum(s["empty"] for s in stats.values())
+        slowest = max((s["max_ms"] for s in stats.values()), default=0.0)
+        return (
+            f"{requests} requests ({retries} retries, {failures} failed, {empty} empty), "
+            f"{replayed} replayed; slowest {slowest:.0f} ms"
+        )
+
+    def close(self) -> None:
+        self.pool.close()
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+_transports: Dict[Tuple, Transport] = {}
+_transports_lock = threading.Lock()
+
+
+def transport_for(config: DataConfig) -> Transport:
+    """The process-wide transport for ``config``'s settings, so connections and counters are shared."""
+    key = (config.transport_mode, config.fixtures, config.http_retries, config.http_backoff, config.http_pool_size, config.http_timeout)
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = _transports[key] = Transport(
+                config.transport_mode,
+                config.fixtures,
+                max_retries=config.http_retries,
+                backoff=config.http_backoff,
+                pool_size=config.http_pool_size,
+                timeout=config.http_timeout,
+            )
+        return transport
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients exercise their pools
+    # Headers and body go out as separate writes; without this a kept-alive client waits on delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        parts = [unquote(part) for part in self.path.split("?", 1)[0].strip("/").split("/")]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._reply(503, b'{"error": "simulated throttling"}')
+            return
+        path = self.server.root.joinpath(*parts) if len(parts) == 2 and ".." not in parts else None
+        if path is None or not path.is_file():
+            self._reply(404, b'{"error": "no such fixture"}')
+            return
+        self._reply(200, path.read_bytes())
+
+    def _reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - signature from BaseHTTPRequestHandler
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serve a recorded fixtures directory as ``GET /<endpoint>/<fixture>.json``.
+
+    ``latency`` and ``failure_rate`` (HTTP 503) simulate a slow or throttling upstream.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, root: Path, address: Tuple[str, int] = ("127.0.0.1", 0), latency: float = 0.0, failure_rate: float = 0.0):
+        super().__init__(address, _FixtureHandler)
+        self.root = root
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve_fixtures(root: Path, host: str = "127.0.0.1", port: int = 8767, latency: float = 0.0, failure_rate: float = 0.0) -> None:
+    with FixtureServer(root, (host, port), latency=latency, failure_rate=failure_rate) as server:
+        print(f"[fixtures] Serving {root} at {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
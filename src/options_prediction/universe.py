@@ -0,0 +1,241 @@
+"""Exchange listing with a TTL, incremental re-screening and dated universe snapshots."""
+
+from __future__ import annotations
+
+import csv
+import dataclasses
+import datetime as dt
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from .cache import atomic_open
+
+ListingFetcher = Callable[[], List[str]]
+# Verdicts for the symbols whose screening lookup succeeded; failed ones are left out.
+Screen = Callable[[Sequence[str]], Dict[str, bool]]
+
+_STAMP_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+def read_listing(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    with path.open(newline="", encoding="utf-8") as handle:
+        return [(row.get("Symbol") or "").strip().upper() for row in csv.DictReader(handle) if (row.get("Symbol") or "").strip()]
+
+
+def write_listing(path: Path, symbols: Sequence[str]) -> None:
+    with atomic_open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Symbol"])
+        writer.writerows([symbol] for symbol in symbols)
+
+
+@dataclass
+class UniverseSnapshot:
+    """One version of the universe: the full listing and the screening verdict for every symbol screened so far."""
+
+    created_at: dt.datetime
+    threshold: float
+    listing: List[str]
+    screened: Dict[str, bool] = field(default_factory=dict)
+    # When each verdict was looked up; verdicts expire like the market-cap snapshot they came from.
+    screened_at: Dict[str, dt.datetime] = field(default_factory=dict)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def members(self, max_tickers: Optional[int] = None) -> List[str]:
+        """Listed symbols that passed the screen, in listing order, drawn from the first ``max_tickers`` listed."""
+        listing = self.listing[:max_tickers] if max_tickers else self.listing
+        return [symbol for symbol in listing if self.screened.get(symbol)]
+
+    def to_dict(self) -> dict:
+        return {
+            "created_at": self.created_at.isoformat(),
+            "threshold": self.threshold,
+            "listing": self.listing,
+            "members": sorted(symbol for symbol, passed in self.screened.items() if passed),
+            "rejected": sorted(symbol for symbol, passed in self.screened.items() if not passed),
+            "screened_at": {symbol: when.isoformat() for symbol, when in sorted(self.screened_at.items())},
+            "added": self.added,
+            "removed": self.removed,
+        }
+
+    @classmethod
+    def from_dict(cls, record: dict) -> "UniverseSnapshot":
+        screened = {symbol: True for symbol in record.get("members", [])}
+        screened.update((symbol, False) for symbol in record.get("rejected", []))
+        created_at = dt.datetime.fromisoformat(record["created_at"])
+        screened_at = {symbol: dt.datetime.fromisoformat(when) for symbol, when in record.get("screened_at", {}).items()}
+        return cls(
+            created_at=created_at,
+            threshold=float(record["threshold"]),
+            listing=list(record["listing"]),
+            screened=screened,
+            screened_at={symbol: screened_at.get(symbol, created_at) for symbol in screened},
+            added=list(record.get("added", [])),
+            removed=list(record.get("removed", [])),
+        )
+
+
+class UniverseManager:
+    """Keeps the exchange listing fresh and the screened universe versioned.
+
+    The listing in ``cache_dir/nasdaq_listings.csv`` is re-downloaded once it
+    is older than ``listing_ttl``. Each refresh screens only symbols without
+    a current verdict in the latest snapshot (newly listed ones, ones beyond
+    an earlier ``max_tickers`` cut, ones whose lookup failed, and verdicts
+    older than ``verdict_ttl``); removed symbols are dropped. A changed
+    threshold discards the old verdicts. Every change writes a new snapshot
+    under ``cache_dir/universe/`` so a run can be pinned with ``as_of``;
+    saved snapshots are never rewritten. Verdicts re-confirmed without any
+    change go to ``cache_dir/universe_confirmed.json`` instead.
+    Without a ``cache_dir`` the listing is fetched and screened on every
+    refresh and nothing is saved.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path],
+        fetch_listing: Optional[ListingFetcher] = None,
+        screen: Optional[Screen] = None,
+        threshold: float = 0.0,
+        listing_ttl: dt.timedelta = dt.timedelta(days=1),
+        verdict_ttl: dt.timedelta = dt.timedelta(days=1),
+    ):
+        self.listing_path = cache_dir / "nasdaq_listings.csv" if cache_dir is not None else None
+        self.snapshot_dir = cache_dir / "universe" if cache_dir is not None else None
+        self.confirmed_path = cache_dir / "universe_confirmed.json" if cache_dir is not None else None
+        self.fetch_listing = fetch_listing
+        self.screen = screen
+        self.threshold = threshold
+        self.listing_ttl = listing_ttl
+        self.verdict_ttl = verdict_ttl
+
+    def listing(self, now: Optional[dt.datetime] = None) -> List[str]:
+        """The cached listing, re-downloaded when it is older than the TTL."""
+        now = now or dt.datetime.utcnow()
+        fetched_at: Optional[dt.datetime] = None
+        if self.listing_path is not None:
+            try:
+                fetched_at = dt.datetime.utcfromtimestamp(self.listing_path.stat().st_mtime)
+            except FileNotFoundError:
+                pass
+        if fetched_at is not None and (self.fetch_listing is None or now - fetched_at <= self.listing_ttl):
+            return read_listing(self.listing_path)
+        if self.fetch_listing is None:
+            return []
+        symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in self.fetch_listing() if symbol and symbol.strip()))
+        if self.listing_path is not None:
+            write_listing(self.listing_path, symbols)
+        return symbols
+
+    def versions(self) -> List[dt.datetime]:
+        if self.snapshot_dir is None or not self.snapshot_dir.exists():
+            return []
+        stamps = []
+        for path in self.snapshot_dir.glob("*.json"):
+            try:
+                stamps.append(dt.datetime.strptime(path.stem, _STAMP_FORMAT))
+            except ValueError:
+                continue
+        return sorted(stamps)
+
+    def _path(self, created_at: dt.datetime) -> Path:
+        return self.snapshot_dir / f"{created_at.strftime(_STAMP_FORMAT)}.json"
+
+    def load(self, created_at: dt.datetime) -> UniverseSnapshot:
+        return UniverseSnapshot.from_dict(json.loads(self._path(created_at).read_text(encoding="utf-8")))
+
+    def latest(self) -> Optional[UniverseSnapshot]:
+        versions = self.versions()
+        return self.load(versions[-1]) if versions else None
+
+    def as_of(self, when: dt.datetime) -> UniverseSnapshot:
+        """The newest snapshot taken at or before ``when``."""
+        candidates = [stamp for stamp in self.versions() if stamp <= when]
+        if not candidates:
+            raise LookupError(f"no universe snapshot at or before {when.isoformat()}")
+        return self.load(candidates[-1])
+
+    def save(self, snapshot: UniverseSnapshot) -> Optional[Path]:
+        if self.snapshot_dir is None:
+            return None
+        path = self._path(snapshot.created_at)
+        with atomic_open(path, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(snapshot.to_dict()))
+        if self.confirmed_path is not None and self.confirmed_path.exists():
+            self.confirmed_path.unlink()  # belonged to the previous version
+        return path
+
+    def _confirmed(self, snapshot: UniverseSnapshot) -> Dict[str, dt.datetime]:
+        """Later lookup times recorded for ``snapshot``'s verdicts since it was saved."""
+        if self.confirmed_path is None or not self.confirmed_path.exists():
+            return {}
+        record = json.loads(self.confirmed_path.read_text(encoding="utf-8"))
+        if record.get("created_at") != snapshot.created_at.isoformat():
+            return {}
+        return {symbol: dt.datetime.fromisoformat(when) for symbol, when in record.get("screened_at", {}).items()}
+
+    def _save_confirmed(self, snapshot: UniverseSnapshot, screened_at: Dict[str, dt.datetime]) -> None:
+        if self.confirmed_path is None:
+            return
+        record = {
+            "created_at": snapshot.created_at.isoformat(),
+            "screened_at": {symbol: when.isoformat() for symbol, when in sorted(screened_at.items())},
+        }
+        with atomic_open(self.confirmed_path, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(record))
+
+    def refresh(self, max_tickers: Optional[int] = None, now: Optional[dt.datetime] = None) -> UniverseSnapshot:
+        """Bring the latest snapshot up to date with the listing, screening only symbols without a current verdict."""
+        now = now or dt.datetime.utcnow()
+        listing = self.listing(now)
+        previous = self.latest()
+        prior: Dict[str, bool] = {}
+        prior_at: Dict[str, dt.datetime] = {}
+        previous_listing: Set[str] = set()
+        if previous is not None:
+            previous_listing = set(previous.listing)
+            if previous.threshold == self.threshold:
+                prior = previous.screened
+                prior_at = {**previous.screened_at, **self._confirmed(previous)}
+        listed = set(listing)
+        considered = listing[:max_tickers] if max_tickers else listing
+        pending = [
+            symbol
+            for symbol in considered
+            if symbol not in prior or now - prior_at[symbol] > self.verdict_ttl
+        ]
+        if pending and self.screen is None:
+            raise ValueError("refresh needs a screen for symbols without a verdict")
+        verdicts = dict(self.screen(pending)) if pending else {}
+        # An expired verdict whose lookup failed again is kept, and retried on the next refresh.
+        screened = {symbol: verdict for symbol, verdict in prior.items() if symbol in listed}
+        screened_at = {symbol: when for symbol, when in prior_at.items() if symbol in screened}
+        for symbol in pending:
+            if symbol in verdicts:
+                screened[symbol] = bool(verdicts[symbol])
+                screened_at[symbol] = now
+        if previous is not None and previous.listing == listing and previous.screened == screened and previous.threshold == self.threshold:
+            if prior_at != screened_at:
+                # Re-confirmed verdicts only move their timestamps; the pinned version stays as saved.
+                self._save_confirmed(previous, screened_at)
+            return dataclasses.replace(previous, screened_at=screened_at)
+        snapshot = UniverseSnapshot(
+            created_at=now,
+            threshold=self.threshold,
+            listing=listing,
+            screened=screened,
+            screened_at=screened_at,
+            added=[symbol for symbol in listing if symbol not in previous_listing] if previous is not None else [],
+            removed=sorted(previous_listing - listed),
+        )
+        self.save(snapshot)
+        print(
+            f"[universe] Listing {len(listing)} symbols (+{len(snapshot.added)} / -{len(snapshot.removed)}); "
+            f"screened {len(verdicts)} of {len(pending)}, {len(snapshot.members(max_tickers))} members"
+        )
+        return snapshot
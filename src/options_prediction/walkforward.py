@@ -0,0 +1,186 @@
+"""Walk-forward evaluation over rolling train/test windows of backtest results."""
+
+from __future__ import annotations
+
+import datetime as dt
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Sequence
+
+from .cache import from_epoch
+from .config import AppConfig
+from .metrics import CALIBRATION_EDGES, FoldMetrics
+from .results import DIRECTIONS, ResultBatch
+from .runstore import RunStore
+
+_UNKNOWN = DIRECTIONS.index("unknown")
+
+
+class WindowStats:
+    """Event, hit and confidence sums per confidence bucket for the events currently in a window."""
+
+    def __init__(self, buckets: int):
+        self.events = [0] * buckets
+        self.hits = [0] * buckets
+        self.conf = [0.0] * buckets
+        self.conf_sq = [0.0] * buckets
+        self.conf_hit = [0.0] * buckets
+
+    def add(self, bucket: int, confidence: float, hit: bool, sign: int = 1) -> None:
+        self.events[bucket] += sign
+        self.conf[bucket] += sign * confidence
+        self.conf_sq[bucket] += sign * confidence * confidence
+        if hit:
+            self.hits[bucket] += sign
+            self.conf_hit[bucket] += sign * confidence
+
+    def remove(self, bucket: int, confidence: float, hit: bool) -> None:
+        self.add(bucket, confidence, hit, -1)
+
+    @property
+    def total(self) -> int:
+        return sum(self.events)
+
+    def accuracy(self) -> float:
+        total = self.total
+        return sum(self.hits) / total if total else 0.0
+
+    def mean_confidence(self) -> float:
+        total = self.total
+        return sum(self.conf) / total if total else 0.0
+
+    def brier(self, rates: Optional[Sequence[Optional[float]]] = None) -> float:
+        """Mean squared error of the confidences, or of ``rates[bucket]`` where one is given."""
+        total = self.total
+        if not total:
+            return 0.0
+        error = 0.0
+        for b, n in enumerate(self.events):
+            if not n:
+                continue
+            rate = rates[b] if rates is not None else None
+            if rate is None:
+                error += self.conf_sq[b] - 2 * self.conf_hit[b] + self.hits[b]
+            else:
+                error += n * rate * rate - 2 * rate * self.hits[b] + self.hits[b]
+        return max(error, 0.0) / total
+
+    def hit_rates(self) -> List[Optional[float]]:
+        return [hits / n if n else None for hits, n in zip(self.hits, self.events)]
+
+
+def walk_forward(
+    batch: ResultBatch,
+    train: dt.timedelta,
+    test: dt.timedelta,
+    step: Optional[dt.timedelta] = None,
+    edges: Sequence[float] = CALIBRATION_EDGES,
+) -> List[FoldMetrics]:
+    """Score consecutive test windows of length ``test``, each trained on the ``train`` span before it.
+
+    Windows advance by ``step`` (default ``test``); events whose actual move is
+    unknown are left out. The first test window starts one ``train`` span
+    after the earliest event.
+    """
+    step = step or test
+    order = sorted((i for i in range(len(batch)) if batch.actual[i] != _UNKNOWN), key=batch.earnings_date.__getitem__)
+    if not order:
+        return []
+    epochs = [batch.earnings_date[i] for i in order]
+    confidence = [batch.confidence[i] for i in order]
+    hits = [bool(batch.correct[i]) for i in order]
+    bucket_of = tuple(edges[:-1])
+    buckets = [bisect_right(bucket_of, c) for c in confidence]
+    train_s, test_s, step_s = (int(span.total_seconds()) for span in (train, test, step))
+    if test_s <= 0 or step_s <= 0:
+        raise ValueError("test and step windows must be positive")
+
+    train_stats, test_stats = WindowStats(len(edges)), WindowStats(len(edges))
+    # [train_lo, train_hi) and [test_lo, test_hi) index the events inside each window.
+    train_lo = train_hi = test_lo = test_hi = 0
+    folds: List[FoldMetrics] = []
+    test_start = epochs[0] + train_s
+    while test_start <= epochs[-1]:
+        test_end = test_start + test_s
+        while train_hi < len(epochs) and epochs[train_hi] < test_start:
+            train_stats.add(buckets[train_hi], confidence[train_hi], hits[train_hi])
+            train_hi += 1
+        while train_lo < train_hi and epochs[train_lo] < test_start - train_s:
+            train_stats.remove(buckets[train_lo], confidence[train_lo], hits[train_lo])
+            train_lo += 1
+        while test_hi < len(epochs) and epochs[test_hi] < test_end:
+            test_stats.add(buckets[test_hi], confidence[test_hi], hits[test_hi])
+            test_hi += 1
+        while test_lo < test_hi and epochs[test_lo] < test_start:
+            test_stats.remove(buckets[test_lo], confidence[test_lo], hits[test_lo])
+            test_lo += 1
+        if test_stats.total:
+            folds.append(
+                FoldMetrics(
+                    fold=len(folds) + 1,
+                    train_start=from_epoch(test_start - train_s),
+                    test_start=from_epoch(test_start),
+                    test_end=from_epoch(test_end),
+                    train_events=train_stats.total,
+                    train_accuracy=train_stats.accuracy(),
+                    test_events=test_stats.total,
+                    test_accuracy=test_stats.accuracy(),
+                    test_mean_confidence=test_stats.mean_confidence(),
+                    test_brier=test_stats.brier(),
+                    calibrated_brier=test_stats.brier(train_stats.hit_rates()),
+                )
+            )
+        test_start += step_s
+    return folds
+
+
+def format_folds(folds: Iterable[FoldMetrics]) -> List[str]:
+    return [
+        f"fold {f.fold}: train {f.train_start.date()}..{f.test_start.date()} ({f.train_events} events, "
+        f"{f.train_accuracy:.1%}); test {f.test_start.date()}..{f.test_end.date()} ({f.test_events} events): "
+        f"accuracy {f.test_accuracy:.1%}, brier {f.test_brier:.3f}, calibrated {f.calibrated_brier:.3f}"
+        for f in folds
+    ]
+
+
+def main(
+    config: AppConfig,
+    tickers: Optional[Sequence[str]],
+    train: dt.timedelta,
+    test: dt.timedelta,
+    step: Optional[dt.timedelta] = None,
+) -> List[FoldMetrics]:
+    """Backtest ``tickers`` once through the cached pipeline, then score the walk-forward folds.
+
+    Results and fold metrics are recorded as one ``walk-forward`` run in the
+    run-log store, which backtest run queries such as ``runs accuracy`` skip.
+    """
+    from .data import build_universe
+    from .notes import append_notes
+    from .runner import backtest_universe
+
+    config.ensure_paths()
+    symbols = list(tickers) if tickers else build_universe(config.data, config.run.cache_dir)
+    if config.data.max_tickers and not tickers:
+        symbols = symbols[: config.data.max_tickers]
+    batch = ResultBatch(config.data.horizons)
+    with RunStore(config.run.store_path) as store:
+        run_id = store.start_run(tickers=len(symbols), kind="walk-forward")
+        for symbol, results, error in backtest_universe(config, symbols):
+            if error is not None:
+                print(f"[walk-forward] {symbol}: failed ({error})")
+                continue
+            store.record(run_id, [], results)
+            batch.extend(results)
+        folds = walk_forward(batch, train, test, step)
+        store.record_folds(run_id, folds)
+    print(f"[walk-forward] Run {run_id}: {len(batch)} events over {len(symbols)} tickers, {len(folds)} folds")
+    for line in format_folds(folds):
+        print(f"  {line}")
+    if folds:
+        events = sum(f.test_events for f in folds)
+        accuracy = sum(f.test_accuracy * f.test_events for f in folds) / events
+        append_notes(
+            config.run.notes_path,
+            [f"Walk-forward run {run_id}: {len(folds)} folds, out-of-sample accuracy {accuracy:.2%} over {events} events"],
+        )
+    return folds
@@ -0,0 +1,47 @@
+import datetime as dt
+import math
+import random
+
+import pytest
+
+from options_prediction.bench import generate_universe
+from options_prediction.cli import build_config
+
+
+def trading_days(start: dt.datetime, count: int):
+    """``count`` weekday timestamps from ``start``."""
+    days, day = [], start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += dt.timedelta(days=1)
+    return days
+
+
+@pytest.fixture
+def bars():
+    rng = random.Random(3)
+    close, series = 100.0, []
+    for day in trading_days(dt.datetime(2020, 1, 2), 600):
+        close *= math.exp(rng.gauss(0.0, 0.02))
+        series.append((day, round(close, 2)))
+    return series
+
+
+@pytest.fixture
+def offline_config(tmp_path):
+    """An offline, non-iterative config over a small synthetic universe under ``tmp_path``."""
+    data_dir = tmp_path / "data"
+    symbols = generate_universe(data_dir, tickers=4, years=3)
+    config = build_config(
+        offline=True,
+        iterative=False,
+        lookback_years=4,
+        sample_data_dir=data_dir,
+        notes_path=tmp_path / "notes" / "learning_notes.txt",
+        log_path=tmp_path / "notes" / "run_log.csv",
+        results_path=tmp_path / "notes" / "backtest_results.csv",
+    )
+    config.run.cache_dir = tmp_path / "cache"
+    config.run.store_path = tmp_path / "notes" / "runs.sqlite"
+    return config, symbols
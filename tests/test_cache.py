@@ -0,0 +1,70 @@
+import datetime as dt
+
+import pytest
+
+from options_prediction.cache import MarketDataCache, atomic_open, read_columns, write_columns
+from options_prediction.config import DataConfig
+
+
+def test_columns_round_trip(tmp_path):
+    path = tmp_path / "prices" / "ABC.bin"
+    write_columns(path, [1, 2, 3], [10.5, 11.0, 9.25], (0, 100))
+    (timestamps, values), covered = read_columns(path)
+    assert list(timestamps) == [1, 2, 3]
+    assert list(values) == [10.5, 11.0, 9.25]
+    assert covered == (0, 100)
+    assert [p.name for p in path.parent.iterdir()] == ["ABC.bin"]
+
+
+def test_read_columns_rejects_missing_and_torn_files(tmp_path):
+    path = tmp_path / "ABC.bin"
+    assert read_columns(path) is None
+    write_columns(path, [1, 2], [1.0, 2.0], (0, 10))
+    path.write_bytes(path.read_bytes()[:-4])
+    assert read_columns(path) is None
+    path.write_bytes(b"junk")
+    assert read_columns(path) is None
+
+
+def test_write_columns_checks_lengths(tmp_path):
+    with pytest.raises(ValueError):
+        write_columns(tmp_path / "ABC.bin", [1, 2], [1.0], (0, 10))
+
+
+def test_atomic_open_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / "ABC.bin"
+    path.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as handle:
+            handle.write(b"new")
+            raise RuntimeError("interrupted")
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["ABC.bin"]
+
+
+def test_store_and_load_prices(tmp_path):
+    cache = MarketDataCache(tmp_path, DataConfig())
+    bars = [(dt.datetime(2024, 1, 3), 101.0), (dt.datetime(2024, 1, 2), 100.0)]
+    covered = (dt.datetime(2024, 1, 1), dt.datetime(2024, 1, 4))
+    cache.store_prices("abc", bars, covered)
+    assert cache.load_prices("ABC") == (sorted(bars), covered)
+    assert cache.load_prices("XYZ") == ([], None)
+
+
+def test_missing_ranges(tmp_path):
+    cache = MarketDataCache(tmp_path, DataConfig(price_refresh_interval=dt.timedelta(days=1)))
+    start, end = dt.datetime(2024, 1, 1), dt.datetime(2024, 6, 1)
+    now = dt.datetime(2024, 7, 1)
+    assert cache.missing_ranges(None, None, start, end, now) == [(start, end)]
+
+    covered = (dt.datetime(2024, 2, 1), dt.datetime(2024, 6, 1))
+    assert cache.missing_ranges(covered, dt.datetime(2024, 5, 31), start, end, now) == [(start, covered[0])]
+
+    stale = (start, dt.datetime(2024, 5, 1))
+    last_bar = dt.datetime(2024, 4, 30)
+    assert cache.missing_ranges(stale, last_bar, start, end, now) == [(last_bar + dt.timedelta(days=1), end)]
+    assert cache.missing_ranges(stale, None, start, end, now) == [(stale[1], end)]
+
+    # Not yet past the refresh interval relative to ``now``.
+    fresh = (start, dt.datetime(2024, 6, 30, 12))
+    assert cache.missing_ranges(fresh, dt.datetime(2024, 6, 28), start, dt.datetime(2024, 8, 1), now) == []
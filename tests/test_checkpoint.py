@@ -0,0 +1,87 @@
+import csv
+
+import pytest
+
+from options_prediction import runner
+from options_prediction.checkpoint import Checkpoint, checkpoint_path, universe_digest
+
+REPORT = runner._report_symbol
+
+
+def rows(path):
+    with path.open(newline="", encoding="utf-8") as handle:
+        return [row[:-1] for row in csv.reader(handle)]
+
+
+def test_resume_skips_finished_tickers(offline_config, monkeypatch):
+    config, symbols = offline_config
+    full = runner.backtest_once(config, symbols)
+    rows_before = rows(config.run.results_path)
+    assert not checkpoint_path(config).exists()
+
+    report = runner._report_symbol
+    calls = []
+
+    def crash_on_second(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return report(*args)
+
+    monkeypatch.setattr(runner, "_report_symbol", crash_on_second)
+    with pytest.raises(KeyboardInterrupt):
+        runner.backtest_once(config, symbols)
+    monkeypatch.setattr(runner, "_report_symbol", report)
+    with checkpoint_path(config).open("a", encoding="utf-8") as handle:
+        handle.write('{"tick')  # torn final line
+
+    evaluated = []
+    universe = runner.backtest_universe
+
+    def spy(config, tickers, backtester=None, deadline=None):
+        evaluated.extend(tickers)
+        yield from universe(config, tickers, backtester, deadline)
+
+    monkeypatch.setattr(runner, "backtest_universe", spy)
+    resumed = runner.backtest_once(config, symbols, resume=True)
+    assert evaluated == symbols[1:]
+    assert [e.accuracy for e in resumed] == [e.accuracy for e in full]
+    # Rationales differ: the first pass left notes that later passes fold in.
+    assert rows(config.run.results_path) == rows_before
+    assert not checkpoint_path(config).exists()
+
+
+def crash_after(monkeypatch, count):
+    report = REPORT
+    calls = []
+
+    def crash(*args):
+        calls.append(args)
+        if len(calls) > count:
+            raise KeyboardInterrupt
+        return report(*args)
+
+    monkeypatch.setattr(runner, "_report_symbol", crash)
+
+
+def journaled_usage(config, symbols):
+    state = Checkpoint(checkpoint_path(config)).load(universe_digest(config, symbols))
+    return state.predictor["used_tokens"]
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_workers_journal_their_predictor_usage(offline_config, monkeypatch, executor):
+    config, symbols = offline_config
+    config.llm.cache_size = 0  # every prediction spends budget
+    crash_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        runner.backtest_once(config, symbols)
+    expected = journaled_usage(config, symbols)
+    assert expected > 0
+
+    checkpoint_path(config).unlink()
+    crash_after(monkeypatch, 3)
+    config.run.workers, config.run.executor, config.run.pipeline_batch_size = 2, executor, 1
+    with pytest.raises(KeyboardInterrupt):
+        runner.backtest_once(config, symbols)
+    assert journaled_usage(config, symbols) == expected
@@ -0,0 +1,53 @@
+import datetime as dt
+
+from options_prediction.features import FeatureStore, FeatureTable
+from options_prediction.price_index import PriceIndex
+
+WINDOW = dt.timedelta(days=2)
+
+
+def test_row_before_excludes_the_event_day(bars):
+    table = FeatureTable.compute(PriceIndex.from_series(bars), [], WINDOW)
+    day = bars[100][0]
+    for event in (day, day + dt.timedelta(hours=16), day + dt.timedelta(hours=23, minutes=59)):
+        assert table.row_before(event) == 99
+    assert table.row_before(bars[0][0] + dt.timedelta(hours=9)) == -1
+    assert table.row_before(bars[-1][0] + dt.timedelta(days=5)) == len(bars) - 1
+
+
+def test_indexed_events_match_unindexed_lookup(bars):
+    events = [bars[i][0] + dt.timedelta(hours=h) for i in (50, 200, 400) for h in (0, 16)]
+    table = FeatureTable.compute(PriceIndex.from_series(bars), events, WINDOW)
+    fresh = FeatureTable.compute(PriceIndex.from_series(bars), events, WINDOW)
+    table.index_events(events)
+    for event in events:
+        assert table.row_before(event) == fresh.row_before(event)
+        assert table.lookup(event) == fresh.lookup(event)
+
+
+def test_lookup_ignores_the_event_day_close(bars):
+    index = PriceIndex.from_series(bars)
+    event = bars[300][0] + dt.timedelta(hours=16)
+    before = FeatureTable.compute(index, [event], WINDOW).lookup(event)
+    changed = list(bars)
+    changed[300] = (bars[300][0], bars[300][1] * 2)
+    after = FeatureTable.compute(PriceIndex.from_series(changed), [event], WINDOW).lookup(event)
+    assert before == after
+    assert "momentum_20d" in before and "volatility_20d" in before
+
+
+def test_store_reloads_persisted_table(tmp_path, bars):
+    index = PriceIndex.from_series(bars)
+    events = [bars[i][0] for i in (120, 250, 380)]
+    computed = FeatureStore(tmp_path, WINDOW).for_events("ABC", index, events)
+    assert FeatureStore(tmp_path, WINDOW).for_events("ABC", index, events) == computed
+
+
+def test_store_rebuilds_when_the_series_is_extended(tmp_path, bars):
+    events = [bars[i][0] for i in (120, 250)]
+    store = FeatureStore(tmp_path, WINDOW)
+    shorter = store.table("ABC", PriceIndex.from_series(bars[:-10]), events)
+    longer = store.table("ABC", PriceIndex.from_series(bars), events)
+    assert len(shorter) == len(bars) - 10 and len(longer) == len(bars)
+    reloaded = FeatureStore(tmp_path, WINDOW).table("ABC", PriceIndex.from_series(bars), events)
+    assert reloaded.key == longer.key and len(reloaded) == len(bars)
@@ -0,0 +1,91 @@
+import asyncio
+import dataclasses
+import datetime as dt
+import sqlite3
+
+from options_prediction.config import LLMConfig
+from options_prediction.llm import CachedLLM, HeuristicLLM, LLMClient, Prediction
+
+
+class CountingLLM(LLMClient):
+    def __init__(self, config):
+        super().__init__(config)
+        self.calls = []
+
+    def predict_direction(self, ticker, context):
+        self.calls.append(ticker)
+        return Prediction("up", 0.6, f"{ticker} {context.get('eps_surprise')}")
+
+
+def context(surprise, notes=None):
+    values = {"eps_surprise": surprise}
+    if notes:
+        values["notes"] = notes
+    return values
+
+
+def test_heuristic_cache_survives_new_notes(tmp_path):
+    db = tmp_path / "predictions.sqlite"
+    first = CachedLLM(HeuristicLLM(LLMConfig()), db_path=db)
+    first.predict_direction("AAA", context(0.1, "[2024-01-01T00:00:00.1] Completed run; average accuracy: 50.00%"))
+    second = CachedLLM(HeuristicLLM(LLMConfig()), db_path=db)
+    second.predict_direction("AAA", context(0.1, "[2024-01-02T00:00:00.2] Completed run; average accuracy: 60.00%"))
+    assert second.stats()["disk_hits"] == 1 and second.used_tokens == 0
+
+
+def test_provider_keys_ignore_note_timestamps():
+    cached = CachedLLM(CountingLLM(LLMConfig(provider="http")))
+    key = cached.cache_key("AAA", context(0.1, "[2024-01-01T00:00:00.123456] Focus on EPS ; [2024-01-02T10:00:00] Check volume"))
+    assert key == cached.cache_key("AAA", context(0.1, "[2025-06-01T00:00:00] Focus on EPS ; [2025-06-02T00:00:00] Check volume"))
+    assert key != cached.cache_key("AAA", context(0.1, "[2024-01-01T00:00:00] Focus on revenue"))
+
+
+def test_batch_sends_duplicates_once():
+    inner = CountingLLM(LLMConfig())
+    cached = CachedLLM(inner)
+    items = [("AAA", context(0.1)), ("BBB", context(0.2)), ("AAA", context(0.1))]
+    predictions = cached.predict_batch(items)
+    assert inner.calls == ["AAA", "BBB"]
+    assert [p.rationale for p in predictions] == ["AAA 0.1", "BBB 0.2", "AAA 0.1"]
+    assert cached.predict_batch(items) == predictions and len(inner.calls) == 2
+
+
+def test_disk_tier_expires_and_is_capped(tmp_path):
+    db = tmp_path / "predictions.sqlite"
+    config = LLMConfig(disk_cache_max_rows=2)
+    cached = CachedLLM(CountingLLM(config), db_path=db)
+    cached.predict_batch([(ticker, context(0.1)) for ticker in ("AAA", "BBB", "CCC")])
+    conn = sqlite3.connect(str(db))
+    conn.execute("UPDATE predictions SET stored_at = stored_at - 86400 * 31 WHERE rationale LIKE 'AAA%'")
+    conn.commit()
+    conn.close()
+
+    fresh = CachedLLM(CountingLLM(config), db_path=db)  # prunes on open
+    assert fresh.predict_direction("BBB", context(0.1)).rationale == "BBB 0.1"
+    assert fresh.inner.calls == []
+    fresh.predict_direction("AAA", context(0.1))
+    assert fresh.inner.calls == ["AAA"]
+
+    short = CachedLLM(CountingLLM(dataclasses.replace(config, disk_cache_ttl=dt.timedelta(0))), db_path=db)
+    short.predict_direction("CCC", context(0.1))
+    assert short.inner.calls == ["CCC"]
+
+
+def test_predict_batch_inside_a_running_loop():
+    client = CountingLLM(LLMConfig())
+
+    async def caller():
+        return client.predict_batch([("AAA", context(0.1)), ("BBB", context(0.2))])
+
+    assert [p.rationale for p in asyncio.run(caller())] == ["AAA 0.1", "BBB 0.2"]
+
+
+def test_disk_tier_keeps_the_newest_rows(tmp_path):
+    db = tmp_path / "predictions.sqlite"
+    config = LLMConfig(disk_cache_max_rows=2)
+    cached = CachedLLM(CountingLLM(config), db_path=db)
+    for ticker in ("AAA", "BBB", "CCC"):
+        cached.predict_direction(ticker, context(0.1))
+    reopened = CachedLLM(CountingLLM(config), db_path=db)
+    reopened.predict_batch([(ticker, context(0.1)) for ticker in ("AAA", "BBB", "CCC")])
+    assert reopened.inner.calls == ["AAA"]
@@ -0,0 +1,34 @@
+from options_prediction.notes import NotesStore, append_notes, load_notes, rotate_notes, tail_notes
+
+
+def test_tail_notes(tmp_path):
+    path = tmp_path / "notes.txt"
+    append_notes(path, [f"note {i}" for i in range(2000)])
+    assert [line.split("] ", 1)[1] for line in tail_notes(path, 3)] == ["note 1997", "note 1998", "note 1999"]
+    assert tail_notes(path, 0) == []
+    assert tail_notes(tmp_path / "missing.txt", 3) == []
+
+
+def test_rotation_keeps_archives_bounded(tmp_path):
+    path = tmp_path / "notes.txt"
+    max_bytes = 4096
+    for batch in range(40):
+        append_notes(path, [f"batch {batch} note {i}" for i in range(50)])
+        rotate_notes(path, max_bytes, keep=10)
+        assert path.stat().st_size <= max_bytes + 50 * 64
+    assert len(load_notes(path)) >= 10
+    assert load_notes(path)[-1].endswith("batch 39 note 49")
+    archives = sorted(p.name for p in tmp_path.iterdir() if p.name != "notes.txt")
+    assert archives == ["notes.txt.1", "notes.txt.2"]
+    for name in archives:
+        assert (tmp_path / name).stat().st_size <= 2 * max_bytes
+
+
+def test_notes_store_rereads_on_change(tmp_path):
+    path = tmp_path / "notes.txt"
+    store = NotesStore(path, tail=2)
+    assert store.latest() == []
+    append_notes(path, ["first", "second", "third"])
+    assert store.changed()
+    assert [line.split("] ", 1)[1] for line in store.latest()] == ["second", "third"]
+    assert not store.changed()
@@ -0,0 +1,45 @@
+import datetime as dt
+
+from options_prediction.cache import to_epoch
+from options_prediction.data import end_of_day_close
+from options_prediction.price_index import EventWindow, PriceIndex, horizon_span
+
+
+def brute_window(bars, date, horizons, window):
+    before = [i for i, (ts, _) in enumerate(bars) if ts <= date]
+    after = [i for i, (ts, _) in enumerate(bars) if ts > date]
+    pre = bars[before[-1]][1] if before else None
+    post = bars[after[0]][1] if after and bars[after[0]][0] <= date + window else None
+    closes = []
+    for h in horizons:
+        i = before[-1] + h if before else None
+        ok = i is not None and i < len(bars) and bars[i][0] <= date + horizon_span(h)
+        closes.append(bars[i][1] if ok else None)
+    return EventWindow(pre, post, tuple(closes))
+
+
+def test_event_windows_match_brute_force(bars):
+    window = dt.timedelta(days=2)
+    horizons = (1, 5, 20)
+    dates = [bars[0][0] - dt.timedelta(days=3), bars[-1][0] + dt.timedelta(days=1)]
+    dates += [bars[i][0] + dt.timedelta(hours=h) for i in range(0, len(bars), 37) for h in (0, 16)]
+    dates.reverse()  # results come back in input order, not date order
+    expected = [brute_window(bars, d, horizons, window) for d in dates]
+    assert PriceIndex.from_series(bars).event_windows(dates, horizons, window) == expected
+    columns = PriceIndex.from_columns([to_epoch(ts) for ts, _ in bars], [close for _, close in bars])
+    assert columns.event_windows(dates, horizons, window) == expected
+    assert [end_of_day_close(bars, d) for d in dates] == [(w.pre_close, w.post_close) for w in expected]
+
+
+def test_horizon_close_is_capped_by_calendar_time():
+    day = dt.datetime(2024, 1, 2)
+    # One bar after the event, then nothing for two months.
+    bars = [(day, 10.0), (day + dt.timedelta(days=1), 11.0), (day + dt.timedelta(days=60), 12.0)]
+    (window,) = PriceIndex.from_series(bars).event_windows([day], (1, 2))
+    assert window == EventWindow(10.0, 11.0, (11.0, None))
+
+
+def test_event_closes_on_empty_index():
+    assert PriceIndex([], []).event_closes([dt.datetime(2024, 1, 2)]) == [None]
+    assert end_of_day_close([], dt.datetime(2024, 1, 2)) is None
+    assert PriceIndex.from_series([(dt.datetime(2024, 1, 3), 5.0)]).event_closes([dt.datetime(2024, 1, 2)]) == [(None, 5.0)]
@@ -0,0 +1,45 @@
+import csv
+import datetime as dt
+
+import pytest
+
+from options_prediction.backtest import BacktestResult
+from options_prediction.results import ParquetResultWriter, open_result_writer, result_columns
+
+
+def result(surprise):
+    return BacktestResult(
+        ticker="AAPL",
+        earnings_date=dt.datetime(2024, 1, 25),
+        pre_close=100.0,
+        post_close=103.0,
+        direction="unknown",
+        predicted_direction="up",
+        confidence=0.7,
+        rationale="beat",
+        horizon_returns={1: 0.03, 5: None},
+        eps_surprise=surprise,
+    )
+
+
+def test_csv_writer_emits_shared_columns(tmp_path):
+    path = tmp_path / "results.csv"
+    with open_result_writer(path, (1, 5)) as writer:
+        writer.write([result(0.12), result(None)])
+    with path.open(newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert list(rows[0]) == result_columns((1, 5))
+    assert [row["eps_surprise"] for row in rows] == ["0.12", ""]
+    assert rows[0]["direction_1d"] == "up" and rows[0]["direction_5d"] == "unknown"
+
+
+def test_parquet_writer_emits_shared_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "results.parquet"
+    with ParquetResultWriter(path, (1, 5)) as writer:
+        writer.write([result(0.12), result(None)])
+    table = pq.read_table(path)
+    assert table.column_names == result_columns((1, 5))
+    assert table.column("eps_surprise").to_pylist() == [0.12, None]
@@ -0,0 +1,53 @@
+import datetime as dt
+import sqlite3
+
+from options_prediction.backtest import RunLogEntry
+from options_prediction.runstore import RunStore
+
+START = dt.datetime(2024, 1, 1)
+
+
+def entry(ticker, accuracy, day=0, predictions=4):
+    return RunLogEntry(START + dt.timedelta(days=day), ticker, accuracy, f"Predictions={predictions} accuracy={accuracy:.2%}")
+
+
+def test_history_and_accuracy_cover_backtest_runs_only(tmp_path):
+    with RunStore(tmp_path / "runs.sqlite") as store:
+        first = store.start_run(START)
+        store.record(first, [entry("AAA", 0.5), entry("BBB", 0.25, predictions=0)])
+        walk = store.start_run(START, kind="walk-forward")
+        store.record(walk, [entry("AAA", 1.0, day=5)])
+        second = store.start_run(START)
+        store.record(second, [entry("AAA", 0.75, day=1)])
+
+        history = store.history()
+        assert history["AAA"].last_run == START + dt.timedelta(days=1)
+        assert history["AAA"].accuracy == 0.625 and history["AAA"].scored_runs == 2
+        assert history["BBB"].accuracy is None
+        assert store.ticker_accuracy(1) == {"AAA": 0.75}
+        assert store.ticker_accuracy(5, ["AAA"]) == {"AAA": 0.625}
+        assert [run for run, _, _ in store.ticker_trend("AAA", 5)] == [second, first]
+
+
+def test_history_is_rebuilt_for_older_stores(tmp_path):
+    path = tmp_path / "runs.sqlite"
+    with RunStore(path) as store:
+        run = store.start_run(START)
+        store.record(run, [entry("AAA", 0.5), entry("BBB", 1.0)])
+        expected = store.history()
+    db = sqlite3.connect(str(path))
+    db.execute("DROP TABLE ticker_history")
+    db.commit()
+    db.close()
+    with RunStore(path) as store:
+        assert store.history() == expected
+
+
+def test_csv_round_trip(tmp_path):
+    with RunStore(tmp_path / "runs.sqlite") as store:
+        store.record(store.start_run(START), [entry("AAA", 0.5), entry("BBB", 1.0)])
+        store.record(store.start_run(START), [entry("AAA", 0.25, day=1)])
+        assert store.export_csv(tmp_path / "run_log.csv") == 3
+    with RunStore(tmp_path / "copy.sqlite") as copy:
+        assert copy.import_csv(tmp_path / "run_log.csv") == 2
+        assert copy.history()["AAA"].scored_runs == 2
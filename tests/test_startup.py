@@ -0,0 +1,30 @@
+"""Offline and note-taking commands must not import pandas or yfinance."""
+
+import pytest
+
+from options_prediction.bench import check_startup, generate_universe
+from options_prediction.checks import HEAVY_MODULES
+
+
+@pytest.fixture
+def heavy_stubs(tmp_path, monkeypatch):
+    # Importable stand-ins, so the probe sees an import even where the real packages are missing.
+    stubs = tmp_path / "stubs"
+    for name in HEAVY_MODULES:
+        (stubs / name).mkdir(parents=True)
+        (stubs / name / "__init__.py").write_text("")
+    monkeypatch.setenv("PYTHONPATH", str(stubs))
+    return stubs
+
+
+def test_offline_paths_skip_heavy_modules(tmp_path, heavy_stubs):
+    symbols = generate_universe(tmp_path / "data", tickers=1, years=2)
+    probes = check_startup(tmp_path / "work", tmp_path / "data", symbols[0], lookback_years=3)
+    assert set(probes) == {"add_note", "offline_backtest"}
+
+
+def test_check_startup_reports_heavy_imports(tmp_path, heavy_stubs):
+    (heavy_stubs / "sitecustomize.py").write_text("import pandas\n")
+    symbols = generate_universe(tmp_path / "data", tickers=1, years=2)
+    with pytest.raises(AssertionError, match="pandas"):
+        check_startup(tmp_path / "work", tmp_path / "data", symbols[0], lookback_years=3)
@@ -0,0 +1,62 @@
+import math
+import random
+
+import pytest
+
+from options_prediction.metrics import CALIBRATION_EDGES
+from options_prediction.sweep import _DOWN, _FLAT, _UP, SweepDataset, _Column, parameter_grid, sweep
+
+
+def brute(params, surprises, outcomes):
+    calls = []
+    for surprise, outcome in zip(surprises, outcomes):
+        if abs(surprise) > params.surprise_threshold:
+            confidence = min(params.confidence_base + params.confidence_slope * abs(surprise), params.confidence_cap)
+            hit = outcome == (_UP if surprise > 0 else _DOWN)
+        else:
+            confidence, hit = params.flat_confidence, outcome == _FLAT
+        calls.append((confidence, float(hit)))
+    n = len(calls)
+    buckets = {}
+    for confidence, hit in calls:
+        low = max([0.0] + [e for e in CALIBRATION_EDGES[:-1] if e <= confidence])
+        conf_sum, hit_sum = buckets.get(low, (0.0, 0.0))
+        buckets[low] = (conf_sum + confidence, hit_sum + hit)
+    return (
+        sum(h for _, h in calls) / n,
+        sum(c for c, _ in calls) / n,
+        sum((c - h) ** 2 for c, h in calls) / n,
+        sum(abs(c - h) for c, h in buckets.values()) / n,
+    )
+
+
+def test_grid_matches_brute_force():
+    rng = random.Random(11)
+    surprises = [round(rng.gauss(0.0, 0.08), 3) for _ in range(300)] + [0.0, 0.02, -0.02]
+    outcomes = [rng.choice((_UP, _UP, _DOWN, _FLAT)) for _ in surprises]
+    dataset = SweepDataset({(2, 0): _Column(surprises, outcomes)})
+    grid = parameter_grid((0.0, 0.02, 0.05), (0.5, 0.55), (0.0, 1.0, 4.0), (0.7, 0.95), (0.4, 0.65))
+    rows = sweep(dataset, grid)
+    assert len(rows) == len(grid)
+    for row in rows:
+        assert row.events == len(surprises)
+        expected = brute(row.params, surprises, outcomes)
+        got = (row.accuracy, row.mean_confidence, row.brier, row.calibration_error)
+        assert got == pytest.approx(expected, abs=1e-9), row.params
+
+
+def test_calibration_buckets_cover_every_event():
+    rng = random.Random(5)
+    surprises = [rng.uniform(-0.2, 0.2) for _ in range(120)]
+    outcomes = [rng.choice((_UP, _DOWN)) for _ in surprises]
+    dataset = SweepDataset({(2, 0): _Column(surprises, outcomes)})
+    for params in parameter_grid((0.01,), (0.5,), (2.0,), (0.9,), (0.45,)):
+        buckets = dataset.calibration(params, 2)
+        assert sum(count for _, _, count, _, _ in buckets) == len(surprises)
+        assert math.isclose(sum(conf for *_, conf, _ in buckets), dataset.evaluate(params, 2).mean_confidence * len(surprises))
+
+
+def test_empty_column():
+    dataset = SweepDataset({(2, 0): _Column([], [])})
+    (row,) = sweep(dataset, parameter_grid((0.0,), (0.5,), (1.0,), (0.95,), (0.4,)))
+    assert row.events == 0 and row.accuracy == 0.0
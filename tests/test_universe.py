@@ -0,0 +1,66 @@
+import datetime as dt
+
+from options_prediction.universe import UniverseManager
+
+DAY = dt.timedelta(days=1)
+
+
+def make_manager(cache_dir, listing, caps, lookups):
+    def screen(symbols):
+        lookups.append(list(symbols))
+        return {symbol: caps[symbol] > 100 for symbol in symbols if symbol in caps}
+
+    return UniverseManager(cache_dir, lambda: list(listing), screen, threshold=100, listing_ttl=DAY, verdict_ttl=2 * DAY)
+
+
+def test_refresh_screens_only_new_and_expired_symbols(tmp_path):
+    listing, caps, lookups = ["AAA", "BBB"], {"AAA": 500, "BBB": 50}, []
+    manager = make_manager(tmp_path, listing, caps, lookups)
+    start = dt.datetime.utcnow()  # the listing TTL is checked against file mtimes
+    first = manager.refresh(now=start)
+    assert first.members() == ["AAA"]
+
+    listing.append("CCC")
+    caps["CCC"] = 900
+    second = manager.refresh(now=start + 2 * DAY)
+    assert lookups[-1] == ["CCC"]
+    assert second.members() == ["AAA", "CCC"] and second.added == ["CCC"]
+    assert manager.as_of(start + DAY).members() == ["AAA"]
+
+
+def test_failed_lookups_are_retried(tmp_path):
+    listing, caps, lookups = ["AAA", "BBB"], {"AAA": 500}, []
+    manager = make_manager(tmp_path, listing, caps, lookups)
+    start = dt.datetime.utcnow()
+    manager.refresh(now=start)
+    caps["BBB"] = 700
+    assert manager.refresh(now=start + DAY * 2).members() == ["AAA", "BBB"]
+    assert lookups[-1] == ["BBB"]
+
+
+def test_reconfirmation_leaves_pinned_snapshots_untouched(tmp_path):
+    listing, caps, lookups = ["AAA", "BBB"], {"AAA": 500, "BBB": 50}, []
+    manager = make_manager(tmp_path, listing, caps, lookups)
+    start = dt.datetime.utcnow()
+    manager.refresh(now=start)
+    (pinned,) = (tmp_path / "universe").glob("*.json")
+    saved = pinned.read_bytes()
+
+    refreshed = manager.refresh(now=start + 3 * DAY)
+    assert lookups[-1] == ["AAA", "BBB"]
+    assert refreshed.created_at == start
+    assert refreshed.screened_at["AAA"] == start + 3 * DAY
+    assert pinned.read_bytes() == saved
+    assert manager.versions() == [start]
+
+    # The re-confirmation still counts towards the verdict TTL.
+    manager.refresh(now=start + 4 * DAY)
+    assert len(lookups) == 2
+
+
+def test_without_cache_dir_nothing_is_saved(tmp_path):
+    lookups = []
+    manager = make_manager(None, ["AAA"], {"AAA": 500}, lookups)
+    manager.refresh(now=dt.datetime(2024, 1, 1))
+    manager.refresh(now=dt.datetime(2024, 1, 1))
+    assert len(lookups) == 2 and manager.versions() == []
@@ -0,0 +1,85 @@
+import datetime as dt
+import random
+
+import pytest
+
+from options_prediction.backtest import BacktestResult
+from options_prediction.metrics import CALIBRATION_EDGES
+from options_prediction.results import ResultBatch
+from options_prediction.walkforward import walk_forward
+
+
+def make_results(count=200, seed=9):
+    rng = random.Random(seed)
+    start = dt.datetime(2018, 1, 1)
+    results = []
+    for _ in range(count):
+        pre = 100.0
+        post = rng.choice((None, 99.0, 100.0, 101.0, 101.0))
+        results.append(
+            BacktestResult(
+                ticker=rng.choice("ABCD"),
+                earnings_date=start + dt.timedelta(days=rng.randrange(0, 1500)),
+                pre_close=pre,
+                post_close=post,
+                direction="unknown",
+                predicted_direction=rng.choice(("up", "down", "flat")),
+                confidence=round(rng.uniform(0.3, 1.0), 3),
+                rationale="",
+            )
+        )
+    return results
+
+
+def brute(results, train, test, step):
+    known = sorted((r for r in results if r.actual_direction != "unknown"), key=lambda r: r.earnings_date)
+    first, last = known[0].earnings_date, known[-1].earnings_date
+
+    def bucket(confidence):
+        return sum(1 for edge in CALIBRATION_EDGES[:-1] if confidence >= edge)
+
+    folds, test_start = [], first + train
+    while test_start <= last:
+        test_end = test_start + test
+        training = [r for r in known if test_start - train <= r.earnings_date < test_start]
+        testing = [r for r in known if test_start <= r.earnings_date < test_end]
+        if testing:
+            rates = {}
+            for b in {bucket(r.confidence) for r in training}:
+                members = [r for r in training if bucket(r.confidence) == b]
+                rates[b] = sum(r.correct for r in members) / len(members)
+            calibrated = [rates.get(bucket(r.confidence), r.confidence) for r in testing]
+            folds.append(
+                (
+                    test_start,
+                    len(training),
+                    len(testing),
+                    sum(r.correct for r in testing) / len(testing),
+                    sum((r.confidence - r.correct) ** 2 for r in testing) / len(testing),
+                    sum((c - r.correct) ** 2 for c, r in zip(calibrated, testing)) / len(testing),
+                )
+            )
+        test_start += step
+    return folds
+
+
+@pytest.mark.parametrize("train_days,test_days,step_days", [(365, 90, None), (180, 120, 30), (400, 30, 45)])
+def test_folds_match_brute_force(train_days, test_days, step_days):
+    results = make_results()
+    train, test = dt.timedelta(days=train_days), dt.timedelta(days=test_days)
+    step = dt.timedelta(days=step_days) if step_days else None
+    folds = walk_forward(ResultBatch.from_results(results), train, test, step)
+    expected = brute(results, train, test, step or test)
+    assert [f.fold for f in folds] == list(range(1, len(expected) + 1))
+    assert [f.test_start for f in folds] == [e[0] for e in expected]
+    got = [(f.train_events, f.test_events, f.test_accuracy, f.test_brier, f.calibrated_brier) for f in folds]
+    assert got == [pytest.approx(e[1:]) for e in expected]
+    for fold in folds:
+        assert fold.test_start - fold.train_start == train and fold.test_end - fold.test_start == test
+
+
+def test_rejects_empty_windows():
+    batch = ResultBatch.from_results(make_results(10))
+    with pytest.raises(ValueError):
+        walk_forward(batch, dt.timedelta(days=30), dt.timedelta(0))
+    assert walk_forward(ResultBatch(), dt.timedelta(days=30), dt.timedelta(days=30)) == []